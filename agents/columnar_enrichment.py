@@ -0,0 +1,162 @@
+"""
+Vectorized, columnar lead enrichment for large CRM imports.
+
+Produces the same enriched fields as ``LeadResearchAgent.enrich_lead_data`` for a
+whole table of leads at once: company sizes are bucketed with a single
+``numpy.searchsorted`` call, and job titles and industries are classified once per
+distinct value and broadcast back to the rows through integer category codes.
+
+Requires NumPy; pandas DataFrames are supported when pandas is installed.
+"""
+
+from agents.enrichment_rules import EnrichmentRules, normalize_text
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def enrich_columns(table, rules=None):
+    """
+    Enrich a table of leads in one vectorized pass.
+
+    Args:
+        table: A pandas DataFrame or a dict mapping column names to equal-length
+            sequences/arrays. Uses the ``company``, ``job_title``, ``industry``
+            and ``company_size`` columns; missing columns are treated as empty.
+        rules (EnrichmentRules): Classification rules (defaults to config/config.yaml)
+
+    Returns:
+        The same kind of table with the enriched columns added.
+    """
+    if np is None:
+        raise ImportError("Columnar enrichment requires numpy: pip install 'OutboundSalesCrew[columnar]'")
+
+    rules = rules or EnrichmentRules.from_config()
+    is_dataframe = hasattr(table, "columns") and hasattr(table, "assign")
+    columns = {name: table[name] for name in table.columns} if is_dataframe else dict(table)
+
+    row_count = _row_count(columns)
+    company = _text_column(columns.get("company"), row_count)
+    job_title = _text_column(columns.get("job_title"), row_count)
+    industry = _text_column(columns.get("industry"), row_count)
+    company_size = _numeric_column(columns.get("company_size"), row_count)
+
+    # Size buckets: one binary search over the configured bounds for every row
+    size_bucket = np.minimum(
+        np.searchsorted(np.asarray(rules.size_bounds, dtype=float), company_size, side="right"),
+        len(rules.size_bounds) - 1
+    )
+
+    # Titles and industries: classify each distinct value once, then gather by code
+    role_names = list(rules.roles)
+    role_codes = _category_codes(
+        job_title,
+        lambda text: role_names.index(rules.role_matcher.match(text) or rules.default_role)
+    )
+    industry_names = list(rules.industries)
+    industry_codes = _category_codes(
+        industry,
+        lambda text: industry_names.index(rules.industry_matcher.match(text) or "default")
+    )
+
+    size_labels = np.array([label for label, _ in rules.size_categories], dtype=object)
+    size_category = size_labels[size_bucket]
+
+    # List- and dict-valued cells need one fresh object per row
+    size_pain_points = [pain_points for _, pain_points in rules.size_categories]
+    roles = [rules.roles[name] for name in role_names]
+    industries = [rules.industries[name] for name in industry_names]
+
+    likely_pain_points = _object_column(list(size_pain_points[b]) for b in size_bucket.tolist())
+    role_context = _object_column(
+        {**roles[c], "priorities": list(roles[c]["priorities"])} for c in role_codes.tolist()
+    )
+    industry_insights = _object_column(
+        {key: list(values) for key, values in industries[c].items()} for c in industry_codes.tolist()
+    )
+    personalization_hooks = _object_column(
+        [
+            f"Given {comp}'s position as a {size} in the {ind} space",
+            f"As a {roles[r]['level']} professional focused on {', '.join(roles[r]['priorities'][:2])}",
+            f"With the current {ind} trends around {', '.join(industries[i]['key_trends'][:2])}"
+        ]
+        for comp, ind, size, r, i in zip(
+            company.tolist(), industry.tolist(), size_category.tolist(),
+            role_codes.tolist(), industry_codes.tolist()
+        )
+    )
+
+    enriched = {
+        "company_size_category": size_category,
+        "likely_pain_points": likely_pain_points,
+        "role_context": role_context,
+        "industry_category": np.array(industry_names, dtype=object)[industry_codes],
+        "industry_insights": industry_insights,
+        "personalization_hooks": personalization_hooks
+    }
+
+    if is_dataframe:
+        return table.assign(**enriched)
+    return {**columns, **enriched}
+
+
+def _row_count(columns):
+    """Return the shared length of the table's columns."""
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"All columns must have the same length, got lengths {sorted(lengths)}")
+    return lengths.pop() if lengths else 0
+
+
+def _text_column(values, row_count):
+    """Convert a column to an object array of strings, with missing values as ''."""
+    if values is None:
+        return np.full(row_count, "", dtype=object)
+    array = np.asarray(values, dtype=object)
+    return np.array(["" if _is_missing(v) else str(v) for v in array.tolist()], dtype=object)
+
+
+def _numeric_column(values, row_count):
+    """Convert a column to a float array, with missing or unparsable values as 0."""
+    if values is None:
+        return np.zeros(row_count, dtype=float)
+    try:
+        array = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        array = np.array([_to_float(v) for v in np.asarray(values, dtype=object).tolist()], dtype=float)
+    return np.nan_to_num(array, nan=0.0)
+
+
+def _category_codes(text, classify):
+    """Classify each distinct value once and return one code per row."""
+    if len(text) == 0:
+        return np.zeros(0, dtype=np.intp)
+    unique_values, inverse = np.unique(text.astype(str), return_inverse=True)
+    unique_codes = np.array(
+        [classify(normalize_text(value)) for value in unique_values.tolist()], dtype=np.intp
+    )
+    return unique_codes[inverse.reshape(-1)]
+
+
+def _object_column(values):
+    """Build a 1-D object array without NumPy trying to broadcast nested lists."""
+    values = list(values)
+    array = np.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        array[index] = value
+    return array
+
+
+def _is_missing(value):
+    """True for None and NaN cells."""
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _to_float(value):
+    """Best-effort float conversion used for mixed-type size columns."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,179 @@
+"""
+Time budgets for campaigns and batches.
+
+A ``Deadline`` is created per campaign (and optionally per batch, capping
+every campaign in it) and activated in a ``contextvars`` context, like the
+metrics collectors in ``agents.metrics``. Code below it reads the current
+deadline instead of having it threaded through every call:
+
+- ``LLMClient`` caps each request's timeout at the time left, gives up
+  waiting for the rate limiter and skips retries that cannot finish in time;
+- the crew checks the deadline between stages and runs CrewAI kickoffs, which
+  cannot be cancelled, through ``call_with_deadline`` so the caller returns
+  when the budget runs out while the abandoned kickoff finishes on its own
+  thread;
+- async campaigns are cancelled with ``asyncio.wait_for``, which cancels
+  their in-flight requests.
+
+Every stage output finished within a deadline is recorded on it, so a
+campaign that runs out of time can still be returned as a partial campaign.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+
+_current_deadline = ContextVar("current_deadline", default=None)
+
+
+class BudgetExceeded(Exception):
+    """Raised when a campaign or batch time budget runs out."""
+
+    def __init__(self, deadline):
+        self.budget = deadline.source
+        self.budget_seconds = deadline.source_seconds
+        self.stage = deadline.stage
+        self.elapsed_seconds = round(deadline.elapsed(), 3)
+        super().__init__(
+            f"{self.budget} time budget of {self.budget_seconds}s exceeded "
+            f"during {self.stage or 'startup'} after {self.elapsed_seconds}s"
+        )
+
+    def to_dict(self):
+        """The ``budget_exceeded`` block of a partial campaign."""
+        return {
+            "budget": self.budget,
+            "budget_seconds": self.budget_seconds,
+            "stage": self.stage,
+            "elapsed_seconds": self.elapsed_seconds
+        }
+
+
+class Deadline:
+    """A point in time by which a campaign (or batch) has to be finished."""
+
+    def __init__(self, seconds=None, parent=None, name="campaign"):
+        """
+        Args:
+            seconds (float): Budget from now; None for no budget of its own
+            parent (Deadline): Enclosing deadline (e.g. the batch's); the
+                earlier of the two applies
+            name (str): Label used in ``BudgetExceeded`` ("campaign" or "batch")
+        """
+        self.name = name
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds if seconds is not None else None
+        self.source, self.source_seconds = name, seconds
+        if parent is not None and parent.expires_at is not None and (
+            self.expires_at is None or parent.expires_at < self.expires_at
+        ):
+            self.expires_at = parent.expires_at
+            self.source, self.source_seconds = parent.source, parent.source_seconds
+
+        self.stage = None
+        self.stages = {}
+        self._exceeded = False
+
+    def remaining(self):
+        """Seconds left, or None without a budget."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        """True once the budget has run out (or a caller gave up on it early)."""
+        if self._exceeded:
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def exceeded(self):
+        """Mark the budget as spent and return the ``BudgetExceeded`` to raise."""
+        self._exceeded = True
+        return BudgetExceeded(self)
+
+    def check(self, stage=None):
+        """Enter ``stage`` (when given), raising ``BudgetExceeded`` if time is up."""
+        if stage is not None:
+            self.stage = stage
+        if self.expired:
+            raise self.exceeded()
+
+    def timeout(self, default=None):
+        """``default`` seconds, capped at the time left."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+    def record(self, stage, output):
+        """Remember a finished stage output for a partial campaign."""
+        self.stages[stage] = output
+
+    @contextmanager
+    def activate(self):
+        """Make this deadline current for LLM calls and stage checks in this context."""
+        token = _current_deadline.set(self)
+        try:
+            yield self
+        finally:
+            _current_deadline.reset(token)
+
+
+def current_deadline():
+    """The deadline active in this context, or None."""
+    return _current_deadline.get()
+
+
+def check_deadline(stage=None):
+    """``Deadline.check`` on the current deadline (a no-op without one)."""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def record_stage(stage, output):
+    """Record a finished stage output on the current deadline, if any."""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.record(stage, output)
+
+
+def call_with_deadline(func, *args, **kwargs):
+    """
+    Call ``func`` but return no later than the current deadline.
+
+    Without a budget ``func`` simply runs in the calling thread. Otherwise it
+    runs on a daemon thread (in a copy of this context) and ``BudgetExceeded``
+    is raised once the deadline passes; the thread is abandoned and finishes
+    in the background, since blocking calls such as a CrewAI kickoff cannot be
+    interrupted.
+    """
+    deadline = _current_deadline.get()
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is None:
+        return func(*args, **kwargs)
+    deadline.check()
+
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=copy_context().run, args=(run,), name="deadline-call", daemon=True)
+    thread.start()
+    thread.join(remaining)
+    if thread.is_alive():
+        raise deadline.exceeded()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
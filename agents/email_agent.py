@@ -2,23 +2,43 @@
 Email Drafting Agent for creating personalized cold outreach emails using OpenAI GPT.
 """
 
-from crewai import Agent
 import json
-import os
-from openai import OpenAI
+from agents.llm_client import LLMClient
+from agents.prompt_builder import build_messages, lead_fields, product_block, prompt_token_counts
+
+
+COLD_EMAIL_SYSTEM_PROMPT = """You are an expert B2B sales email writer. Create personalized, 
+                        engaging cold outreach emails that feel authentic and human. Focus on the 
+                        prospect's specific challenges and how your solution can help. Keep emails 
+                        concise (150-200 words), conversational, and always include a clear, 
+                        low-pressure call-to-action. Return your response in JSON format with 
+                        'subject' and 'body' fields."""
+
+COLD_EMAIL_REQUIREMENTS = """1. Use the prospect's name and reference their specific role/company
+2. Connect their likely challenges to your solution's benefits
+3. Keep it conversational and human (avoid corporate speak)
+4. Include social proof or credibility indicators if relevant
+5. End with a soft, low-pressure call-to-action
+6. Subject line should be intriguing but not salesy
+7. Total length: 150-200 words maximum
+Return as JSON with 'subject' and 'body' fields."""
 
 
 class EmailDraftingAgent:
     """Agent responsible for creating personalized sales emails."""
     
-    def __init__(self):
+    def __init__(self, llm_client=None, count_prompt_tokens=False):
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.llm_client = llm_client or LLMClient()
         self.model = "gpt-4o"
+        # Attach prompt_token_counts to each email (a debugging aid for prompt size)
+        self.count_prompt_tokens = count_prompt_tokens
     
     def create_agent(self):
         """Create and return the email drafting agent."""
+        from crewai import Agent
+        
         return Agent(
             role="Sales Email Specialist",
             goal="Create compelling, personalized cold outreach emails using OpenAI that drive engagement and responses",
@@ -47,89 +67,76 @@ class EmailDraftingAgent:
         Returns:
             dict: Generated email with subject and body
         """
-        prompt = self._build_email_prompt(enriched_lead_profile, product_info, "cold_email")
+        messages = self._build_email_messages(enriched_lead_profile, product_info)
         
         try:
-            response = self.openai_client.chat.completions.create(
+            return self.llm_client.complete(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert B2B sales email writer. Create personalized, 
-                        engaging cold outreach emails that feel authentic and human. Focus on the 
-                        prospect's specific challenges and how your solution can help. Keep emails 
-                        concise (150-200 words), conversational, and always include a clear, 
-                        low-pressure call-to-action. Return your response in JSON format with 
-                        'subject' and 'body' fields."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=messages,
+                temperature=0.7,
                 response_format={"type": "json_object"},
-                temperature=0.7
+                validate=lambda content: self._parse_email_response(content, messages)
             )
             
-            content = response.choices[0].message.content
-            if content:
-                result = json.loads(content)
-            else:
-                raise Exception("Empty response from OpenAI")
-            return {
-                "type": "cold_email",
-                "subject": result.get("subject", ""),
-                "body": result.get("body", ""),
-                "generated_at": self._get_timestamp()
-            }
-            
         except Exception as e:
             raise Exception(f"Failed to generate cold email: {e}")
     
-    def _build_email_prompt(self, lead_profile, product_info, email_type):
-        """Build the prompt for email generation."""
-        
-        # Extract key information
-        name = lead_profile.get('name', 'there')
-        company = lead_profile.get('company', '')
-        job_title = lead_profile.get('job_title', '')
-        role_context = lead_profile.get('role_context', {})
-        pain_points = lead_profile.get('likely_pain_points', [])
-        personalization_hooks = lead_profile.get('personalization_hooks', [])
-        
-        prompt = f"""
-        Write a personalized {email_type.replace('_', ' ')} for this prospect:
-        
-        PROSPECT DETAILS:
-        - Name: {name}
-        - Job Title: {job_title}
-        - Company: {company}
-        - Role Level: {role_context.get('level', 'Professional')}
-        - Key Priorities: {', '.join(role_context.get('priorities', []))}
-        - Likely Pain Points: {', '.join(pain_points)}
-        
-        PERSONALIZATION HOOKS:
-        {chr(10).join(f'- {hook}' for hook in personalization_hooks)}
-        
-        PRODUCT/SERVICE INFORMATION:
-        - Name: {product_info.get('name', 'our solution')}
-        - Description: {product_info.get('description', 'a comprehensive business solution')}
-        - Key Benefits: {', '.join(product_info.get('benefits', ['improved efficiency', 'cost savings']))}
-        - Target Outcome: {product_info.get('target_outcome', 'business growth and optimization')}
+    async def agenerate_cold_email(self, enriched_lead_profile, product_info):
+        """
+        Async version of ``generate_cold_email`` built on ``AsyncOpenAI``.
         
-        EMAIL REQUIREMENTS:
-        1. Use the prospect's name and reference their specific role/company
-        2. Connect their likely challenges to your solution's benefits
-        3. Keep it conversational and human (avoid corporate speak)
-        4. Include social proof or credibility indicators if relevant
-        5. End with a soft, low-pressure call-to-action
-        6. Subject line should be intriguing but not salesy
-        7. Total length: 150-200 words maximum
+        Args:
+            enriched_lead_profile (dict): Enriched lead information
+            product_info (dict): Information about the product/service being sold
+            
+        Returns:
+            dict: Generated email with subject and body
+        """
+        messages = self._build_email_messages(enriched_lead_profile, product_info)
         
-        Return as JSON with 'subject' and 'body' fields.
+        try:
+            return await self.llm_client.acomplete(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._parse_email_response(content, messages)
+            )
+            
+        except Exception as e:
+            raise Exception(f"Failed to generate cold email: {e}")
+    
+    def _build_email_messages(self, lead_profile, product_info):
         """
+        Build the chat messages for cold email generation.
         
-        return prompt.strip()
+        Instructions, product and requirements form a system-message prefix that
+        is identical for every lead pitched the same product, so provider-side
+        prompt caching can reuse it; the prospect details follow in the user message.
+        """
+        return build_messages(
+            COLD_EMAIL_SYSTEM_PROMPT,
+            static_sections=[
+                ("PRODUCT/SERVICE INFORMATION", product_block(product_info)),
+                ("EMAIL REQUIREMENTS", COLD_EMAIL_REQUIREMENTS)
+            ],
+            dynamic_sections=[
+                ("Write a personalized cold email for this prospect", lead_fields(lead_profile))
+            ]
+        )
+    
+    def _parse_email_response(self, content, messages):
+        """Parse the JSON completion into the cold email structure."""
+        result = json.loads(content)
+        cold_email = {
+            "type": "cold_email",
+            "subject": result.get("subject", ""),
+            "body": result.get("body", ""),
+            "generated_at": self._get_timestamp()
+        }
+        if self.count_prompt_tokens:
+            cold_email["prompt_token_counts"] = prompt_token_counts(messages, self.model)
+        return cold_email
     
     def _get_timestamp(self):
         """Get current timestamp for tracking."""
@@ -0,0 +1,157 @@
+"""
+Keyword-matching rules engine for lead enrichment.
+
+Loads the ``lead_enrichment`` and ``industry_insights`` sections of
+``config/config.yaml`` once and compiles every role and industry keyword into a
+single alternation regex per section, so classifying a job title or industry is
+one scan of the text no matter how many categories are configured.
+"""
+
+import re
+from bisect import bisect_right
+
+from config.settings import load_config
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text):
+    """Lowercase and collapse punctuation/whitespace so keywords match on whole words."""
+    return _NON_ALNUM.sub(" ", (text or "").lower()).strip()
+
+
+class KeywordMatcher:
+    """
+    Maps text to the highest-priority category whose keywords appear in it.
+
+    Keywords start at a word boundary. Single-word keywords must match a whole
+    word ("coo" does not match "coordinator"); multi-word keywords may end
+    inside a word, so "head of tech" still matches "head of technology".
+    """
+
+    def __init__(self, categories):
+        """
+        Args:
+            categories (list): ``(name, keywords)`` pairs in priority order
+        """
+        self._priority = {}
+        self._keyword_categories = {}
+
+        for priority, (name, keywords) in enumerate(categories):
+            self._priority[name] = priority
+            for keyword in keywords:
+                keyword = normalize_text(keyword)
+                if keyword:
+                    self._keyword_categories.setdefault(keyword, []).append(name)
+
+        if self._keyword_categories:
+            # Longest keywords first so "head of sales" wins over a shorter overlapping keyword
+            alternation = "|".join(
+                re.escape(keyword) if " " in keyword else rf"{re.escape(keyword)}(?![a-z0-9])"
+                for keyword in sorted(self._keyword_categories, key=len, reverse=True)
+            )
+            self._pattern = re.compile(rf"(?<![a-z0-9])(?:{alternation})")
+        else:
+            self._pattern = None
+
+    def match(self, normalized_text):
+        """
+        Return the best matching category for already-normalized text, or None.
+
+        Args:
+            normalized_text (str): Output of ``normalize_text``
+        """
+        if self._pattern is None or not normalized_text:
+            return None
+
+        best = None
+        for found in self._pattern.finditer(normalized_text):
+            for name in self._keyword_categories[found.group(0)]:
+                if best is None or self._priority[name] < self._priority[best]:
+                    best = name
+                    if self._priority[name] == 0:
+                        return best
+        return best
+
+
+class EnrichmentRules:
+    """Compiled role, industry and company-size rules from the crew configuration."""
+
+    def __init__(self, lead_enrichment, industry_insights):
+        """
+        Args:
+            lead_enrichment (dict): The ``lead_enrichment`` config section
+            industry_insights (dict): The ``industry_insights`` config section
+        """
+        # Company size buckets, sorted by their exclusive employee upper bound
+        # (a company is in the first bucket whose max_employees exceeds its size)
+        sizes = sorted(
+            lead_enrichment.get("company_size_categories", {}).items(),
+            key=lambda item: item[1]["max_employees"]
+        )
+        if not sizes:
+            raise ValueError("lead_enrichment.company_size_categories must define at least one bucket")
+        self.size_bounds = [spec["max_employees"] for _, spec in sizes]
+        self.size_categories = [
+            (spec.get("label", name), tuple(spec.get("pain_points", [])))
+            for name, spec in sizes
+        ]
+
+        # Role contexts keyed by config name; entries without keywords act as the fallback
+        self.roles = {}
+        role_keywords = []
+        self.default_role = None
+        for name, spec in lead_enrichment.get("role_analysis", {}).items():
+            self.roles[name] = {
+                "level": spec.get("level", name.replace("_", " ").title()),
+                "priorities": tuple(spec.get("priorities", [])),
+                "communication_style": spec.get("communication_style", "")
+            }
+            if spec.get("keywords"):
+                role_keywords.append((name, spec["keywords"]))
+            elif self.default_role is None:
+                self.default_role = name
+        if self.default_role is None:
+            raise ValueError("lead_enrichment.role_analysis needs an entry without keywords as the default")
+        self.role_matcher = KeywordMatcher(role_keywords)
+
+        # Industry insights keyed by config name; "default" is the fallback
+        self.industries = {}
+        industry_keywords = []
+        for name, spec in industry_insights.items():
+            self.industries[name] = {
+                "key_trends": tuple(spec.get("trends", [])),
+                "common_challenges": tuple(spec.get("challenges", []))
+            }
+            if name != "default":
+                industry_keywords.append((name, spec.get("keywords", [name])))
+        if "default" not in self.industries:
+            raise ValueError("industry_insights must define a 'default' entry")
+        self.industry_matcher = KeywordMatcher(industry_keywords)
+
+    @classmethod
+    def from_config(cls, path=None):
+        """Build the rules from ``config/config.yaml`` (or another config file)."""
+        config = load_config(path)
+        return cls(config.get("lead_enrichment", {}), config.get("industry_insights", {}))
+
+    def size_bucket(self, company_size):
+        """Return the index of the size bucket for a head count."""
+        return min(bisect_right(self.size_bounds, company_size), len(self.size_bounds) - 1)
+
+    def size_category(self, bucket):
+        """Return ``(label, pain_points)`` for a size bucket index."""
+        return self.size_categories[bucket]
+
+    def classify_role(self, normalized_title):
+        """Return the role context (level, priorities, communication_style) for a normalized title."""
+        return self.roles[self.role_matcher.match(normalized_title) or self.default_role]
+
+    def industry_category(self, normalized_industry):
+        """Return the configured industry name for a normalized industry ("default" if none matches)."""
+        return self.industry_matcher.match(normalized_industry) or "default"
+
+    def classify_industry(self, normalized_industry):
+        """Return the industry insights (key_trends, common_challenges) for a normalized industry."""
+        return self.industries[self.industry_category(normalized_industry)]
@@ -2,24 +2,47 @@
 Follow-up Agent for creating natural, friendly follow-up messages for non-responders.
 """
 
-from crewai import Agent
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
 import json
-import os
-from openai import OpenAI
 from datetime import datetime, timedelta
+from agents.llm_client import LLMClient
+from agents.metrics import stage_span
+from agents.prompt_builder import build_messages, format_fields, product_block, prompt_token_counts
+
+
+FOLLOWUP_SYSTEM_PROMPT = """You are an expert at writing natural, non-pushy follow-up emails 
+                        that re-engage prospects. Your follow-ups are brief (100-150 words), add new value 
+                        or perspective, and feel genuinely helpful rather than sales-driven. Always include 
+                        an easy opt-out and keep the tone friendly and professional. Return your response 
+                        in JSON format with 'subject' and 'body' fields."""
+
+# (followup_number, days_after) for each follow-up in the sequence
+FOLLOWUP_SCHEDULE = [(1, 3), (2, 7)]
+
+FOLLOWUP_STRATEGIES = """- Share a relevant industry insight or trend
+- Offer a useful resource (guide, template, case study)
+- Ask for their perspective on an industry challenge
+- Mention a mutual connection or similar company success
+- Provide a specific, small commitment (5-minute call, quick question)"""
 
 
 class FollowUpAgent:
     """Agent responsible for creating follow-up email sequences."""
     
-    def __init__(self):
+    def __init__(self, llm_client=None, count_prompt_tokens=False):
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.llm_client = llm_client or LLMClient()
         self.model = "gpt-4o"
+        # Attach prompt_token_counts to each email (a debugging aid for prompt size)
+        self.count_prompt_tokens = count_prompt_tokens
     
     def create_agent(self):
         """Create and return the follow-up agent."""
+        from crewai import Agent
+        
         return Agent(
             role="Follow-up Communication Specialist",
             goal="Create natural, non-pushy follow-up messages that re-engage prospects without being annoying",
@@ -34,46 +57,132 @@ class FollowUpAgent:
             max_iter=2
         )
     
-    def generate_followup_sequence(self, enriched_lead_profile, original_email, product_info):
+    def generate_followup_sequence(self, enriched_lead_profile, original_email, product_info, concurrent=True,
+                                   schedule=None, on_generated=None):
         """
         Generate a sequence of follow-up messages.
         
+        Each follow-up depends only on the lead profile and the original email,
+        so by default they are generated concurrently. The returned list is
+        always in follow-up order, and if any generation fails the error of the
+        earliest failing follow-up is raised once all of them have finished.
+        
         Args:
             enriched_lead_profile (dict): Enriched lead information
             original_email (dict): The original cold email sent
             product_info (dict): Information about the product/service
+            concurrent (bool): Generate the follow-ups in parallel threads
+            schedule (list): ``(followup_number, days_after)`` pairs to generate
+                (defaults to ``FOLLOWUP_SCHEDULE``)
+            on_generated (callable): Called with each follow-up as soon as it is
+                generated, even if a sibling follow-up later fails
             
         Returns:
             list: List of follow-up emails with timing
         """
-        followups = []
+        # Follow-ups are sent 3 and 7 days after the initial email
+        schedule = FOLLOWUP_SCHEDULE if schedule is None else schedule
         
-        # Generate first follow-up (3 days after initial email)
-        followup_1 = self._generate_single_followup(
-            enriched_lead_profile, 
-            original_email, 
-            product_info, 
-            followup_number=1,
-            days_after=3
+        def generate(followup_number, days_after):
+            with stage_span(f"followup_{followup_number}"):
+                followup = self._generate_single_followup(
+                    enriched_lead_profile,
+                    original_email,
+                    product_info,
+                    followup_number=followup_number,
+                    days_after=days_after
+                )
+            if on_generated is not None:
+                on_generated(followup)
+            return followup
+        
+        if not concurrent or len(schedule) < 2:
+            return [generate(*entry) for entry in schedule]
+        
+        # Each worker runs in a copy of the caller's context so metrics spans
+        # and other context variables follow the follow-up into its thread
+        with ThreadPoolExecutor(max_workers=len(schedule), thread_name_prefix="followup") as executor:
+            futures = [executor.submit(contextvars.copy_context().run, generate, *entry) for entry in schedule]
+        
+        # The executor has joined, so every future is done; keep schedule order
+        errors = [future.exception() for future in futures]
+        self._raise_first_error(errors)
+        return [future.result() for future in futures]
+    
+    async def agenerate_followup_sequence(self, enriched_lead_profile, original_email, product_info, concurrent=True,
+                                          schedule=None, on_generated=None):
+        """
+        Async version of ``generate_followup_sequence`` built on ``AsyncOpenAI``.
+        
+        Args:
+            enriched_lead_profile (dict): Enriched lead information
+            original_email (dict): The original cold email sent
+            product_info (dict): Information about the product/service
+            concurrent (bool): Await the follow-ups together instead of one by one
+            schedule (list): ``(followup_number, days_after)`` pairs to generate
+            on_generated (callable): Called with each follow-up as soon as it is generated
+            
+        Returns:
+            list: List of follow-up emails with timing
+        """
+        schedule = FOLLOWUP_SCHEDULE if schedule is None else schedule
+        
+        async def make_coroutine(followup_number, days_after):
+            with stage_span(f"followup_{followup_number}"):
+                followup = await self._agenerate_single_followup(
+                    enriched_lead_profile,
+                    original_email,
+                    product_info,
+                    followup_number=followup_number,
+                    days_after=days_after
+                )
+            if on_generated is not None:
+                on_generated(followup)
+            return followup
+        
+        if not concurrent:
+            return [await make_coroutine(*entry) for entry in schedule]
+        
+        results = await asyncio.gather(
+            *(make_coroutine(*entry) for entry in schedule),
+            return_exceptions=True
         )
-        followups.append(followup_1)
+        self._raise_first_error([r if isinstance(r, BaseException) else None for r in results])
+        return list(results)
+    
+    def _raise_first_error(self, errors):
+        """Raise the error of the earliest failing follow-up, if any."""
+        for error in errors:
+            if error is not None:
+                raise error
+    
+    def _generate_single_followup(self, lead_profile, original_email, product_info, followup_number, days_after):
+        """Generate a single follow-up email."""
         
-        # Generate second follow-up (7 days after initial email)
-        followup_2 = self._generate_single_followup(
-            enriched_lead_profile, 
+        messages = self._build_followup_messages(
+            lead_profile, 
             original_email, 
             product_info, 
-            followup_number=2,
-            days_after=7
+            followup_number,
+            days_after
         )
-        followups.append(followup_2)
         
-        return followups
+        try:
+            return self.llm_client.complete(
+                model=self.model,
+                messages=messages,
+                temperature=0.8,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._parse_followup_response(content, followup_number, days_after, messages)
+            )
+            
+        except Exception as e:
+            raise Exception(f"Failed to generate follow-up {followup_number}: {e}")
     
-    def _generate_single_followup(self, lead_profile, original_email, product_info, followup_number, days_after):
-        """Generate a single follow-up email."""
+    async def _agenerate_single_followup(self, lead_profile, original_email, product_info, followup_number, days_after):
+        """Generate a single follow-up email without blocking the event loop."""
         
-        prompt = self._build_followup_prompt(
+        messages = self._build_followup_messages(
             lead_profile, 
             original_email, 
             product_info, 
@@ -82,54 +191,25 @@ class FollowUpAgent:
         )
         
         try:
-            response = self.openai_client.chat.completions.create(
+            return await self.llm_client.acomplete(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert at writing natural, non-pushy follow-up emails 
-                        that re-engage prospects. Your follow-ups are brief (100-150 words), add new value 
-                        or perspective, and feel genuinely helpful rather than sales-driven. Always include 
-                        an easy opt-out and keep the tone friendly and professional. Return your response 
-                        in JSON format with 'subject' and 'body' fields."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=messages,
+                temperature=0.8,
                 response_format={"type": "json_object"},
-                temperature=0.8
+                validate=lambda content: self._parse_followup_response(content, followup_number, days_after, messages)
             )
             
-            content = response.choices[0].message.content
-            if content:
-                result = json.loads(content)
-            else:
-                raise Exception("Empty response from OpenAI")
-            
-            # Calculate send date
-            send_date = datetime.now() + timedelta(days=days_after)
-            
-            return {
-                "type": f"followup_{followup_number}",
-                "subject": result.get("subject", ""),
-                "body": result.get("body", ""),
-                "send_after_days": days_after,
-                "suggested_send_date": send_date.isoformat(),
-                "generated_at": self._get_timestamp()
-            }
-            
         except Exception as e:
             raise Exception(f"Failed to generate follow-up {followup_number}: {e}")
     
-    def _build_followup_prompt(self, lead_profile, original_email, product_info, followup_number, days_after):
-        """Build the prompt for follow-up generation."""
+    def _build_followup_messages(self, lead_profile, original_email, product_info, followup_number, days_after):
+        """
+        Build the chat messages for a single follow-up.
         
-        # Extract key information
-        name = lead_profile.get('name', 'there')
-        company = lead_profile.get('company', '')
-        job_title = lead_profile.get('job_title', '')
+        Everything that only depends on the product and the follow-up number is
+        kept in the system message, so it is a stable, cacheable prefix across
+        leads; the prospect and original subject follow in the user message.
+        """
         industry_insights = lead_profile.get('industry_insights', {})
         
         # Different approaches for different follow-ups
@@ -140,44 +220,53 @@ class FollowUpAgent:
             approach = "Take a different angle, perhaps asking for feedback or offering to connect them with someone else"
             tone = "Gracefully persistent but understanding"
         
-        prompt = f"""
-        Write follow-up email #{followup_number} (to be sent {days_after} days after the original email):
-        
-        PROSPECT DETAILS:
-        - Name: {name}
-        - Job Title: {job_title}
-        - Company: {company}
-        - Industry Trends: {', '.join(industry_insights.get('key_trends', []))}
-        
-        ORIGINAL EMAIL CONTEXT:
-        - Subject: {original_email.get('subject', '')}
-        - Main value proposition from original email
-        
-        PRODUCT/SERVICE:
-        - Name: {product_info.get('name', 'our solution')}
-        - Key Benefits: {', '.join(product_info.get('benefits', []))}
-        
-        FOLLOW-UP REQUIREMENTS:
-        1. Approach: {approach}
-        2. Tone: {tone}
-        3. Reference the original email briefly without being repetitive
-        4. Add NEW value (insight, resource, different perspective)
-        5. Keep it short and scannable (100-150 words max)
-        6. Include a soft call-to-action
-        7. Always provide an easy opt-out option
-        8. Subject line should be different from the original
-        
-        FOLLOW-UP STRATEGIES TO CONSIDER:
-        - Share a relevant industry insight or trend
-        - Offer a useful resource (guide, template, case study)
-        - Ask for their perspective on an industry challenge
-        - Mention a mutual connection or similar company success
-        - Provide a specific, small commitment (5-minute call, quick question)
-        
-        Return as JSON with 'subject' and 'body' fields.
-        """
+        requirements = f"""Write follow-up email #{followup_number} (to be sent {days_after} days after the original email).
+1. Approach: {approach}
+2. Tone: {tone}
+3. Reference the original email briefly without being repetitive
+4. Add NEW value (insight, resource, different perspective)
+5. Keep it short and scannable (100-150 words max)
+6. Include a soft call-to-action
+7. Always provide an easy opt-out option
+8. Subject line should be different from the original
+Return as JSON with 'subject' and 'body' fields."""
+        
+        return build_messages(
+            FOLLOWUP_SYSTEM_PROMPT,
+            static_sections=[
+                ("PRODUCT/SERVICE", product_block(product_info, include_description=False)),
+                ("FOLLOW-UP REQUIREMENTS", requirements),
+                ("FOLLOW-UP STRATEGIES TO CONSIDER", FOLLOWUP_STRATEGIES)
+            ],
+            dynamic_sections=[
+                ("PROSPECT DETAILS", format_fields([
+                    ("Name", lead_profile.get('name', 'there')),
+                    ("Job title", lead_profile.get('job_title', '')),
+                    ("Company", lead_profile.get('company', '')),
+                    ("Industry trends", industry_insights.get('key_trends', []))
+                ])),
+                ("ORIGINAL EMAIL SUBJECT", original_email.get('subject', ''))
+            ]
+        )
+    
+    def _parse_followup_response(self, content, followup_number, days_after, messages):
+        """Parse the JSON completion into the follow-up structure."""
+        result = json.loads(content)
+        
+        # Calculate send date
+        send_date = datetime.now() + timedelta(days=days_after)
         
-        return prompt.strip()
+        followup = {
+            "type": f"followup_{followup_number}",
+            "subject": result.get("subject", ""),
+            "body": result.get("body", ""),
+            "send_after_days": days_after,
+            "suggested_send_date": send_date.isoformat(),
+            "generated_at": self._get_timestamp()
+        }
+        if self.count_prompt_tokens:
+            followup["prompt_token_counts"] = prompt_token_counts(messages, self.model)
+        return followup
     
     def _get_timestamp(self):
         """Get current timestamp for tracking."""
@@ -0,0 +1,184 @@
+"""
+Hedged chat completions to cut tail latency.
+
+A campaign waits for its slowest completion, and completion latency has a long
+tail. ``HedgePolicy`` keeps a ring buffer of recently observed request
+latencies per model. When a request has not returned by a configurable
+percentile of that window, ``LLMClient`` fires a duplicate and takes whichever
+answer arrives first. The async path cancels the loser. The sync path
+abandons it, and the abandoned request still finishes in its pool thread.
+
+Hedges are limited so they cannot amplify load:
+
+- they never exceed ``budget_ratio`` of all requests;
+- they are paused for ``throttle_cooldown`` seconds after the rate limiter
+  sees a 429;
+- they only start when the rate limiter has a free slot and budget right
+  now (``RateLimiter.try_acquire``).
+"""
+
+import threading
+import time
+from collections import deque
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class HedgePolicy:
+    """Decides when to hedge a completion and reports how much it helped."""
+
+    def __init__(self, percentile=95, window=500, min_samples=50, budget_ratio=0.05,
+                 min_delay=0.05, throttle_cooldown=30.0):
+        """
+        Args:
+            percentile (float): Hedge once a request has taken longer than this
+                percentile of the recent latencies of its model
+            window (int): Latest request latencies kept per model
+            min_samples (int): Latencies needed before a model is hedged
+            budget_ratio (float): Maximum hedges as a fraction of all requests
+            min_delay (float): Lower bound on the hedge delay in seconds
+            throttle_cooldown (float): Seconds without hedging after a 429
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.min_delay = min_delay
+        self.throttle_cooldown = throttle_cooldown
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_failures = 0
+        self.suppressed_budget = 0
+        self.suppressed_throttled = 0
+        self.suppressed_capacity = 0
+        self.saved_seconds = 0.0
+        self.extra_tokens = 0
+
+        self._latencies = {}
+        self._request_latencies = deque(maxlen=window)
+        self._caller_latencies = deque(maxlen=window)
+        self._seen_throttled = 0
+        self._throttled_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings):
+        """Create a policy from ``openai.hedging`` in config.yaml, or None when disabled."""
+        settings = settings or {}
+        if not settings.get("enabled"):
+            return None
+        return cls(
+            percentile=settings.get("percentile", 95),
+            window=settings.get("window", 500),
+            min_samples=settings.get("min_samples", 50),
+            budget_ratio=settings.get("budget_ratio", 0.05),
+            min_delay=settings.get("min_delay_seconds", 0.05),
+            throttle_cooldown=settings.get("throttle_cooldown_seconds", 30.0)
+        )
+
+    def hedge_delay(self, model):
+        """
+        Seconds to wait before hedging a request to ``model``.
+
+        Returns:
+            float | None: None until ``min_samples`` latencies have been observed
+        """
+        with self._lock:
+            self.requests += 1
+            latencies = self._latencies.get(model)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            ordered = sorted(latencies)
+        return max(self.min_delay, _percentile(ordered, self.percentile / 100))
+
+    def observe(self, model, seconds):
+        """Record the latency of one finished request (primary or hedge)."""
+        with self._lock:
+            latencies = self._latencies.get(model)
+            if latencies is None:
+                latencies = self._latencies[model] = deque(maxlen=self.window)
+            latencies.append(seconds)
+            self._request_latencies.append(seconds)
+
+    def observe_caller(self, seconds):
+        """Record the latency the caller saw for one completion (after any hedge)."""
+        with self._lock:
+            self._caller_latencies.append(seconds)
+
+    def allow_hedge(self, rate_limiter=None):
+        """
+        Claim a hedge from the budget.
+
+        Returns:
+            bool: False while the limiter has recently been throttled or the
+                hedge budget is spent
+        """
+        now = time.monotonic()
+        with self._lock:
+            throttled = rate_limiter.throttled if rate_limiter is not None else 0
+            if throttled > self._seen_throttled:
+                self._seen_throttled = throttled
+                self._throttled_at = now
+            if now - self._throttled_at < self.throttle_cooldown:
+                self.suppressed_throttled += 1
+                return False
+            if self.hedges + 1 > self.budget_ratio * self.requests:
+                self.suppressed_budget += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def cancel_hedge(self):
+        """Return a claimed hedge that could not start (no free rate limiter slot)."""
+        with self._lock:
+            self.hedges -= 1
+            self.suppressed_capacity += 1
+
+    def record_hedge(self, hedge_won, saved_seconds=None, extra_tokens=0, failed=False):
+        """
+        Record the outcome of a hedged completion.
+
+        Args:
+            hedge_won (bool): The duplicate answered first
+            saved_seconds (float): How much sooner the caller got its answer,
+                when the loser's latency is known
+            extra_tokens (int): Tokens spent by the losing request, when known
+            failed (bool): Both the primary and the duplicate failed
+        """
+        with self._lock:
+            self.hedge_wins += int(hedge_won)
+            self.hedge_failures += int(failed)
+            if saved_seconds is not None and saved_seconds > 0:
+                self.saved_seconds += saved_seconds
+            self.extra_tokens += extra_tokens
+
+    def stats(self):
+        """Return hedge rate, win rate and request vs caller latency percentiles."""
+        with self._lock:
+            requests = sorted(self._request_latencies)
+            callers = sorted(self._caller_latencies)
+            stats = {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "hedge_failures": self.hedge_failures,
+                "suppressed_budget": self.suppressed_budget,
+                "suppressed_throttled": self.suppressed_throttled,
+                "suppressed_capacity": self.suppressed_capacity,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "extra_tokens": self.extra_tokens
+            }
+        for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            request_value, caller_value = _percentile(requests, fraction), _percentile(callers, fraction)
+            stats[f"request_{label}_seconds"] = round(request_value, 4) if request_value is not None else None
+            stats[f"caller_{label}_seconds"] = round(caller_value, 4) if caller_value is not None else None
+        return stats
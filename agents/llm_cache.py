@@ -0,0 +1,154 @@
+"""
+Persistent, content-addressed cache for chat-completion responses.
+
+Responses are stored in a local SQLite database keyed by a hash of the request
+parameters that determine the output (model, messages, temperature and
+response_format), so reruns, crash retries and A/B reprocessing of the same
+prompts are served from disk instead of the OpenAI API.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with TTL expiry and size-bounded LRU eviction."""
+
+    def __init__(self, path=".cache/llm_responses.sqlite3", ttl_seconds=7 * 24 * 3600,
+                 max_entries=50000, bypass=False):
+        """
+        Args:
+            path (str | Path): SQLite database file
+            ttl_seconds (float): Entries older than this are treated as misses (None disables expiry)
+            max_entries (int): Least recently used entries beyond this count are evicted
+            bypass (bool): Skip lookups and always call the API, still storing fresh responses
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bypass = bypass
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_accessed ON responses (last_accessed)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model, messages, temperature, response_format=None):
+        """Hash the request parameters into a stable cache key."""
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "response_format": response_format
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Returns:
+            str | None: Cached content, or None on a miss, expiry or bypass
+        """
+        if self.bypass:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            content, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return content
+
+    def put(self, key, content):
+        """Store a response and evict least recently used entries beyond ``max_entries``."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, content, now, now)
+            )
+            self.writes += 1
+
+            if self.max_entries is not None:
+                cursor = self._conn.execute(
+                    """DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (self.max_entries,)
+                )
+                self.evictions += max(cursor.rowcount, 0)
+
+            self._conn.commit()
+
+    def delete(self, key):
+        """Drop one entry, e.g. a reply its caller rejected."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bypass": self.bypass
+        }
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
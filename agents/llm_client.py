@@ -0,0 +1,516 @@
+"""
+Shared chat-completion client used by the email and follow-up agents.
+
+Wraps both the synchronous ``OpenAI`` client and the ``AsyncOpenAI`` client so
+agents can expose blocking and asyncio generation paths over the same request
+parameters. An optional ``LLMResponseCache`` short-circuits repeated requests.
+
+One ``LLMClient`` is owned by ``OutboundSalesCrew`` and injected into every
+agent, so all completions share a single tuned HTTP connection pool per
+client type (sync and async) instead of one pool per agent. The same client
+applies the shared ``RateLimiter`` and retries throttled or failed requests,
+and optionally hedges slow requests (see ``agents.hedging``). Every request
+carries its own timeout, capped by the campaign deadline current in its
+context (see ``agents.deadline``).
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config.settings import get_setting
+from agents.deadline import current_deadline
+from agents.hedging import HedgePolicy
+from agents.metrics import record_llm_call
+from agents.rate_limiter import (
+    RateLimiter, backoff_delay, estimate_tokens, is_retryable, is_throttled
+)
+
+
+class LLMClient:
+    """Chat-completion client with lazily created, connection-pooled OpenAI clients."""
+
+    def __init__(self, api_key=None, cache=None, max_connections=100,
+                 max_keepalive_connections=20, keepalive_expiry=30.0, http2=None,
+                 rate_limiter=None, max_retries=3, timeout=30.0, hedging=None):
+        """
+        Args:
+            api_key (str): OpenAI API key (defaults to ``OPENAI_API_KEY``)
+            cache (LLMResponseCache): Optional persistent response cache
+            max_connections (int): Upper bound on open connections per pool
+            max_keepalive_connections (int): Idle connections kept warm for reuse
+            keepalive_expiry (float): Seconds an idle connection stays in the pool
+            http2 (bool): Use HTTP/2; None enables it when the ``h2`` package is installed
+            rate_limiter (RateLimiter): Shared RPM/TPM and concurrency limiter
+            max_retries (int): Retries for throttled (429), 5xx, timeout and connection errors
+            timeout (float): Per-request timeout in seconds (shortened to the time
+                left when a campaign deadline is active)
+            hedging (HedgePolicy): Optional policy for duplicating slow requests
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.cache = cache
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 if http2 is not None else importlib.util.find_spec("h2") is not None
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.hedging = hedging
+        self._client = None
+        self._async_client = None
+        self._hedge_pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cache=None, **overrides):
+        """
+        Create a client from config.yaml: ``openai.connection_pool``,
+        ``openai.rate_limits``, ``openai.hedging``, ``openai.timeout`` and the
+        ``error_handling`` retry settings (``error_handling.timeout_seconds`` is
+        the timeout fallback).
+        """
+        pool = get_setting("openai", "connection_pool", default={}) or {}
+        settings = {
+            "max_connections": pool.get("max_connections", 100),
+            "max_keepalive_connections": pool.get("max_keepalive_connections", 20),
+            "keepalive_expiry": pool.get("keepalive_expiry", 30.0),
+            "http2": pool.get("http2"),
+            "rate_limiter": RateLimiter.from_config(get_setting("openai", "rate_limits")),
+            "max_retries": get_setting("error_handling", "max_retries", default=3),
+            "timeout": get_setting("openai", "timeout",
+                                   default=get_setting("error_handling", "timeout_seconds", default=30.0)),
+            "hedging": HedgePolicy.from_config(get_setting("openai", "hedging"))
+        }
+        settings.update(overrides)
+        return cls(cache=cache, **settings)
+
+    @property
+    def client(self):
+        """Synchronous OpenAI client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI, DefaultHttpxClient
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        timeout=self.timeout,
+                        max_retries=0,  # retries are handled here, with the rate limiter
+                        http_client=DefaultHttpxClient(limits=self._limits(), http2=self.http2)
+                    )
+        return self._client
+
+    @property
+    def async_client(self):
+        """Asynchronous OpenAI client, created on first use."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                    self._async_client = AsyncOpenAI(
+                        api_key=self.api_key,
+                        timeout=self.timeout,
+                        max_retries=0,  # retries are handled here, with the rate limiter
+                        http_client=DefaultAsyncHttpxClient(limits=self._limits(), http2=self.http2)
+                    )
+        return self._async_client
+
+    @property
+    def hedge_pool(self):
+        """Threads running hedged sync requests, created on first use."""
+        if self._hedge_pool is None:
+            with self._lock:
+                if self._hedge_pool is None:
+                    self._hedge_pool = ThreadPoolExecutor(max_workers=self.max_connections,
+                                                          thread_name_prefix="llm-hedge")
+        return self._hedge_pool
+
+    def close(self):
+        """Close the sync connection pool (the async pool is closed by ``aclose``)."""
+        if self._hedge_pool is not None:
+            # Abandoned hedge losers finish on their own
+            self._hedge_pool.shutdown(wait=False)
+            self._hedge_pool = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        """Close both connection pools."""
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def _limits(self):
+        """Connection pool limits shared by the sync and async clients."""
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def complete(self, model, messages, temperature, response_format=None, validate=None):
+        """
+        Run a chat completion and return the message content.
+
+        Args:
+            model (str): Model name
+            messages (list): Chat messages
+            temperature (float): Sampling temperature
+            response_format (dict): Optional response format, e.g. ``{"type": "json_object"}``
+            validate (callable): Optional ``validate(content)`` that parses the
+                reply into the caller's result and raises if it is unusable. A
+                reply is only cached once it passes, and a cached reply that
+                fails is evicted and requested again.
+
+        Returns:
+            str: Content of the first choice, or ``validate(content)`` when given
+        """
+        cache_key, content = self._cache_lookup(model, messages, temperature, response_format)
+        hit, result = self._cached_result(model, cache_key, content, validate)
+        if hit:
+            return result
+
+        request_kwargs = self._request_kwargs(model, messages, temperature, response_format)
+        estimated_tokens = estimate_tokens(request_kwargs)
+        deadline = current_deadline()
+        attempt = 0
+        queue_wait = retry_wait = 0.0
+        while True:
+            if deadline is not None:
+                deadline.check()
+            if self.rate_limiter is not None:
+                waited_from = time.perf_counter()
+                acquired = self.rate_limiter.acquire(estimated_tokens, timeout=self._time_left(deadline))
+                queue_wait += time.perf_counter() - waited_from
+                if not acquired:
+                    record_llm_call(model, queue_wait=queue_wait, retries=attempt, retry_wait=retry_wait)
+                    raise deadline.exceeded()
+            try:
+                response = self._send(model, self._attempt_kwargs(request_kwargs, deadline), estimated_tokens)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    record_llm_call(model, queue_wait=queue_wait, retries=attempt, retry_wait=retry_wait)
+                    raise
+                delay = backoff_delay(attempt, e)
+                if not self._can_retry_after(delay, deadline):
+                    record_llm_call(model, queue_wait=queue_wait, retries=attempt, retry_wait=retry_wait)
+                    raise deadline.exceeded() from e
+                time.sleep(delay)
+                retry_wait += delay
+                attempt += 1
+                continue
+            break
+
+        record_llm_call(model, getattr(response, "usage", None), queue_wait=queue_wait,
+                        retries=attempt, retry_wait=retry_wait)
+
+        content = self._extract_content(response)
+        return self._accept(cache_key, content, response_format, validate)
+
+    async def acomplete(self, model, messages, temperature, response_format=None, validate=None):
+        """Async counterpart of ``complete`` built on ``AsyncOpenAI``."""
+        cache_key, content = self._cache_lookup(model, messages, temperature, response_format)
+        hit, result = self._cached_result(model, cache_key, content, validate)
+        if hit:
+            return result
+
+        request_kwargs = self._request_kwargs(model, messages, temperature, response_format)
+        estimated_tokens = estimate_tokens(request_kwargs)
+        deadline = current_deadline()
+        attempt = 0
+        queue_wait = retry_wait = 0.0
+        while True:
+            if deadline is not None:
+                deadline.check()
+            if self.rate_limiter is not None:
+                waited_from = time.perf_counter()
+                acquired = await self.rate_limiter.aacquire(estimated_tokens, timeout=self._time_left(deadline))
+                queue_wait += time.perf_counter() - waited_from
+                if not acquired:
+                    record_llm_call(model, queue_wait=queue_wait, retries=attempt, retry_wait=retry_wait)
+                    raise deadline.exceeded()
+            try:
+                response = await self._asend(model, self._attempt_kwargs(request_kwargs, deadline), estimated_tokens)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    record_llm_call(model, queue_wait=queue_wait, retries=attempt, retry_wait=retry_wait)
+                    raise
+                delay = backoff_delay(attempt, e)
+                if not self._can_retry_after(delay, deadline):
+                    record_llm_call(model, queue_wait=queue_wait, retries=attempt, retry_wait=retry_wait)
+                    raise deadline.exceeded() from e
+                await asyncio.sleep(delay)
+                retry_wait += delay
+                attempt += 1
+                continue
+            break
+
+        record_llm_call(model, getattr(response, "usage", None), queue_wait=queue_wait,
+                        retries=attempt, retry_wait=retry_wait)
+
+        content = self._extract_content(response)
+        return self._accept(cache_key, content, response_format, validate)
+
+    def _request(self, model, request_kwargs, estimated_tokens):
+        """
+        Send one request that already holds a rate limiter slot, releasing it afterwards.
+
+        Returns:
+            tuple: (response, seconds the request took)
+        """
+        started = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(**request_kwargs)
+        except Exception as e:
+            self._release(e, estimated_tokens)
+            raise
+        self._release(None, estimated_tokens, response)
+        elapsed = time.perf_counter() - started
+        if self.hedging is not None:
+            self.hedging.observe(model, elapsed)
+        return response, elapsed
+
+    async def _arequest(self, model, request_kwargs, estimated_tokens):
+        """Async version of ``_request``; a cancelled request gives its slot back."""
+        started = time.perf_counter()
+        try:
+            response = await self.async_client.chat.completions.create(**request_kwargs)
+        except asyncio.CancelledError:
+            # Cancelled by us (a losing hedge or an expired campaign), not an API error
+            if self.rate_limiter is not None:
+                self.rate_limiter.release(cancelled=True)
+            raise
+        except Exception as e:
+            self._release(e, estimated_tokens)
+            raise
+        self._release(None, estimated_tokens, response)
+        elapsed = time.perf_counter() - started
+        if self.hedging is not None:
+            self.hedging.observe(model, elapsed)
+        return response, elapsed
+
+    def _send(self, model, request_kwargs, estimated_tokens):
+        """
+        Send a request, hedging it once it is slower than the policy's percentile.
+
+        The first successful answer wins; the losing request is abandoned and
+        finishes in its pool thread, where its latency is still recorded.
+        """
+        delay = self.hedging.hedge_delay(model) if self.hedging is not None else None
+        if delay is None:
+            response, elapsed = self._request(model, request_kwargs, estimated_tokens)
+            if self.hedging is not None:
+                self.hedging.observe_caller(elapsed)
+            return response
+
+        started = time.perf_counter()
+        primary = self.hedge_pool.submit(self._request, model, request_kwargs, estimated_tokens)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._start_hedge(estimated_tokens):
+            response, elapsed = primary.result()
+            self.hedging.observe_caller(time.perf_counter() - started)
+            return response
+
+        hedge = self.hedge_pool.submit(self._request, model, request_kwargs, estimated_tokens)
+        pending = {primary, hedge}
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+        if winner is None:
+            # Both failed: surface the primary's error to the retry loop
+            self.hedging.observe_caller(time.perf_counter() - started)
+            self.hedging.record_hedge(False, failed=True)
+            primary.result()
+
+        caller_latency = time.perf_counter() - started
+        self.hedging.observe_caller(caller_latency)
+        response, _ = winner.result()
+        loser = hedge if winner is primary else primary
+        loser.add_done_callback(
+            lambda future: self._record_hedge_loser(winner is hedge, future, caller_latency, started)
+        )
+        return response
+
+    async def _asend(self, model, request_kwargs, estimated_tokens):
+        """Async version of ``_send``; the losing request is cancelled."""
+        delay = self.hedging.hedge_delay(model) if self.hedging is not None else None
+        if delay is None:
+            response, elapsed = await self._arequest(model, request_kwargs, estimated_tokens)
+            if self.hedging is not None:
+                self.hedging.observe_caller(elapsed)
+            return response
+
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(self._arequest(model, request_kwargs, estimated_tokens))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._start_hedge(estimated_tokens):
+                response, _ = await primary
+                self.hedging.observe_caller(time.perf_counter() - started)
+                return response
+
+            hedge = asyncio.ensure_future(self._arequest(model, request_kwargs, estimated_tokens))
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            winner = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+            if winner is None:
+                # Both failed: surface the primary's error to the retry loop
+                self.hedging.observe_caller(time.perf_counter() - started)
+                self.hedging.record_hedge(False, failed=True)
+                await primary
+
+            for task in pending:
+                task.cancel()
+            self.hedging.observe_caller(time.perf_counter() - started)
+            self.hedging.record_hedge(winner is hedge)
+            response, _ = winner.result()
+            return response
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def _start_hedge(self, estimated_tokens):
+        """Claim hedge budget and, if a rate limiter is used, a free slot right now."""
+        if not self.hedging.allow_hedge(self.rate_limiter):
+            return False
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire(estimated_tokens):
+            self.hedging.cancel_hedge()
+            return False
+        return True
+
+    def _record_hedge_loser(self, hedge_won, loser, caller_latency, started):
+        """Report an abandoned sync request once it finishes (time saved and tokens it used)."""
+        if loser.exception() is not None:
+            self.hedging.record_hedge(hedge_won)
+            return
+        response, _ = loser.result()
+        usage = getattr(response, "usage", None)
+        self.hedging.record_hedge(
+            hedge_won,
+            saved_seconds=time.perf_counter() - started - caller_latency if hedge_won else None,
+            extra_tokens=getattr(usage, "total_tokens", None) or 0
+        )
+
+    def hedge_stats(self):
+        """Return hedging counters, or None when hedging is disabled."""
+        return self.hedging.stats() if self.hedging is not None else None
+
+    def rate_limit_stats(self):
+        """Return rate limiter counters, or None when no limiter is configured."""
+        return self.rate_limiter.stats() if self.rate_limiter is not None else None
+
+    def _release(self, error, estimated_tokens, response=None):
+        """Report a finished attempt to the rate limiter."""
+        if self.rate_limiter is None:
+            return
+        if error is not None:
+            self.rate_limiter.release(success=False, throttled=is_throttled(error))
+            return
+
+        usage = getattr(response, "usage", None)
+        actual_tokens = getattr(usage, "total_tokens", None)
+        token_delta = estimated_tokens - actual_tokens if actual_tokens is not None else 0
+        self.rate_limiter.release(success=True, token_delta=token_delta)
+
+    def cache_stats(self):
+        """Return response cache counters, or None when caching is disabled."""
+        return self.cache.stats() if self.cache is not None else None
+
+    def _cache_lookup(self, model, messages, temperature, response_format):
+        """Return ``(cache_key, cached_content)``; both are None when caching is disabled."""
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.make_key(model, messages, temperature, response_format)
+        return cache_key, self.cache.get(cache_key)
+
+    def _cached_result(self, model, cache_key, content, validate):
+        """
+        Return ``(True, result)`` for a usable cached reply, else ``(False, None)``.
+
+        A cached reply the caller's ``validate`` rejects is evicted, so the
+        request goes to the API instead of failing the same way until the TTL.
+        """
+        if content is None:
+            return False, None
+        try:
+            result = validate(content) if validate is not None else content
+        except Exception:
+            self._cache_evict(cache_key)
+            return False, None
+        record_llm_call(model, cached=True)
+        return True, result
+
+    def _accept(self, cache_key, content, response_format, validate):
+        """Validate a fresh reply and cache it only once the caller accepted it."""
+        if validate is None:
+            self._cache_store(cache_key, content, response_format)
+            return content
+        try:
+            result = validate(content)
+        except Exception:
+            self._cache_evict(cache_key)
+            raise
+        self._cache_store(cache_key, content, response_format)
+        return result
+
+    def _cache_evict(self, cache_key):
+        """Drop a rejected reply from the cache."""
+        if cache_key is not None:
+            self.cache.delete(cache_key)
+
+    def _cache_store(self, cache_key, content, response_format):
+        """Store a fresh response when caching is enabled, skipping malformed JSON replies."""
+        if cache_key is None:
+            return
+        if response_format and response_format.get("type") == "json_object":
+            try:
+                json.loads(content)
+            except json.JSONDecodeError:
+                return
+        self.cache.put(cache_key, content)
+
+    def _request_kwargs(self, model, messages, temperature, response_format):
+        """Build the keyword arguments for ``chat.completions.create``."""
+        kwargs = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        return kwargs
+
+    def _time_left(self, deadline):
+        """Seconds until ``deadline`` (None without one)."""
+        return deadline.remaining() if deadline is not None else None
+
+    def _attempt_kwargs(self, request_kwargs, deadline):
+        """Request kwargs for one attempt, with the timeout capped at the time left."""
+        timeout = deadline.timeout(self.timeout) if deadline is not None else self.timeout
+        return {**request_kwargs, "timeout": timeout}
+
+    def _can_retry_after(self, delay, deadline):
+        """False when a retry after ``delay`` seconds would start past the deadline."""
+        remaining = self._time_left(deadline)
+        return remaining is None or delay < remaining
+
+    def _extract_content(self, response):
+        """Return the content of the first choice, rejecting empty responses."""
+        content = response.choices[0].message.content
+        if not content:
+            raise Exception("Empty response from OpenAI")
+        return content
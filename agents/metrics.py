@@ -0,0 +1,281 @@
+"""
+Per-stage timing, token usage and cost instrumentation.
+
+A ``CampaignMetrics`` collector is activated for each campaign; code running a
+stage wraps it in ``stage_span(name)``. ``LLMClient`` reports every chat
+completion (queue wait in the rate limiter, retries, prompt/completion tokens,
+cache hits) to the span that is current in its context via
+``record_llm_call``, so agents do not have to thread metrics objects around.
+Spans live in ``contextvars``: asyncio tasks inherit them automatically, and
+thread pools must submit work through ``contextvars.copy_context().run``.
+
+``BatchMetrics`` aggregates the per-campaign blocks across a batch and exports
+them as JSON or Prometheus text.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from config.settings import get_setting
+
+
+_current_campaign = ContextVar("current_campaign_metrics", default=None)
+_current_span = ContextVar("current_stage_span", default=None)
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+SPAN_COUNTERS = ("llm_calls", "cache_hits", "retries", "queue_wait_seconds", "retry_wait_seconds",
+                 "prompt_tokens", "completion_tokens", "cost_usd")
+
+
+@lru_cache(maxsize=1)
+def _pricing():
+    return get_setting("openai", "pricing", default={}) or {}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """
+    Estimated USD cost of a completion from ``openai.pricing`` in config.yaml.
+
+    Returns:
+        float: Cost in USD (0.0 for models without a price entry)
+    """
+    prices = _pricing().get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * prices.get("input_per_million", 0.0)
+            + completion_tokens * prices.get("output_per_million", 0.0)) / 1_000_000
+
+
+class StageSpan:
+    """Measurements for one stage of one campaign."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.status = "ok"
+        self.wall_seconds = 0.0
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.queue_wait_seconds = 0.0
+        self.retry_wait_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_llm_call(self, model, usage=None, queue_wait=0.0, retries=0, retry_wait=0.0, cached=False, calls=1):
+        """
+        Add a chat completion (or cache hit) to the span.
+
+        ``usage`` is any object with ``prompt_tokens``/``completion_tokens``
+        attributes: an OpenAI ``usage`` block, or CrewAI's ``token_usage`` for a
+        whole kickoff, in which case ``calls`` is its request count.
+        """
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        with self._lock:
+            self.llm_calls += calls
+            self.cache_hits += int(cached)
+            self.retries += retries
+            self.queue_wait_seconds += queue_wait
+            self.retry_wait_seconds += retry_wait
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost_usd += estimate_cost(model, prompt_tokens, completion_tokens)
+
+    def finish(self, status="ok"):
+        self.wall_seconds = time.perf_counter() - self._started
+        self.status = status
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "stage": self.stage,
+                "status": self.status,
+                "wall_seconds": round(self.wall_seconds, 4),
+                "llm_calls": self.llm_calls,
+                "cache_hits": self.cache_hits,
+                "retries": self.retries,
+                "queue_wait_seconds": round(self.queue_wait_seconds, 4),
+                "retry_wait_seconds": round(self.retry_wait_seconds, 4),
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cost_usd": round(self.cost_usd, 6)
+            }
+
+
+class CampaignMetrics:
+    """Collects the stage spans of one campaign."""
+
+    def __init__(self):
+        self.spans = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this collector current for ``stage_span`` calls in this context.
+
+        If the campaign fails, the spans collected so far are attached to the
+        exception as ``campaign_metrics`` so failed leads still show up in the
+        batch aggregate.
+        """
+        token = _current_campaign.set(self)
+        try:
+            yield self
+        except Exception as e:
+            e.campaign_metrics = self.to_dict()
+            raise
+        finally:
+            _current_campaign.reset(token)
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        """Per-stage spans plus campaign totals."""
+        with self._lock:
+            stages = [span.to_dict() for span in self.spans]
+        totals = {counter: sum(stage[counter] for stage in stages) for counter in SPAN_COUNTERS}
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        totals["queue_wait_seconds"] = round(totals["queue_wait_seconds"], 4)
+        totals["retry_wait_seconds"] = round(totals["retry_wait_seconds"], 4)
+        totals["wall_seconds"] = round(time.perf_counter() - self._started, 4)
+        return {"stages": stages, "totals": totals}
+
+
+@contextmanager
+def stage_span(stage):
+    """
+    Time a campaign stage and collect the LLM calls made inside it.
+
+    A no-op (yielding None) when no ``CampaignMetrics`` is active.
+    """
+    campaign = _current_campaign.get()
+    if campaign is None:
+        yield None
+        return
+
+    span = StageSpan(stage)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.finish("error")
+        raise
+    else:
+        span.finish()
+    finally:
+        _current_span.reset(token)
+        campaign.add(span)
+
+
+def record_llm_call(model, usage=None, queue_wait=0.0, retries=0, retry_wait=0.0, cached=False):
+    """Report a chat completion to the current stage span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.add_llm_call(model, usage, queue_wait=queue_wait, retries=retries,
+                          retry_wait=retry_wait, cached=cached)
+
+
+class BatchMetrics:
+    """Aggregates campaign metrics across a batch, per stage."""
+
+    def __init__(self):
+        self.campaigns = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, campaign):
+        """Fold one campaign (or failed batch record) into the aggregate."""
+        status = campaign.get("batch", {}).get("status", "completed")
+        stages = campaign.get("metrics", {}).get("stages", [])
+        with self._lock:
+            self.campaigns[status] = self.campaigns.get(status, 0) + 1
+            for span in stages:
+                stage = self.stages.setdefault(span["stage"], {
+                    "count": 0, "errors": 0, "wall_seconds": 0.0, "max_wall_seconds": 0.0,
+                    "buckets": [0] * len(DURATION_BUCKETS), **{counter: 0 for counter in SPAN_COUNTERS}
+                })
+                stage["count"] += 1
+                stage["errors"] += span["status"] != "ok"
+                stage["wall_seconds"] += span["wall_seconds"]
+                stage["max_wall_seconds"] = max(stage["max_wall_seconds"], span["wall_seconds"])
+                for i, bound in enumerate(DURATION_BUCKETS):
+                    if span["wall_seconds"] <= bound:
+                        stage["buckets"][i] += 1
+                for counter in SPAN_COUNTERS:
+                    stage[counter] += span.get(counter, 0)
+
+    def to_dict(self):
+        """JSON-ready aggregate with per-stage means and overall totals."""
+        with self._lock:
+            stages = {}
+            for name, stage in self.stages.items():
+                count = stage["count"] or 1
+                stages[name] = {
+                    **{key: value for key, value in stage.items() if key != "buckets"},
+                    "mean_wall_seconds": round(stage["wall_seconds"] / count, 4),
+                    "mean_queue_wait_seconds": round(stage["queue_wait_seconds"] / count, 4),
+                    "cost_usd": round(stage["cost_usd"], 6),
+                    "duration_histogram_le": dict(zip((str(bound) for bound in DURATION_BUCKETS), stage["buckets"]))
+                }
+            return {
+                "campaigns": dict(self.campaigns),
+                "stages": stages,
+                "totals": {
+                    counter: round(sum(stage[counter] for stage in self.stages.values()), 6)
+                    for counter in SPAN_COUNTERS
+                }
+            }
+
+    def to_prometheus(self, prefix="outbound_crew"):
+        """Render the aggregate in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}")
+
+        with self._lock:
+            metric("campaigns_total", "counter", "Campaigns processed by status",
+                   [("", {"status": status}, count) for status, count in sorted(self.campaigns.items())])
+
+            histogram = []
+            for name, stage in sorted(self.stages.items()):
+                # Buckets are already cumulative (each counts spans <= its bound)
+                for bound, bucket in zip(DURATION_BUCKETS, stage["buckets"]):
+                    histogram.append(("_bucket", {"stage": name, "le": bound}, bucket))
+                histogram.append(("_bucket", {"stage": name, "le": "+Inf"}, stage["count"]))
+                histogram.append(("_sum", {"stage": name}, round(stage["wall_seconds"], 6)))
+                histogram.append(("_count", {"stage": name}, stage["count"]))
+            metric("stage_duration_seconds", "histogram", "Wall time per campaign stage", histogram)
+
+            for counter, help_text in (
+                ("errors", "Stages that raised"),
+                ("llm_calls", "Chat completions made (including cache hits)"),
+                ("cache_hits", "Chat completions served from the response cache"),
+                ("retries", "Chat completion retries"),
+                ("queue_wait_seconds", "Seconds spent waiting for the rate limiter"),
+                ("retry_wait_seconds", "Seconds spent backing off before retries"),
+                ("prompt_tokens", "Prompt tokens used"),
+                ("completion_tokens", "Completion tokens used"),
+                ("cost_usd", "Estimated spend in USD")
+            ):
+                metric(f"stage_{counter}_total", "counter", help_text, [
+                    ("", {"stage": name}, round(stage[counter], 6))
+                    for name, stage in sorted(self.stages.items())
+                ])
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,359 @@
+"""
+Persona Drafting Agent for generating one base sequence per persona and personalizing it per lead.
+
+Most leads in a batch fall into a handful of (role level, industry, company
+size category) buckets. This agent drafts one high-quality sequence per bucket
+with placeholders for the lead-specific details, then fills them for every
+lead with plain string templating, so OpenAI calls scale with the number of
+personas rather than the number of leads. An optional small rewrite model
+smooths the filled sequence per lead at a fraction of the cost of a full
+generation.
+"""
+
+import asyncio
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from agents.enrichment_rules import normalize_text
+from agents.followup_agent import FOLLOWUP_SCHEDULE
+from agents.prompt_builder import build_messages, format_fields, product_block
+from agents.sequence_agent import SequenceDraftingAgent, SEQUENCE_SYSTEM_PROMPT
+
+
+# Placeholders the base sequence may use, filled per lead by ``persona_fields``
+PLACEHOLDERS = ("FIRST_NAME", "COMPANY", "JOB_TITLE", "PERSONAL_HOOK")
+
+PERSONA_REQUIREMENTS = """This sequence is a template shared by every prospect of the persona below.
+Write it for that persona and use these placeholders, in square brackets, for prospect details:
+[FIRST_NAME] (greeting), [COMPANY], [JOB_TITLE], and [PERSONAL_HOOK] as a standalone sentence
+near the start of the cold email (it is replaced by a company-specific observation, or removed).
+Use no other placeholders. Never invent names, companies, news or technologies."""
+
+REWRITE_SYSTEM_PROMPT = """You lightly personalize an existing outbound email sequence. Keep the structure,
+                        length, offer and call-to-action; weave in the prospect details given so each
+                        email reads as written for this person. Do not invent facts. Return JSON in
+                        exactly the same schema as the input sequence."""
+
+_PLACEHOLDER_PATTERN = re.compile(r"\[(%s)\]" % "|".join(PLACEHOLDERS))
+# Anything still looking like a placeholder once the known ones are filled
+_LEFTOVER_PATTERN = re.compile(r"\[[A-Z][A-Z0-9_ ]*\]")
+
+
+def persona_key(enriched_profile):
+    """
+    Persona bucket of an enriched lead.
+
+    The industry is the category the enrichment rules matched, so "SaaS" and
+    "Software" leads share a persona. Profiles enriched before the category
+    was recorded fall back to the normalized industry text.
+
+    Returns:
+        tuple: (role level, industry category, company size category)
+    """
+    role_context = enriched_profile.get('role_context') or {}
+    industry = enriched_profile.get('industry_category') or normalize_text(enriched_profile.get('industry'))
+    return (
+        role_context.get('level') or "Professional",
+        industry if industry and industry != "default" else "general",
+        enriched_profile.get('company_size_category') or "unknown"
+    )
+
+
+def persona_fields(lead_profile):
+    """Values of the template placeholders for one lead."""
+    company = lead_profile.get('company') or "your company"
+    name = (lead_profile.get('name') or "").split()
+    company_info = lead_profile.get('company_info')
+    company_info = company_info if isinstance(company_info, dict) else {}
+
+    hooks = []
+    news = [item for item in company_info.get('recent_news') or [] if isinstance(item, str) and item.strip()]
+    if news:
+        hooks.append(f"Congrats on the recent news at {company}: {news[0].strip().rstrip('.')}.")
+    technologies = [item for item in company_info.get('technologies') or [] if isinstance(item, str) and item]
+    if technologies:
+        stack = " and ".join(technologies[:2])
+        hooks.append(f"I noticed your team works with {stack}.")
+
+    return {
+        "FIRST_NAME": name[0] if name else "there",
+        "COMPANY": company,
+        "JOB_TITLE": lead_profile.get('job_title') or "your role",
+        "PERSONAL_HOOK": " ".join(hooks)
+    }
+
+
+def fill_placeholders(text, fields):
+    """Substitute ``[PLACEHOLDER]`` tokens and tidy the whitespace left by empty ones."""
+    text = _PLACEHOLDER_PATTERN.sub(lambda match: fields[match.group(1)], text)
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    text = re.sub(r" +([,.!?])", r"\1", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return "\n".join(line.strip() for line in text.strip().split("\n"))
+
+
+def unfilled_placeholders(text):
+    """Return the ``[PLACEHOLDER]`` tokens ``fill_placeholders`` would leave in ``text``."""
+    return _LEFTOVER_PATTERN.findall(_PLACEHOLDER_PATTERN.sub("", text))
+
+
+class PersonaDraftingAgent(SequenceDraftingAgent):
+    """Agent that drafts one sequence per persona bucket and fills it in per lead."""
+
+    def __init__(self, llm_client=None, rewrite_model=None, count_prompt_tokens=False):
+        """
+        Args:
+            llm_client (LLMClient): Chat-completion client
+            rewrite_model (str): Optional small model (e.g. "gpt-4o-mini") that
+                rewrites each filled sequence with the lead's details; None keeps
+                personalization to templating with no per-lead calls
+            count_prompt_tokens (bool): Record the base draft's prompt token counts
+        """
+        super().__init__(llm_client=llm_client, count_prompt_tokens=count_prompt_tokens)
+        self.rewrite_model = rewrite_model
+        self._bases = {}
+        self._locks = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.base_sequences = 0
+        self.reused = 0
+
+    def generate_sequence(self, enriched_lead_profile, product_info):
+        """
+        Personalize the persona's base sequence for one lead.
+
+        The first lead of a persona drafts the base sequence; concurrent leads
+        of the same persona wait for it instead of drafting their own.
+
+        Returns:
+            tuple: (cold_email dict, list of follow-up dicts)
+        """
+        key = self._cache_key(enriched_lead_profile, product_info)
+        base = self._bases.get(key)
+        drafted = False
+        if base is None:
+            with self._lock_for(key):
+                base = self._bases.get(key)
+                if base is None:
+                    base = self._draft_base(enriched_lead_profile, product_info)
+                    drafted = True
+                    with self._lock:
+                        self._bases[key] = base
+        self._count(drafted)
+
+        cold_email, followup_sequence = self._personalize(base, enriched_lead_profile, key, drafted)
+        if self.rewrite_model:
+            cold_email, followup_sequence = self._rewrite(cold_email, followup_sequence, enriched_lead_profile)
+        return cold_email, followup_sequence
+
+    async def agenerate_sequence(self, enriched_lead_profile, product_info):
+        """Async version of ``generate_sequence``; leads of a persona await one shared draft."""
+        key = self._cache_key(enriched_lead_profile, product_info)
+        base = self._bases.get(key)
+        drafted = False
+        if base is None:
+            task = self._pending.get(key)
+            if task is None:
+                task = self._pending[key] = asyncio.ensure_future(
+                    self._adraft_base(enriched_lead_profile, product_info)
+                )
+                # Forget the draft once it finishes, even if every awaiter was
+                # cancelled, so a failed draft is retried by the next lead
+                task.add_done_callback(lambda done, key=key: self._forget_pending(key, done))
+                drafted = True
+            base = await asyncio.shield(task)
+            with self._lock:
+                self._bases[key] = base
+        self._count(drafted)
+
+        cold_email, followup_sequence = self._personalize(base, enriched_lead_profile, key, drafted)
+        if self.rewrite_model:
+            cold_email, followup_sequence = await self._arewrite(cold_email, followup_sequence, enriched_lead_profile)
+        return cold_email, followup_sequence
+
+    def persona_stats(self):
+        """Return the number of personas drafted and leads that reused a draft."""
+        with self._lock:
+            return {"personas": self.base_sequences, "leads_reusing_persona": self.reused}
+
+    def _draft_base(self, enriched_lead_profile, product_info):
+        messages = self._build_persona_messages(enriched_lead_profile, product_info)
+        try:
+            return self.llm_client.complete(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._parse_persona_response(content, messages)
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to generate persona sequence: {e}")
+
+    async def _adraft_base(self, enriched_lead_profile, product_info):
+        messages = self._build_persona_messages(enriched_lead_profile, product_info)
+        try:
+            return await self.llm_client.acomplete(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._parse_persona_response(content, messages)
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to generate persona sequence: {e}")
+
+    def _parse_persona_response(self, content, messages):
+        """Parse a base sequence, rejecting placeholders that no lead could fill (e.g. ``[LAST_NAME]``)."""
+        base_cold_email, base_followups = self._parse_sequence_response(content, messages)
+        leftovers = []
+        for email in [base_cold_email] + base_followups:
+            for field in ("subject", "body"):
+                leftovers += unfilled_placeholders(email[field])
+        if leftovers:
+            raise ValueError(f"Persona sequence uses unknown placeholders: {', '.join(dict.fromkeys(leftovers))}")
+        return base_cold_email, base_followups
+
+    def _build_persona_messages(self, lead_profile, product_info):
+        """Chat messages for a persona's base sequence; no individual lead details are sent."""
+        role_context = lead_profile.get('role_context', {})
+        industry_insights = lead_profile.get('industry_insights', {})
+        level, industry, size_category = persona_key(lead_profile)
+        return build_messages(
+            SEQUENCE_SYSTEM_PROMPT,
+            static_sections=[
+                ("PRODUCT/SERVICE INFORMATION", product_block(product_info)),
+                ("SEQUENCE REQUIREMENTS", self._sequence_requirements()),
+                ("TEMPLATE REQUIREMENTS", PERSONA_REQUIREMENTS)
+            ],
+            dynamic_sections=[
+                ("Write a template outbound email sequence for this persona", format_fields([
+                    ("Role level", level),
+                    ("Industry", industry),
+                    ("Company size", size_category),
+                    ("Priorities", role_context.get('priorities', [])),
+                    ("Likely pain points", lead_profile.get('likely_pain_points', [])),
+                    ("Industry trends", industry_insights.get('key_trends', []))
+                ]))
+            ]
+        )
+
+    def _personalize(self, base, lead_profile, key, drafted):
+        """Fill a base sequence for one lead, with fresh timestamps and send dates."""
+        base_cold_email, base_followups = base
+        fields = persona_fields(lead_profile)
+        generated_at = self._get_timestamp()
+        now = datetime.now()
+
+        cold_email = {
+            **base_cold_email,
+            "subject": fill_placeholders(base_cold_email["subject"], fields),
+            "body": fill_placeholders(base_cold_email["body"], fields),
+            "generated_at": generated_at,
+            "persona": {"key": list(key[:3]), "base_drafted_for_lead": drafted}
+        }
+        followup_sequence = [
+            {
+                **followup,
+                "subject": fill_placeholders(followup["subject"], fields),
+                "body": fill_placeholders(followup["body"], fields),
+                "suggested_send_date": (now + timedelta(days=followup["send_after_days"])).isoformat(),
+                "generated_at": generated_at
+            }
+            for followup in base_followups
+        ]
+        return cold_email, followup_sequence
+
+    def _build_rewrite_messages(self, cold_email, followup_sequence, lead_profile):
+        sequence = {
+            "cold_email": {"subject": cold_email["subject"], "body": cold_email["body"]},
+            "followups": [{"subject": f["subject"], "body": f["body"]} for f in followup_sequence]
+        }
+        company_info = lead_profile.get('company_info') or {}
+        return build_messages(
+            REWRITE_SYSTEM_PROMPT,
+            static_sections=[],
+            dynamic_sections=[
+                ("Prospect", format_fields([
+                    ("Name", lead_profile.get('name', '')),
+                    ("Job title", lead_profile.get('job_title', '')),
+                    ("Company", lead_profile.get('company', '')),
+                    ("Recent news", company_info.get('recent_news', []) if isinstance(company_info, dict) else []),
+                    ("Technologies", company_info.get('technologies', []) if isinstance(company_info, dict) else []),
+                    ("Personalization hooks", lead_profile.get('personalization_hooks', []))
+                ])),
+                ("Sequence", json.dumps(sequence, ensure_ascii=False))
+            ]
+        )
+
+    def _rewrite(self, cold_email, followup_sequence, lead_profile):
+        messages = self._build_rewrite_messages(cold_email, followup_sequence, lead_profile)
+        try:
+            return self.llm_client.complete(
+                model=self.rewrite_model,
+                messages=messages,
+                temperature=0.4,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._merge_rewrite(cold_email, followup_sequence, content)
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to personalize persona sequence: {e}")
+
+    async def _arewrite(self, cold_email, followup_sequence, lead_profile):
+        messages = self._build_rewrite_messages(cold_email, followup_sequence, lead_profile)
+        try:
+            return await self.llm_client.acomplete(
+                model=self.rewrite_model,
+                messages=messages,
+                temperature=0.4,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._merge_rewrite(cold_email, followup_sequence, content)
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to personalize persona sequence: {e}")
+
+    def _merge_rewrite(self, cold_email, followup_sequence, content):
+        """Replace subjects and bodies with the rewrite, keeping schedule and persona metadata."""
+        result = json.loads(content)
+        if not isinstance(result, dict):
+            raise ValueError("Rewrite response must be a JSON object")
+        rewritten = self._validate_email(result.get("cold_email"), "cold_email")
+        followups = result.get("followups")
+        if not isinstance(followups, list) or len(followups) != len(FOLLOWUP_SCHEDULE):
+            raise ValueError(f"Rewrite response must contain exactly {len(FOLLOWUP_SCHEDULE)} followups")
+
+        cold_email = {**cold_email, "subject": rewritten["subject"], "body": rewritten["body"],
+                      "rewrite_model": self.rewrite_model}
+        rewritten_followups = []
+        for followup, email in zip(followup_sequence, followups):
+            email = self._validate_email(email, followup["type"])
+            rewritten_followups.append({**followup, "subject": email["subject"], "body": email["body"]})
+        return cold_email, rewritten_followups
+
+    def _cache_key(self, enriched_lead_profile, product_info):
+        return persona_key(enriched_lead_profile) + (json.dumps(product_info, sort_keys=True, default=str),)
+
+    def _forget_pending(self, key, task):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        if not task.cancelled():
+            # Awaiters re-raise the error themselves; without any, it is dropped quietly
+            task.exception()
+
+    def _lock_for(self, key):
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _count(self, drafted):
+        with self._lock:
+            if drafted:
+                self.base_sequences += 1
+            else:
+                self.reused += 1
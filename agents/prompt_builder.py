@@ -0,0 +1,138 @@
+"""
+Prompt layout helpers shared by the drafting agents and the CrewAI tasks.
+
+Prompts are laid out so that everything that is the same for every lead in a
+batch (instructions, product block, output requirements) forms a stable prefix
+in the system message, and the per-lead details follow in the user message as
+compact ``Key: value`` lines. Providers that cache prompt prefixes can then
+reuse the shared part across a batch, and no Python dict reprs are sent.
+"""
+
+from functools import lru_cache
+
+
+def compact_text(text):
+    """Collapse runs of whitespace (including source indentation) into single spaces."""
+    return " ".join((text or "").split())
+
+
+def format_value(value):
+    """Render a field value compactly: lists joined with '; ', dicts as 'k=v' pairs."""
+    if isinstance(value, (list, tuple)):
+        return "; ".join(format_value(item) for item in value if item not in (None, "", [], {}))
+    if isinstance(value, dict):
+        return ", ".join(
+            f"{key}={format_value(item)}" for key, item in value.items() if item not in (None, "", [], {})
+        )
+    return compact_text(str(value))
+
+
+def format_fields(fields):
+    """
+    Serialize ``(label, value)`` pairs as ``Label: value`` lines, skipping empty values.
+
+    Args:
+        fields (list): ``(label, value)`` pairs in the order they should appear
+    """
+    lines = []
+    for label, value in fields:
+        rendered = format_value(value) if value not in (None, "", [], {}) else ""
+        if rendered:
+            lines.append(f"{label}: {rendered}")
+    return "\n".join(lines)
+
+
+def product_block(product_info, include_description=True):
+    """Static product section shared by every lead that is pitched the same product."""
+    fields = [("Product", product_info.get('name', 'our solution'))]
+    if include_description:
+        fields.append(("Description", product_info.get('description', 'a comprehensive business solution')))
+    fields.append(("Key benefits", product_info.get('benefits', ['improved efficiency', 'cost savings'])))
+    if include_description:
+        fields.append(("Target outcome", product_info.get('target_outcome', 'business growth and optimization')))
+    return format_fields(fields)
+
+
+def lead_fields(lead_profile, extra_fields=()):
+    """Compact prospect section built from the enriched lead profile."""
+    role_context = lead_profile.get('role_context', {})
+    return format_fields([
+        ("Name", lead_profile.get('name', 'there')),
+        ("Job title", lead_profile.get('job_title', '')),
+        ("Company", lead_profile.get('company', '')),
+        ("Role level", role_context.get('level', 'Professional')),
+        ("Priorities", role_context.get('priorities', [])),
+        ("Likely pain points", lead_profile.get('likely_pain_points', [])),
+        ("Personalization hooks", lead_profile.get('personalization_hooks', [])),
+        *extra_fields
+    ])
+
+
+def build_messages(system_prompt, static_sections, dynamic_sections):
+    """
+    Build chat messages with all static content first.
+
+    Args:
+        system_prompt (str): Role instructions
+        static_sections (list): ``(heading, text)`` blocks identical across leads
+        dynamic_sections (list): ``(heading, text)`` blocks specific to this lead
+
+    Returns:
+        list: ``[system, user]`` chat messages
+    """
+    def render(sections):
+        return "\n\n".join(f"{heading}:\n{text}" for heading, text in sections if text)
+
+    return [
+        {"role": "system", "content": compact_text(system_prompt) + "\n\n" + render(static_sections)},
+        {"role": "user", "content": render(dynamic_sections)}
+    ]
+
+
+@lru_cache(maxsize=8)
+def _encoding_for(model):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model="gpt-4o"):
+    """Count tokens with the model's local tokenizer (tiktoken), or estimate ~4 chars/token."""
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text))
+
+
+@lru_cache(maxsize=256)
+def _prefix_tokens(text, model):
+    # The shared system message repeats for every lead, so it is encoded once
+    return count_tokens(text, model)
+
+
+def prompt_token_counts(messages, model="gpt-4o"):
+    """
+    Report token counts for a message list built by ``build_messages``.
+
+    Counts come from tiktoken (the optional ``token-counts`` extra); without it
+    they are ~4 chars/token estimates and ``estimated`` is True.
+
+    Returns:
+        dict: ``prefix_tokens`` (shared system message), ``lead_tokens`` (per-lead
+            user message), ``total_tokens`` including per-message overhead, and
+            ``estimated``
+    """
+    prefix_tokens = _prefix_tokens(messages[0]["content"], model) if messages else 0
+    lead_tokens = sum(count_tokens(message["content"], model) for message in messages[1:])
+    # Chat formatting adds a few tokens per message plus the assistant primer
+    return {
+        "prefix_tokens": prefix_tokens,
+        "lead_tokens": lead_tokens,
+        "total_tokens": prefix_tokens + lead_tokens + 4 * len(messages) + 3,
+        "estimated": _encoding_for(model) is None
+    }
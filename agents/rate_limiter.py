@@ -0,0 +1,350 @@
+"""
+Rate limiting, retry and adaptive concurrency for OpenAI calls.
+
+A single ``RateLimiter`` is shared by every agent through ``LLMClient``. It
+enforces requests-per-minute and tokens-per-minute budgets with token buckets,
+and caps the number of requests in flight with an AIMD (additive-increase,
+multiplicative-decrease) limit that shrinks when the API starts throttling and
+grows back while requests succeed. It works from threads and from asyncio
+coroutines alike.
+
+The module-level helpers decide which errors are worth retrying and how long to
+wait, honoring the ``Retry-After`` header on 429 and 5xx responses.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Continuously refilling token bucket that hands out reservations."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        """
+        Take ``amount`` tokens, going into debt if necessary.
+
+        Returns:
+            float: Seconds the caller must wait before the reservation is valid
+        """
+        with self._lock:
+            self._refill()
+            # Requests larger than the whole bucket are clamped so they can still run
+            self._tokens -= min(amount, self.capacity)
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def adjust(self, delta):
+        """Return (positive) or charge (negative) tokens once the real cost is known."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """Shared RPM/TPM budget plus an AIMD-controlled concurrency limit."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, initial_concurrency=8,
+                 min_concurrency=1, max_concurrency=64, throttle_cooldown=1.0):
+        """
+        Args:
+            requests_per_minute (int): Request budget (None disables it)
+            tokens_per_minute (int): Prompt + completion token budget (None disables it)
+            initial_concurrency (int): Requests allowed in flight at start
+            min_concurrency (int): Floor for the adaptive limit
+            max_concurrency (int): Ceiling for the adaptive limit
+            throttle_cooldown (float): Seconds during which further 429s do not
+                shrink the limit again, so one burst of throttling halves it once
+        """
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.throttle_cooldown = throttle_cooldown
+
+        self._limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._async_waiters = deque()
+
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    @classmethod
+    def from_config(cls, settings):
+        """Create a limiter from the ``openai.rate_limits`` config section."""
+        settings = settings or {}
+        return cls(
+            requests_per_minute=settings.get("requests_per_minute"),
+            tokens_per_minute=settings.get("tokens_per_minute"),
+            initial_concurrency=settings.get("initial_concurrency", 8),
+            min_concurrency=settings.get("min_concurrency", 1),
+            max_concurrency=settings.get("max_concurrency", 64)
+        )
+
+    @property
+    def concurrency_limit(self):
+        """Current number of requests allowed in flight."""
+        return max(int(self._limit), self.min_concurrency)
+
+    def acquire(self, estimated_tokens, timeout=None):
+        """
+        Block until a slot and budget are available for one request.
+
+        Args:
+            estimated_tokens (int): Tokens reserved from the TPM budget
+            timeout (float): Give up after this many seconds (None waits forever)
+
+        Returns:
+            bool: False if the wait would exceed ``timeout``; nothing is held then
+        """
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while self._in_flight >= self.concurrency_limit:
+                if give_up_at is None:
+                    self._condition.wait()
+                    continue
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._in_flight += 1
+
+        wait = self._reserve(estimated_tokens)
+        if give_up_at is not None and time.monotonic() + wait > give_up_at:
+            self._give_back(estimated_tokens)
+            return False
+        time.sleep(wait)
+        return True
+
+    async def aacquire(self, estimated_tokens, timeout=None):
+        """Async version of ``acquire`` that never blocks the event loop."""
+        loop = asyncio.get_running_loop()
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._condition:
+                if self._in_flight < self.concurrency_limit:
+                    self._in_flight += 1
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            if give_up_at is None:
+                await waiter
+                continue
+            try:
+                await asyncio.wait_for(waiter, max(0.0, give_up_at - time.monotonic()))
+            except asyncio.TimeoutError:
+                return False
+
+        wait = self._reserve(estimated_tokens)
+        if give_up_at is not None and time.monotonic() + wait > give_up_at:
+            self._give_back(estimated_tokens)
+            return False
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self.release(success=False)
+            raise
+        return True
+
+    def try_acquire(self, estimated_tokens):
+        """
+        Take a slot and budget only if both are available right now.
+
+        Used for hedged requests, which must never queue behind (or push back)
+        regular traffic. A successful call is paired with ``release``.
+
+        Returns:
+            bool: True if the slot was taken
+        """
+        with self._condition:
+            if self._in_flight >= self.concurrency_limit:
+                return False
+            self._in_flight += 1
+
+        if self._reserve(estimated_tokens) > 0:
+            self._give_back(estimated_tokens)
+            return False
+        return True
+
+    def release(self, success=True, throttled=False, token_delta=0, cancelled=False):
+        """
+        Free the slot taken by ``acquire`` and feed the outcome into the AIMD limit.
+
+        Args:
+            success (bool): The request completed
+            throttled (bool): The request was rejected with 429
+            token_delta (int): Estimated minus actual tokens, returned to the TPM budget
+            cancelled (bool): We abandoned the request (e.g. a losing hedge); the
+                slot is freed without counting it or moving the limit
+        """
+        if self.token_bucket is not None and token_delta:
+            self.token_bucket.adjust(token_delta)
+
+        with self._condition:
+            self._in_flight -= 1
+            if not cancelled:
+                self._record_outcome(success, throttled)
+
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, deque()
+
+        # Wake every async waiter; the ones that lose the race simply wait again
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_resolve_waiter, waiter)
+
+    def _record_outcome(self, success, throttled):
+        """Count a finished request and adjust the AIMD limit (caller holds the lock)."""
+        self.requests += 1
+        now = time.monotonic()
+
+        if throttled:
+            self.throttled += 1
+            if now - self._last_decrease >= self.throttle_cooldown:
+                self._limit = max(self.min_concurrency, self._limit / 2)
+                self._last_decrease = now
+        elif success:
+            # Roughly +1 per window of `limit` successful requests
+            self._limit = min(self.max_concurrency, self._limit + 1.0 / self._limit)
+        else:
+            self.errors += 1
+
+    def stats(self):
+        """Return throttling counters and the current adaptive limit."""
+        with self._condition:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "throttle_rate": self.throttled / self.requests if self.requests else 0.0,
+                "concurrency_limit": self.concurrency_limit,
+                "in_flight": self._in_flight
+            }
+
+    def _give_back(self, estimated_tokens):
+        """Return a reservation and its slot without counting a request."""
+        if self.request_bucket is not None:
+            self.request_bucket.adjust(1)
+        if self.token_bucket is not None:
+            self.token_bucket.adjust(estimated_tokens)
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, deque()
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_resolve_waiter, waiter)
+
+    def _reserve(self, estimated_tokens):
+        """Reserve one request and its tokens, returning the wait in seconds."""
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket is not None:
+            wait = max(wait, self.token_bucket.reserve(estimated_tokens))
+        return wait
+
+
+def _resolve_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def estimate_tokens(request_kwargs, completion_tokens=600):
+    """Rough token estimate for a chat request (about 4 characters per token)."""
+    prompt_chars = len(json.dumps(request_kwargs.get("messages", []), ensure_ascii=False))
+    return prompt_chars // 4 + request_kwargs.get("max_tokens", completion_tokens)
+
+
+def status_code(error):
+    """HTTP status of an OpenAI API error, or None for non-HTTP failures."""
+    return getattr(error, "status_code", None)
+
+
+def is_throttled(error):
+    """True when the API rejected the request with 429 Too Many Requests."""
+    return status_code(error) == 429
+
+
+def is_retryable(error):
+    """True for throttling, server errors, timeouts and connection failures."""
+    code = status_code(error)
+    if code is not None:
+        return code == 429 or code == 408 or code >= 500
+
+    try:
+        import openai
+    except ImportError:  # pragma: no cover - openai is a hard dependency
+        return False
+    return isinstance(error, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+def is_timeout(error):
+    """True when a request timed out (client-side, or 408 Request Timeout)."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or status_code(error) == 408:
+        return True
+
+    try:
+        import openai
+    except ImportError:  # pragma: no cover - openai is a hard dependency
+        return False
+    return isinstance(error, openai.APITimeoutError)
+
+
+def retry_after_seconds(error):
+    """Parse ``retry-after-ms`` / ``Retry-After`` from an error response, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def backoff_delay(attempt, error=None, base_delay=0.5, max_delay=30.0):
+    """
+    Full-jitter exponential backoff that never retries sooner than ``Retry-After``.
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        error (Exception): The error being retried
+        base_delay (float): Delay scale for the first retry
+        max_delay (float): Cap on the exponential component
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    retry_after = retry_after_seconds(error) if error is not None else None
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
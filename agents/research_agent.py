@@ -2,19 +2,61 @@
 Lead Research Agent for enriching lead data with company and role context.
 """
 
-from crewai import Agent
-from crewai_tools import SerperDevTool
+from functools import lru_cache
+import json
 import os
+from agents.enrichment_rules import EnrichmentRules, normalize_text
+
+
+# Research fields that describe the company rather than the individual lead
+COMPANY_RESEARCH_FIELDS = ("company_size_category", "industry_insights", "personalization_hooks")
+
+
+def has_company_research(company_research):
+    """True when ``parse_company_research`` found anything beyond the domain."""
+    return any(company_research.get(field) for field in COMPANY_RESEARCH_FIELDS + ("summary", "recent_developments"))
 
 
 class LeadResearchAgent:
     """Agent responsible for enriching lead data with additional context."""
     
-    def __init__(self):
-        self.search_tool = SerperDevTool()
+    def __init__(self, enrichment_cache_size=4096, rules=None, research_cache=None):
+        """
+        Args:
+            enrichment_cache_size (int): Number of (job title, industry, size bucket)
+                classifications memoized across leads
+            rules (EnrichmentRules): Classification rules (defaults to config/config.yaml)
+            research_cache (CompanyResearchCache): Optional cache serving repeated
+                Serper searches without calling the API
+        """
+        self._search_tool = None
+        self.research_cache = research_cache
+        self.rules = rules or EnrichmentRules.from_config()
+        self._classify_lead = lru_cache(maxsize=enrichment_cache_size)(self._classify_lead_uncached)
     
-    def create_agent(self):
-        """Create and return the lead research agent."""
+    @property
+    def search_tool(self):
+        """Serper web search tool, created on first use (None without SERPER_API_KEY)."""
+        if self._search_tool is None and os.getenv("SERPER_API_KEY"):
+            if self.research_cache is not None:
+                from agents.research_cache import cached_search_tool
+                self._search_tool = cached_search_tool(self.research_cache)
+            else:
+                from crewai_tools import SerperDevTool
+                self._search_tool = SerperDevTool()
+        return self._search_tool
+    
+    def create_agent(self, with_search=True):
+        """
+        Create and return the lead research agent.
+        
+        Args:
+            with_search (bool): Give the agent the Serper web search tool; role-only
+                research on top of shared company research does not need it
+        """
+        from crewai import Agent
+        
+        search_tool = self.search_tool if with_search else None
         return Agent(
             role="Lead Research Specialist",
             goal="Enrich lead profiles with comprehensive company and role-specific insights for personalized outreach",
@@ -30,7 +72,7 @@ class LeadResearchAgent:
             - Role-specific priorities and communication preferences
             - Industry insights and trends
             - Identified pain points and personalization hooks""",
-            tools=[self.search_tool] if os.getenv("SERPER_API_KEY") else [],
+            tools=[search_tool] if search_tool is not None else [],
             verbose=True,
             allow_delegation=False,
             max_iter=3
@@ -47,114 +89,200 @@ class LeadResearchAgent:
             dict: Enriched lead profile with additional context
         """
         # Extract basic information
-        company = lead_profile.get('company', '')
-        job_title = lead_profile.get('job_title', '')
-        industry = lead_profile.get('industry', '')
-        
-        # Determine company size category
-        company_size = lead_profile.get('company_size', 0)
-        if company_size < 50:
-            size_category = "small startup"
-            pain_points = ["scaling challenges", "resource constraints", "process optimization"]
-        elif company_size < 500:
-            size_category = "mid-size company"
-            pain_points = ["operational efficiency", "team coordination", "growth management"]
-        else:
-            size_category = "enterprise organization"
-            pain_points = ["system integration", "compliance requirements", "enterprise scalability"]
-        
-        # Analyze role-specific context
-        role_context = self._analyze_role_context(job_title)
-        
-        # Industry-specific insights
-        industry_insights = self._get_industry_insights(industry)
+        company = lead_profile.get('company') or ''
+        job_title = lead_profile.get('job_title') or ''
+        industry = lead_profile.get('industry') or ''
+        company_size = lead_profile.get('company_size') or 0
+        
+        # Everything except the hooks depends only on the normalized title,
+        # industry and size bucket, which repeat constantly across a batch
+        size_category, pain_points, role_context, industry_category, industry_insights = self._classify_lead(
+            normalize_text(job_title),
+            normalize_text(industry),
+            self.rules.size_bucket(company_size)
+        )
+        
+        # Copy the memoized values so callers can safely mutate the profile
+        role_context = {**role_context, "priorities": list(role_context["priorities"])}
+        industry_insights = {key: list(values) for key, values in industry_insights.items()}
         
         # Create enriched profile
         enriched_profile = {
             **lead_profile,
             "company_size_category": size_category,
-            "likely_pain_points": pain_points,
+            "likely_pain_points": list(pain_points),
             "role_context": role_context,
+            "industry_category": industry_category,
             "industry_insights": industry_insights,
             "personalization_hooks": self._generate_personalization_hooks(
-                company, job_title, industry, size_category
+                company, industry, size_category, role_context, industry_insights
             )
         }
         
         return enriched_profile
     
-    def _analyze_role_context(self, job_title):
-        """Analyze job title to understand role responsibilities and priorities."""
-        title_lower = job_title.lower()
+    def enrich_from_research(self, lead_profile, research_output, company_research=None):
+        """
+        Build the enriched profile from the research agent's structured output.
         
-        if any(word in title_lower for word in ['ceo', 'founder', 'president']):
-            return {
-                "level": "C-Level",
-                "priorities": ["company growth", "strategic decisions", "revenue optimization"],
-                "communication_style": "high-level, results-focused"
-            }
-        elif any(word in title_lower for word in ['cto', 'vp engineering', 'head of tech']):
-            return {
-                "level": "Technical Leadership",
-                "priorities": ["technical innovation", "team productivity", "system reliability"],
-                "communication_style": "technical depth, solution-oriented"
-            }
-        elif any(word in title_lower for word in ['cmo', 'marketing director', 'head of marketing']):
-            return {
-                "level": "Marketing Leadership",
-                "priorities": ["lead generation", "brand growth", "marketing ROI"],
-                "communication_style": "metrics-driven, creative solutions"
-            }
-        elif any(word in title_lower for word in ['sales director', 'vp sales', 'head of sales']):
-            return {
-                "level": "Sales Leadership",
-                "priorities": ["revenue growth", "sales efficiency", "team performance"],
-                "communication_style": "results-focused, competitive advantage"
-            }
-        elif any(word in title_lower for word in ['hr', 'people', 'talent']):
-            return {
-                "level": "Human Resources",
-                "priorities": ["employee experience", "talent retention", "organizational culture"],
-                "communication_style": "people-first, collaborative approach"
-            }
-        else:
-            return {
-                "level": "Professional",
-                "priorities": ["operational efficiency", "process improvement", "professional growth"],
-                "communication_style": "practical solutions, clear benefits"
+        The deterministic enrichment is used as the baseline and every field the
+        research agent returned in a valid shape replaces it, so a partial or
+        malformed research answer still yields a complete profile.
+        
+        Args:
+            lead_profile (dict): Basic lead information
+            research_output: CrewAI kickoff result (CrewOutput or string)
+            company_research (dict): Shared company research from
+                ``parse_company_research``; its fields are applied first and the
+                lead's own personalization hooks are appended to the company's
+            
+        Returns:
+            tuple: (enriched profile dict, list of field names taken from the research)
+        """
+        enriched_profile = self.enrich_lead_data(lead_profile)
+        research = self._parse_research_output(research_output)
+        
+        fields_used = []
+        if company_research:
+            for field in COMPANY_RESEARCH_FIELDS:
+                value = company_research.get(field)
+                if self._is_valid_research_field(field, value):
+                    enriched_profile[field] = value
+                    fields_used.append(field)
+            enriched_profile["company_research"] = {
+                key: value for key, value in company_research.items() if key not in COMPANY_RESEARCH_FIELDS
             }
+        
+        for field, value in research.items():
+            if not self._is_valid_research_field(field, value):
+                continue
+            if field == "personalization_hooks" and field in fields_used:
+                value = list(dict.fromkeys(enriched_profile[field] + value))
+            enriched_profile[field] = value
+            if field not in fields_used:
+                fields_used.append(field)
+        
+        return enriched_profile, fields_used
+    
+    def parse_company_research(self, research_output, domain):
+        """
+        Reduce a company research kickoff result to a JSON-ready dict for sharing.
+        
+        Args:
+            research_output: CrewAI kickoff result (CrewOutput or string)
+            domain (str): Company key the research was run for
+            
+        Returns:
+            dict: Valid company-level fields plus ``domain``, ``summary`` and
+                ``recent_developments`` when present
+        """
+        research = self._parse_research_output(research_output)
+        company_research = {
+            field: research[field] for field in COMPANY_RESEARCH_FIELDS
+            if self._is_valid_research_field(field, research.get(field))
+        }
+        company_research["domain"] = domain
+        summary = research.get("company_summary")
+        if isinstance(summary, str) and summary.strip():
+            company_research["summary"] = summary.strip()
+        developments = research.get("recent_developments")
+        if isinstance(developments, list):
+            company_research["recent_developments"] = [d for d in developments if isinstance(d, str) and d]
+        return company_research
+    
+    def _parse_research_output(self, research_output):
+        """Extract the JSON object from a kickoff result, returning {} if there is none."""
+        json_dict = getattr(research_output, "json_dict", None)
+        if isinstance(json_dict, dict):
+            return json_dict
+        
+        raw = getattr(research_output, "raw", None)
+        if raw is None:
+            raw = str(research_output or "")
+        
+        # Tolerate markdown code fences and prose around the JSON object
+        start, end = raw.find("{"), raw.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            parsed = json.loads(raw[start:end + 1])
+        except json.JSONDecodeError:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+    
+    def _is_valid_research_field(self, field, value):
+        """Check a research field against the shape used by ``enrich_lead_data``."""
+        def is_string_list(items):
+            return isinstance(items, list) and bool(items) and all(isinstance(i, str) and i for i in items)
+        
+        if field == "company_size_category":
+            return isinstance(value, str) and bool(value.strip())
+        if field in ("likely_pain_points", "personalization_hooks"):
+            return is_string_list(value)
+        if field == "role_context":
+            return (
+                isinstance(value, dict)
+                and isinstance(value.get("level"), str)
+                and is_string_list(value.get("priorities"))
+                and isinstance(value.get("communication_style"), str)
+            )
+        if field == "industry_insights":
+            return (
+                isinstance(value, dict)
+                and is_string_list(value.get("key_trends"))
+                and is_string_list(value.get("common_challenges"))
+            )
+        return False
+    
+    def enrich_lead_table(self, leads_table):
+        """
+        Enrich a whole table of leads in one vectorized pass.
+        
+        Args:
+            leads_table: pandas DataFrame or dict of equal-length columns
+            
+        Returns:
+            Same kind of table with the enriched columns added
+        """
+        from agents.columnar_enrichment import enrich_columns
+        
+        return enrich_columns(leads_table, self.rules)
+    
+    def enrichment_cache_info(self):
+        """Return hit/miss statistics for the memoized lead classification."""
+        info = self._classify_lead.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0
+        }
+    
+    def _classify_lead_uncached(self, normalized_title, normalized_industry, size_bucket):
+        """Compute the lead-independent enrichment for normalized inputs (memoized)."""
+        size_category, pain_points = self.rules.size_category(size_bucket)
+        industry_category = self.rules.industry_category(normalized_industry)
+        return (
+            size_category,
+            pain_points,
+            self.rules.classify_role(normalized_title),
+            industry_category,
+            self.rules.industries[industry_category]
+        )
+    
+    def _analyze_role_context(self, job_title):
+        """Analyze job title to understand role responsibilities and priorities."""
+        role_context = self.rules.classify_role(normalize_text(job_title))
+        return {**role_context, "priorities": list(role_context["priorities"])}
     
     def _get_industry_insights(self, industry):
         """Get industry-specific insights and trends."""
-        industry_lower = industry.lower()
-        
-        if 'technology' in industry_lower or 'software' in industry_lower:
-            return {
-                "key_trends": ["AI adoption", "cloud migration", "cybersecurity"],
-                "common_challenges": ["scaling infrastructure", "talent acquisition", "rapid innovation"]
-            }
-        elif 'healthcare' in industry_lower or 'medical' in industry_lower:
-            return {
-                "key_trends": ["digital transformation", "patient experience", "regulatory compliance"],
-                "common_challenges": ["data security", "cost management", "regulatory changes"]
-            }
-        elif 'finance' in industry_lower or 'banking' in industry_lower:
-            return {
-                "key_trends": ["fintech disruption", "regulatory compliance", "digital banking"],
-                "common_challenges": ["legacy system modernization", "regulatory compliance", "customer experience"]
-            }
-        elif 'retail' in industry_lower or 'ecommerce' in industry_lower:
-            return {
-                "key_trends": ["omnichannel experience", "personalization", "supply chain optimization"],
-                "common_challenges": ["inventory management", "customer acquisition", "digital transformation"]
-            }
-        else:
-            return {
-                "key_trends": ["digital transformation", "operational efficiency", "customer experience"],
-                "common_challenges": ["process optimization", "technology adoption", "competitive pressure"]
-            }
+        industry_insights = self.rules.classify_industry(normalize_text(industry))
+        return {key: list(values) for key, values in industry_insights.items()}
     
-    def _generate_personalization_hooks(self, company, job_title, industry, size_category):
+    def _generate_personalization_hooks(self, company, industry, size_category, role_context, industry_insights):
         """Generate specific personalization hooks for outreach."""
         hooks = []
         
@@ -162,11 +290,9 @@ class LeadResearchAgent:
         hooks.append(f"Given {company}'s position as a {size_category} in the {industry} space")
         
         # Role-specific hook
-        role_context = self._analyze_role_context(job_title)
         hooks.append(f"As a {role_context['level']} professional focused on {', '.join(role_context['priorities'][:2])}")
         
         # Industry hook
-        industry_insights = self._get_industry_insights(industry)
         hooks.append(f"With the current {industry} trends around {', '.join(industry_insights['key_trends'][:2])}")
         
         return hooks
@@ -0,0 +1,230 @@
+"""
+Company-scoped research shared by every lead at the same company.
+
+Lead lists often hold many contacts per account, and company-level research
+(web searches, company summary, industry insights) is identical for all of
+them. ``CompanyResearchCache`` stores that research keyed by the company's
+domain, taken from ``company_info.website``, else the lead's work email
+domain, else the normalized company name. It also caches individual Serper
+search results by query. Both expire after a TTL.
+
+Entries live in memory and, when a store is given, in an ``LLMResponseCache``
+SQLite file so later runs reuse them too. Concurrent leads at the same company
+wait for the first one's research instead of duplicating it.
+"""
+
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from agents.enrichment_rules import normalize_text
+
+
+# Mailbox providers whose domain says nothing about the lead's employer
+FREE_MAIL_DOMAINS = frozenset({
+    "gmail.com", "googlemail.com", "yahoo.com", "hotmail.com", "outlook.com", "live.com",
+    "msn.com", "aol.com", "icloud.com", "me.com", "proton.me", "protonmail.com", "gmx.com",
+    "mail.com", "yandex.com", "zoho.com"
+})
+
+# Bump when the company research prompt or output shape changes
+_KEY_VERSION = "v1"
+
+
+def _host(url):
+    """Lower-cased host of a URL or bare domain, without ``www.`` or port."""
+    url = str(url).strip()
+    if "//" not in url:
+        url = "//" + url
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def company_domain(lead_profile):
+    """
+    Key identifying the lead's company.
+
+    Args:
+        lead_profile (dict): Basic lead information
+
+    Returns:
+        str | None: Website domain, work email domain or ``name:<company>``,
+            or None when the lead carries no company information at all
+    """
+    company_info = lead_profile.get("company_info")
+    website = company_info.get("website") if isinstance(company_info, dict) else None
+    host = _host(website or lead_profile.get("website") or "")
+    if host:
+        return host
+
+    email = lead_profile.get("email") or ""
+    if "@" in email:
+        host = email.rsplit("@", 1)[1].strip().lower()
+        if host and host not in FREE_MAIL_DOMAINS:
+            return host
+
+    company = normalize_text(lead_profile.get("company"))
+    return f"name:{company}" if company else None
+
+
+class CompanyResearchCache:
+    """TTL cache of company research and Serper search results, shared across leads."""
+
+    def __init__(self, store=None, ttl_seconds=7 * 24 * 3600):
+        """
+        Args:
+            store (LLMResponseCache): Optional SQLite store persisting entries across
+                runs (its own TTL also applies)
+            ttl_seconds (float): Entries older than this are treated as misses
+                (None disables expiry)
+        """
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+        self.company_hits = 0
+        self.company_misses = 0
+        self.search_hits = 0
+        self.search_misses = 0
+
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def company_research(self, domain, research, cacheable=None):
+        """
+        Return the company research for ``domain``, running ``research`` once per TTL.
+
+        Concurrent callers for the same domain block until the first one has
+        finished, then share its result.
+
+        Args:
+            domain (str): Key from ``company_domain``
+            research (callable): Runs the research and returns a JSON-ready dict
+            cacheable (callable): Optional check of the result; a result it
+                rejects (e.g. research that found nothing) is returned without
+                being cached, so the next lead at the company tries again
+
+        Returns:
+            tuple: (research dict, True if it came from the cache)
+        """
+        key = f"company:{_KEY_VERSION}:{domain}"
+        cached = self._get(key)
+        if cached is not None:
+            self._count("company_hits")
+            return cached, True
+
+        with self._lock_for(key):
+            # Another lead at the same company may have finished while we waited
+            cached = self._get(key)
+            if cached is not None:
+                self._count("company_hits")
+                return cached, True
+
+            self._count("company_misses")
+            result = research()
+            if cacheable is None or cacheable(result):
+                self._put(key, result)
+            return result, False
+
+    def search(self, query, run):
+        """
+        Return cached search results for ``query`` (any JSON-ready value), or run and cache them.
+
+        Args:
+            query (dict): Search tool arguments
+            run (callable): Performs the search
+        """
+        key = "search:" + json.dumps(query, sort_keys=True, default=str)
+        cached = self._get(key)
+        if cached is not None:
+            self._count("search_hits")
+            return cached
+
+        with self._lock_for(key):
+            cached = self._get(key)
+            if cached is not None:
+                self._count("search_hits")
+                return cached
+
+            self._count("search_misses")
+            result = run()
+            self._put(key, result)
+            return result
+
+    def stats(self):
+        """Return hit/miss counters for company research and searches."""
+        with self._lock:
+            company_lookups = self.company_hits + self.company_misses
+            search_lookups = self.search_hits + self.search_misses
+            return {
+                "companies_cached": sum(1 for key in self._entries if key.startswith("company:")),
+                "company_hits": self.company_hits,
+                "company_misses": self.company_misses,
+                "company_hit_rate": self.company_hits / company_lookups if company_lookups else 0.0,
+                "search_hits": self.search_hits,
+                "search_misses": self.search_misses,
+                "search_hit_rate": self.search_hits / search_lookups if search_lookups else 0.0
+            }
+
+    def close(self):
+        """Close the persistent store, if any."""
+        if self.store is not None:
+            self.store.close()
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, created_at = entry
+            if self.ttl_seconds is None or now - created_at <= self.ttl_seconds:
+                return value
+            with self._lock:
+                self._entries.pop(key, None)
+
+        if self.store is None:
+            return None
+        content = self.store.get(key)
+        if content is None:
+            return None
+        value = json.loads(content)
+        with self._lock:
+            self._entries[key] = (value, now)
+        return value
+
+    def _put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+        if self.store is not None:
+            self.store.put(key, json.dumps(value, default=str))
+
+    def _lock_for(self, key):
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def cached_search_tool(cache):
+    """
+    Build a ``SerperDevTool`` whose results are served from ``cache``.
+
+    Args:
+        cache (CompanyResearchCache): Cache shared by every research agent
+
+    Returns:
+        SerperDevTool: Drop-in replacement for the plain tool
+    """
+    from crewai_tools import SerperDevTool
+
+    class CachedSerperDevTool(SerperDevTool):
+        def _run(self, **kwargs):
+            return cache.search(kwargs, lambda: super(CachedSerperDevTool, self)._run(**kwargs))
+
+    return CachedSerperDevTool()
@@ -0,0 +1,165 @@
+"""
+Sequence Drafting Agent for generating the cold email and all follow-ups in one OpenAI call.
+"""
+
+import json
+from datetime import datetime, timedelta
+from agents.llm_client import LLMClient
+from agents.followup_agent import FOLLOWUP_SCHEDULE
+from agents.prompt_builder import build_messages, lead_fields, product_block, prompt_token_counts
+
+
+SEQUENCE_SYSTEM_PROMPT = """You are an expert B2B sales email writer. You write a complete outbound
+                        sequence in one pass: a personalized cold email (150-200 words) followed by
+                        natural, non-pushy follow-ups (100-150 words each) that each add new value, use
+                        a different subject line and include an easy opt-out. Return your response in
+                        JSON format exactly matching the requested schema."""
+
+
+class SequenceDraftingAgent:
+    """Agent that drafts a whole email sequence with a single chat completion."""
+
+    def __init__(self, llm_client=None, count_prompt_tokens=False):
+        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+        # do not change this unless explicitly requested by the user
+        self.llm_client = llm_client or LLMClient()
+        self.model = "gpt-4o"
+        # Attach prompt_token_counts to each email (a debugging aid for prompt size)
+        self.count_prompt_tokens = count_prompt_tokens
+
+    def generate_sequence(self, enriched_lead_profile, product_info):
+        """
+        Generate the cold email and every follow-up in one round trip.
+
+        Args:
+            enriched_lead_profile (dict): Enriched lead information
+            product_info (dict): Information about the product/service being sold
+
+        Returns:
+            tuple: (cold_email dict, list of follow-up dicts) in the same shape
+                produced by ``EmailDraftingAgent`` and ``FollowUpAgent``
+        """
+        messages = self._build_sequence_messages(enriched_lead_profile, product_info)
+
+        try:
+            return self.llm_client.complete(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._parse_sequence_response(content, messages)
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to generate email sequence: {e}")
+
+    async def agenerate_sequence(self, enriched_lead_profile, product_info):
+        """Async version of ``generate_sequence`` built on ``AsyncOpenAI``."""
+        messages = self._build_sequence_messages(enriched_lead_profile, product_info)
+
+        try:
+            return await self.llm_client.acomplete(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                validate=lambda content: self._parse_sequence_response(content, messages)
+            )
+
+        except Exception as e:
+            raise Exception(f"Failed to generate email sequence: {e}")
+
+    def _build_sequence_messages(self, lead_profile, product_info):
+        """
+        Build the chat messages for whole-sequence generation.
+
+        Product and sequence requirements form a stable system-message prefix;
+        only the prospect details vary per lead.
+        """
+        industry_insights = lead_profile.get('industry_insights', {})
+        return build_messages(
+            SEQUENCE_SYSTEM_PROMPT,
+            static_sections=[
+                ("PRODUCT/SERVICE INFORMATION", product_block(product_info)),
+                ("SEQUENCE REQUIREMENTS", self._sequence_requirements())
+            ],
+            dynamic_sections=[
+                ("Write a complete outbound email sequence for this prospect", lead_fields(
+                    lead_profile, extra_fields=[("Industry trends", industry_insights.get('key_trends', []))]
+                ))
+            ]
+        )
+
+    def _sequence_requirements(self):
+        """Cold email and follow-up requirements plus the JSON schema of the response."""
+        followup_lines = []
+        for followup_number, days_after in FOLLOWUP_SCHEDULE:
+            if followup_number == 1:
+                approach = "add a new piece of value, insight, or resource that wasn't in the cold email; helpful and resource-focused"
+            else:
+                approach = "take a different angle, perhaps asking for feedback or offering to connect them with someone else; gracefully persistent"
+            followup_lines.append(
+                f"- Follow-up #{followup_number} (sent {days_after} days after the cold email): {approach}"
+            )
+
+        return f"""Cold email:
+1. Use the prospect's name and reference their specific role/company
+2. Connect their likely challenges to your solution's benefits
+3. Conversational and human, with a soft, low-pressure call-to-action
+4. Subject line should be intriguing but not salesy
+5. Total length: 150-200 words maximum
+Follow-ups:
+{chr(10).join(followup_lines)}
+Each follow-up references the cold email briefly, adds NEW value, stays under 150 words, uses a new subject line and provides an easy opt-out.
+Return JSON of the form {{"cold_email": {{"subject": "...", "body": "..."}}, "followups": [{{"subject": "...", "body": "..."}}, ...]}} with exactly {len(FOLLOWUP_SCHEDULE)} follow-ups in order."""
+
+    def _parse_sequence_response(self, content, messages):
+        """Validate the JSON completion and convert it into the campaign email structures."""
+        result = json.loads(content)
+        if not isinstance(result, dict):
+            raise ValueError("Sequence response must be a JSON object")
+
+        cold_email = self._validate_email(result.get("cold_email"), "cold_email")
+
+        followups = result.get("followups")
+        if not isinstance(followups, list) or len(followups) != len(FOLLOWUP_SCHEDULE):
+            raise ValueError(f"Sequence response must contain exactly {len(FOLLOWUP_SCHEDULE)} followups")
+
+        generated_at = self._get_timestamp()
+        now = datetime.now()
+
+        followup_sequence = []
+        for (followup_number, days_after), followup in zip(FOLLOWUP_SCHEDULE, followups):
+            followup = self._validate_email(followup, f"followup_{followup_number}")
+            followup_sequence.append({
+                "type": f"followup_{followup_number}",
+                "subject": followup["subject"],
+                "body": followup["body"],
+                "send_after_days": days_after,
+                "suggested_send_date": (now + timedelta(days=days_after)).isoformat(),
+                "generated_at": generated_at
+            })
+
+        cold_email = {
+            "type": "cold_email",
+            "subject": cold_email["subject"],
+            "body": cold_email["body"],
+            "generated_at": generated_at
+        }
+        if self.count_prompt_tokens:
+            cold_email["prompt_token_counts"] = prompt_token_counts(messages, self.model)
+        return cold_email, followup_sequence
+
+    def _validate_email(self, email, label):
+        """Ensure an email entry has non-empty string subject and body fields."""
+        if not isinstance(email, dict):
+            raise ValueError(f"'{label}' must be an object with 'subject' and 'body'")
+        for field in ("subject", "body"):
+            value = email.get(field)
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"'{label}' is missing a non-empty '{field}'")
+        return email
+
+    def _get_timestamp(self):
+        """Get current timestamp for tracking."""
+        return datetime.now().isoformat()
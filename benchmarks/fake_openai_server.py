@@ -0,0 +1,268 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Serves ``POST /v1/chat/completions`` with canned JSON email bodies in the
+shapes the drafting agents expect (single email, or a whole sequence), after a
+configurable simulated latency, and injects 429 / 500 errors at configurable
+rates. Point the OpenAI SDK at it with ``OPENAI_BASE_URL`` to benchmark the
+crew without spending money.
+
+Usage:
+    python benchmarks/fake_openai_server.py --port 8089 --latency lognormal --latency-ms 800 --error-rate-429 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake python main.py --leads leads.jsonl
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+CANNED_EMAIL = {
+    "subject": "Quick idea for {company}",
+    "body": (
+        "Hi {name},\n\nTeams like yours at {company} often tell us that release cycles slow down as "
+        "headcount grows. We help engineering leaders automate their pipelines and cut infrastructure "
+        "costs without adding process.\n\nWould a 15-minute call next week be useful?\n\nBest,\nAlex\n\n"
+        "If this isn't relevant, just let me know and I won't follow up."
+    )
+}
+
+CANNED_RESEARCH = (
+    "Research summary: the prospect leads a growing engineering organization focused on delivery "
+    "speed, reliability and cost control."
+)
+
+
+class LatencyModel:
+    """Samples simulated response latencies in seconds."""
+
+    def __init__(self, distribution="lognormal", latency_ms=800.0, jitter_ms=200.0, seed=None):
+        """
+        Args:
+            distribution (str): "fixed", "uniform", "exponential" or "lognormal"
+            latency_ms (float): Median (lognormal), mean (exponential), center
+                (uniform) or value (fixed) of the latency
+            jitter_ms (float): Half-width for uniform, spread for lognormal
+            seed (int): Seed for reproducible runs
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {LATENCY_DISTRIBUTIONS}, got '{distribution}'")
+        self.distribution = distribution
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            if self.distribution == "fixed":
+                return self.latency
+            if self.distribution == "uniform":
+                return max(0.0, self._random.uniform(self.latency - self.jitter, self.latency + self.jitter))
+            if self.distribution == "exponential":
+                return self._random.expovariate(1.0 / self.latency) if self.latency > 0 else 0.0
+            if self.latency <= 0:
+                return 0.0
+            sigma = math.log1p(self.jitter / self.latency)
+            return self._random.lognormvariate(math.log(self.latency), sigma)
+
+
+class FakeOpenAIServer:
+    """Threaded fake OpenAI server that can run in the background of a benchmark."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=None, error_rate_429=0.0, error_rate_500=0.0,
+                 retry_after_seconds=1.0, seed=None):
+        """
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            latency (LatencyModel): Simulated latency (default: 800ms lognormal)
+            error_rate_429 (float): Fraction of requests rejected with 429
+            error_rate_500 (float): Fraction of requests failing with 500
+            retry_after_seconds (float): ``Retry-After`` sent with 429 responses
+            seed (int): Seed for the error injection
+        """
+        self.latency = latency or LatencyModel()
+        self.error_rate_429 = error_rate_429
+        self.error_rate_500 = error_rate_500
+        self.retry_after_seconds = retry_after_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0, "server_errors": 0}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _next_outcome(self):
+        """Decide whether this request succeeds, is throttled or fails."""
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self._random.random()
+            if roll < self.error_rate_429:
+                self.stats["throttled"] += 1
+                return 429
+            if roll < self.error_rate_429 + self.error_rate_500:
+                self.stats["server_errors"] += 1
+                return 500
+            return 200
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._send(400, _error_body("invalid_request_error", "Malformed JSON body"))
+
+                if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                    return self._send(404, _error_body("invalid_request_error", f"Unknown path {self.path}"))
+
+                time.sleep(server.latency.sample())
+                outcome = server._next_outcome()
+                if outcome == 429:
+                    return self._send(429, _error_body("rate_limit_exceeded", "Rate limit reached"),
+                                      {"retry-after": str(server.retry_after_seconds)})
+                if outcome == 500:
+                    return self._send(500, _error_body("server_error", "The server had an error"))
+                self._send(200, chat_completion(request))
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def canned_content(request):
+    """Pick a canned reply matching what the prompt asks for."""
+    messages = request.get("messages", [])
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    fields = _prospect_fields(messages[-1].get("content", "") if messages else "")
+    email = {key: value.format(name=fields.get("Name", "there"), company=fields.get("Company", "your team"))
+             for key, value in CANNED_EMAIL.items()}
+
+    if (request.get("response_format") or {}).get("type") != "json_object":
+        return CANNED_RESEARCH
+    if '"followups"' in prompt:
+        followup_count = prompt.count("- Follow-up #") or 2
+        followups = [{"subject": f"Re: {email['subject']} ({n})", "body": email["body"]}
+                     for n in range(1, followup_count + 1)]
+        return json.dumps({"cold_email": email, "followups": followups})
+    return json.dumps(email)
+
+
+def chat_completion(request):
+    """Build an OpenAI-shaped chat completion response with token usage."""
+    content = canned_content(request)
+    prompt_tokens = sum(len(str(message.get("content", ""))) for message in request.get("messages", [])) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "gpt-4o"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def _prospect_fields(text):
+    """Parse the ``Key: value`` prospect lines of a user message."""
+    fields = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(": ")
+        if sep and key not in fields:
+            fields[key.strip()] = value.strip()
+    return fields
+
+
+def _error_body(error_type, message):
+    return {"error": {"message": message, "type": error_type, "param": None, "code": error_type}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local fake OpenAI chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal",
+                        help="Latency distribution (default: lognormal)")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median/mean latency (default: 800)")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="Latency spread (default: 200)")
+    parser.add_argument("--error-rate-429", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--error-rate-500", type=float, default=0.0, help="Fraction of 500 responses")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible latency and errors")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(
+        host=args.host,
+        port=args.port,
+        latency=LatencyModel(args.latency, args.latency_ms, args.jitter_ms, seed=args.seed),
+        error_rate_429=args.error_rate_429,
+        error_rate_500=args.error_rate_500,
+        seed=args.seed
+    )
+    print(f"🧪 Fake OpenAI server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"📊 {server.stats['requests']} requests, {server.stats['throttled']} throttled, "
+              f"{server.stats['server_errors']} server errors")
+
+
+if __name__ == "__main__":
+    main()
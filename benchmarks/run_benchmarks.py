@@ -0,0 +1,312 @@
+"""
+End-to-end performance benchmarks against the local fake OpenAI server.
+
+Runs ``enrich_lead_data`` on its own, then ``create_outreach_campaign`` (through
+``run_batch`` and ``arun_batch``) and fast-mode ``run_crew_workflow`` for every
+combination of concurrency level and batch size, recording leads/sec,
+p50/p95/p99 per-lead latency and peak traced memory. The OpenAI SDK is pointed
+at ``benchmarks/fake_openai_server.py`` (started in a separate process) through
+``OPENAI_BASE_URL``, so no real API calls are made. The response cache and the
+config rate limits are disabled so every lead really hits the server.
+
+Usage:
+    python benchmarks/run_benchmarks.py --concurrency 1 8 32 --batch-sizes 20 100 --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench_previous.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+SCENARIOS = ("run_batch", "arun_batch", "crew_workflow_fast")
+
+INDUSTRIES = ["Technology", "Healthcare", "Financial Services", "Manufacturing", "Retail", "Education"]
+TITLES = ["VP of Engineering", "CTO", "Head of Marketing", "Sales Director", "Operations Manager",
+          "Software Engineer", "Chief Executive Officer", "Director of IT"]
+
+
+def make_leads(count):
+    """Synthetic but varied lead profiles based on the sample lead."""
+    with open(REPO_ROOT / "sample_data" / "lead_profile.json") as f:
+        template = json.load(f)
+    leads = []
+    for i in range(count):
+        lead = dict(template)
+        lead.update({
+            "name": f"Prospect {i}",
+            "email": f"prospect{i}@company{i % 97}.example",
+            "company": f"Company {i % 97}",
+            "job_title": TITLES[i % len(TITLES)],
+            "industry": INDUSTRIES[i % len(INDUSTRIES)],
+            "company_size": 10 + (i * 37) % 20000
+        })
+        leads.append(lead)
+    return leads
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize(latencies, elapsed, peak_bytes, failed):
+    return {
+        "leads": len(latencies),
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 3),
+        "leads_per_second": round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "mean": round(statistics.fmean(latencies) * 1000, 1)
+        } if latencies else None,
+        "peak_memory_mb": round(peak_bytes / (1024 * 1024), 2) if peak_bytes is not None else None
+    }
+
+
+def build_crew(respect_rate_limits, hedge=False):
+    """Crew with no response cache and, by default, no client-side rate limits."""
+    from agents.hedging import HedgePolicy
+    from agents.llm_client import LLMClient
+    from agents.rate_limiter import RateLimiter
+    from crew.crew import OutboundSalesCrew
+
+    overrides = {}
+    if not respect_rate_limits:
+        overrides["rate_limiter"] = RateLimiter(initial_concurrency=1024, max_concurrency=1024)
+    if hedge:
+        # Short benchmark runs need the window to fill quickly
+        overrides["hedging"] = HedgePolicy(min_samples=20)
+    return OutboundSalesCrew(research_mode="fast", llm_client=LLMClient.from_config(**overrides))
+
+
+def timed(latencies, func):
+    """Wrap a per-lead coroutine/function so its latency is recorded."""
+    if asyncio.iscoroutinefunction(func):
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+    else:
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+    return wrapper
+
+
+def run_scenario(scenario, leads, product_info, concurrency, respect_rate_limits, trace_memory, hedge=False):
+    """Run one scenario on a fresh crew and return its summary."""
+    crew = build_crew(respect_rate_limits, hedge)
+    latencies = []
+    results = []
+
+    # run_batch/arun_batch resolve the per-lead method on the instance, so
+    # shadowing it measures every lead through the real batch machinery
+    if scenario == "arun_batch":
+        crew.acreate_outreach_campaign = timed(latencies, crew.acreate_outreach_campaign)
+    elif scenario == "crew_workflow_fast":
+        crew.run_crew_workflow = timed(latencies, crew.run_crew_workflow)
+    else:
+        crew.create_outreach_campaign = timed(latencies, crew.create_outreach_campaign)
+
+    async def drain_async():
+        async for result in crew.arun_batch(leads, product_info, concurrency=concurrency):
+            results.append(result["batch"]["status"])
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        # The agents narrate every step; keep benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            if scenario == "arun_batch":
+                asyncio.run(drain_async())
+            else:
+                for result in crew.run_batch(leads, product_info, concurrency=concurrency,
+                                             use_crew_workflow=scenario == "crew_workflow_fast"):
+                    results.append(result["batch"]["status"])
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        crew.close()
+
+    summary = summarize(latencies, elapsed, peak, failed=results.count("failed"))
+    if hedge:
+        summary["hedging"] = crew.llm_client.hedge_stats()
+    return summary
+
+
+def run_enrichment(leads, rounds=5):
+    """Per-lead cost of ``enrich_lead_data`` (no network involved)."""
+    from agents.research_agent import LeadResearchAgent
+
+    agent = LeadResearchAgent()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for lead in leads:
+            agent.enrich_lead_data(lead)
+        timings.append((time.perf_counter() - started) / len(leads))
+    return {
+        "leads": len(leads),
+        "rounds": rounds,
+        "median_us_per_lead": round(statistics.median(timings) * 1e6, 2),
+        "min_us_per_lead": round(min(timings) * 1e6, 2),
+        "cache": agent.enrichment_cache_info()
+    }
+
+
+def _serve(ready, stop, server_kwargs, latency_kwargs):
+    """Fake server process entry point: report the bound URL, then serve until told to stop."""
+    from benchmarks.fake_openai_server import FakeOpenAIServer, LatencyModel
+
+    server = FakeOpenAIServer(latency=LatencyModel(**latency_kwargs), **server_kwargs).start()
+    ready.put(server.base_url)
+    stop.wait()
+    ready.put(server.stats)
+    server.stop()
+
+
+@contextlib.contextmanager
+def fake_server(server_kwargs, latency_kwargs):
+    """Run the fake OpenAI server in its own process so it does not share our GIL."""
+    ready = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(ready, stop, server_kwargs, latency_kwargs), daemon=True)
+    process.start()
+    stats = {}
+    try:
+        yield ready.get(timeout=30), stats
+    finally:
+        stop.set()
+        stats.update(ready.get(timeout=30))
+        process.join(timeout=10)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print leads/sec and p95 changes against a previous results file."""
+    previous = {(run["scenario"], run["concurrency"], run["batch_size"]): run for run in baseline.get("runs", [])}
+    print(f"\n📈 Compared with {baseline.get('git_revision') or 'baseline'}:")
+    for run in results["runs"]:
+        before = previous.get((run["scenario"], run["concurrency"], run["batch_size"]))
+        if not before or not before.get("leads_per_second") or not run.get("leads_per_second"):
+            continue
+        throughput = run["leads_per_second"] / before["leads_per_second"] - 1
+        p95 = run["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1
+        print(f"   {run['scenario']:>18} c={run['concurrency']:<4} n={run['batch_size']:<5} "
+              f"leads/sec {throughput:+.1%}, p95 {p95:+.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the crew against a local fake OpenAI server.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="Concurrency levels to run (default: 1 8 32)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[20, 100],
+                        help="Leads per batch (default: 20 100)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency", default="lognormal", help="Fake server latency distribution")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake server median latency (default: 200)")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Fake server latency spread (default: 50)")
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-500", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--respect-rate-limits", action="store_true",
+                        help="Keep config.yaml's RPM/TPM limits instead of disabling them")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Hedge slow completions (compare against a run without it)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc (it slows CPU-bound code down noticeably)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file (default: benchmark_results.json)")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    product_info = {
+        "name": "DevOps Acceleration Platform",
+        "description": "AI-powered DevOps platform",
+        "benefits": ["Reduce deployment time by 60%", "Cut infrastructure costs by 30%"],
+        "target_outcome": "Faster, cheaper delivery"
+    }
+    server_kwargs = {"error_rate_429": args.error_rate_429, "error_rate_500": args.error_rate_500,
+                     "retry_after_seconds": 0.1, "seed": args.seed}
+    latency_kwargs = {"distribution": args.latency, "latency_ms": args.latency_ms,
+                      "jitter_ms": args.jitter_ms, "seed": args.seed}
+
+    results = {
+        "git_revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "server": {**server_kwargs, **latency_kwargs},
+        "hedge": args.hedge,
+        "enrichment": run_enrichment(make_leads(2000)),
+        "runs": []
+    }
+    print(f"🧠 enrich_lead_data: {results['enrichment']['median_us_per_lead']} µs/lead")
+
+    with fake_server(server_kwargs, latency_kwargs) as (base_url, server_stats):
+        os.environ["OPENAI_BASE_URL"] = base_url
+        os.environ.setdefault("OPENAI_API_KEY", "fake-benchmark-key")
+
+        for scenario in args.scenarios:
+            for batch_size in args.batch_sizes:
+                leads = make_leads(batch_size)
+                for concurrency in args.concurrency:
+                    summary = run_scenario(scenario, leads, product_info, concurrency,
+                                           args.respect_rate_limits, not args.no_memory, args.hedge)
+                    results["runs"].append({"scenario": scenario, "concurrency": concurrency,
+                                            "batch_size": batch_size, **summary})
+                    latency = summary["latency_ms"] or {}
+                    print(f"🚀 {scenario:>18} c={concurrency:<4} n={batch_size:<5} "
+                          f"{summary['leads_per_second']:8.2f} leads/s  p50 {latency.get('p50')}ms  "
+                          f"p95 {latency.get('p95')}ms  p99 {latency.get('p99')}ms  "
+                          f"peak {summary['peak_memory_mb']}MB  failed {summary['failed']}")
+                    if summary.get("hedging"):
+                        hedging = summary["hedging"]
+                        print(f"   🪂 hedged {hedging['hedge_rate']:.1%} of requests, {hedging['hedge_wins']} wins, "
+                              f"request p99 {hedging['request_p99_seconds']}s vs caller p99 "
+                              f"{hedging['caller_p99_seconds']}s")
+
+    results["server"]["stats"] = server_stats
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        compare(results, json.loads(Path(args.baseline).read_text()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
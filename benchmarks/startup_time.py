@@ -0,0 +1,93 @@
+"""
+Cold-start benchmark for the Outbound Sales Crew CLI.
+
+Runs short-lived interpreter invocations (``python main.py --help``, importing
+``crew.crew`` and constructing ``OutboundSalesCrew``) in fresh subprocesses and
+reports their wall time, so import-time regressions show up before they reach
+CLI or serverless users.
+
+Usage:
+    python benchmarks/startup_time.py --runs 10 --max-ms 500 --output bench_startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "main_help": [sys.executable, "main.py", "--help"],
+    "import_crew": [sys.executable, "-c", "import crew.crew"],
+    "construct_crew": [sys.executable, "-c", "from crew.crew import OutboundSalesCrew; OutboundSalesCrew()"],
+}
+
+# Heavy modules that must not be imported by the cold-start path
+HEAVY_MODULES = ("crewai", "crewai_tools", "openai", "numpy", "pandas")
+
+
+def time_command(command, runs):
+    """Run a command ``runs`` times and return the wall times in milliseconds."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=REPO_ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def heavy_modules_loaded():
+    """Return the heavy modules imported when constructing the crew."""
+    probe = (
+        "import sys, json; from crew.crew import OutboundSalesCrew; OutboundSalesCrew(); "
+        f"print(json.dumps([m for m in {list(HEAVY_MODULES)!r} if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the crew CLI.")
+    parser.add_argument("--runs", type=int, default=10, help="Invocations per scenario (default: 10)")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median 'main.py --help' time exceeds this")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Warm the OS file cache and bytecode so runs are comparable
+    time_command(SCENARIOS["main_help"], 1)
+
+    results = {"python": sys.version.split()[0], "runs": args.runs, "scenarios": {}}
+    for name, command in SCENARIOS.items():
+        timings = time_command(command, args.runs)
+        results["scenarios"][name] = {
+            "median_ms": round(statistics.median(timings), 1),
+            "min_ms": round(min(timings), 1),
+            "max_ms": round(max(timings), 1),
+        }
+        print(f"{name:>15}: median {results['scenarios'][name]['median_ms']:7.1f} ms "
+              f"(min {results['scenarios'][name]['min_ms']:.1f}, max {results['scenarios'][name]['max_ms']:.1f})")
+
+    results["heavy_modules_on_construct"] = heavy_modules_loaded()
+    if results["heavy_modules_on_construct"]:
+        print(f"⚠️ Heavy modules imported at construction: {', '.join(results['heavy_modules_on_construct'])}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    if args.max_ms is not None and results["scenarios"]["main_help"]["median_ms"] > args.max_ms:
+        print(f"❌ main.py --help median exceeds {args.max_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Loader for the crew configuration in ``config/config.yaml``.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+
+DEFAULT_CONFIG_PATH = Path(__file__).with_name("config.yaml")
+
+
+@lru_cache(maxsize=None)
+def _load_config_file(path):
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_config(path=None):
+    """
+    Load the crew configuration, parsing each file only once per process.
+
+    Args:
+        path (str | Path): Config file (defaults to ``config/config.yaml``)
+
+    Returns:
+        dict: Parsed configuration. Treat it as read-only; it is shared between callers.
+    """
+    return _load_config_file(str(Path(path or DEFAULT_CONFIG_PATH).resolve()))
+
+
+def get_setting(*keys, default=None, path=None):
+    """
+    Look up a nested configuration value, e.g. ``get_setting("openai", "timeout")``.
+
+    Returns ``default`` if any key along the path is missing.
+    """
+    value = load_config(path)
+    for key in keys:
+        if not isinstance(value, dict) or key not in value:
+            return default
+        value = value[key]
+    return value
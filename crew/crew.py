@@ -2,128 +2,746 @@
 Outbound Sales Crew - Main crew orchestration for automated sales outreach.
 """
 
-from crewai import Crew, Process
-from agents.research_agent import LeadResearchAgent
+from agents.research_agent import LeadResearchAgent, has_company_research
 from agents.email_agent import EmailDraftingAgent
-from agents.followup_agent import FollowUpAgent
+from agents.followup_agent import FollowUpAgent, FOLLOWUP_SCHEDULE
+from agents.sequence_agent import SequenceDraftingAgent
+from agents.persona_agent import PersonaDraftingAgent
+from agents.llm_client import LLMClient
+from agents.rate_limiter import is_timeout
+from agents.metrics import CampaignMetrics, stage_span
+from agents.deadline import Deadline, BudgetExceeded, call_with_deadline, check_deadline, record_stage
+from agents.research_cache import CompanyResearchCache, company_domain
+from crew.journal import campaign_key, followup_stage, ENRICHMENT_STAGE, COLD_EMAIL_STAGE
 from tasks.task import OutboundSalesTasks
-import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
 from datetime import datetime
+from contextlib import nullcontext
+from functools import cached_property
+
+
+# "per_email": one completion for the cold email and one per follow-up
+# "single_call": the whole sequence in one structured completion
+# "persona": one sequence per persona bucket, filled in per lead
+GENERATION_MODES = ("per_email", "single_call", "persona")
+
+# "agentic": run the CrewAI research kickoff and use its structured output
+# "fast": skip the kickoff and rely on the deterministic rules-based enrichment
+RESEARCH_MODES = ("agentic", "fast")
 
 
 class OutboundSalesCrew:
     """Main crew for orchestrating the outbound sales automation workflow."""
     
-    def __init__(self):
-        """Initialize the crew with all agents and tasks."""
+    def __init__(self, generation_mode="per_email", llm_cache=None, research_mode="agentic", llm_client=None,
+                 journal=None, profiler=None, research_cache=None, share_company_research=True,
+                 persona_rewrite_model=None, campaign_budget=None, count_prompt_tokens=False):
+        """
+        Initialize the crew with all agents and tasks.
+        
+        Args:
+            generation_mode (str): "per_email" (default), "single_call" to draft
+                the cold email and all follow-ups with one chat completion, or
+                "persona" to draft one sequence per (role level, industry, size)
+                bucket and fill in each lead's details
+            llm_cache (LLMResponseCache): Optional persistent cache shared by all
+                chat completions
+            research_mode (str): Default research mode for ``run_crew_workflow``:
+                "agentic" (CrewAI research kickoff) or "fast" (rules-based only)
+            llm_client (LLMClient): Chat-completion client shared by all agents
+                (defaults to one built from config.yaml's connection pool settings)
+            journal (CampaignJournal): Optional completion journal; stages it
+                already holds are reused instead of regenerated
+            profiler (StageProfiler): Optional profiler that runs the stages of
+                a sample of leads under cProfile and tracemalloc
+            research_cache (CompanyResearchCache): Cache of company research and
+                Serper results shared across leads (defaults to an in-memory one)
+            share_company_research (bool): In "agentic" mode, research each company
+                once and run only role-specific research per lead
+            persona_rewrite_model (str): In "persona" mode, optional small model
+                that rewrites each lead's filled sequence
+            campaign_budget (float): End-to-end seconds allowed per campaign; a
+                campaign still running when it expires is returned as a partial
+                campaign (``"status": "partial"``) with the stages finished so far
+            count_prompt_tokens (bool): Record ``prompt_token_counts`` on every
+                generated email (for inspecting prompt size)
+        """
+        if generation_mode not in GENERATION_MODES:
+            raise ValueError(f"generation_mode must be one of {GENERATION_MODES}, got '{generation_mode}'")
+        self._check_research_mode(research_mode)
+        self.generation_mode = generation_mode
+        self.research_mode = research_mode
+        self.journal = journal
+        self.profiler = profiler
+        self.research_cache = research_cache or CompanyResearchCache()
+        self.share_company_research = share_company_research
+        self.campaign_budget = campaign_budget
+        
+        # One pooled chat-completion client (and cache) shared by every agent
+        self.llm_client = llm_client or LLMClient.from_config(cache=llm_cache)
+        if llm_client is not None and llm_cache is not None:
+            self.llm_client.cache = llm_cache
+        
         # Initialize agent classes
-        self.research_agent_class = LeadResearchAgent()
-        self.email_agent_class = EmailDraftingAgent()
-        self.followup_agent_class = FollowUpAgent()
+        self.research_agent_class = LeadResearchAgent(research_cache=self.research_cache)
+        self.email_agent_class = EmailDraftingAgent(llm_client=self.llm_client,
+                                                    count_prompt_tokens=count_prompt_tokens)
+        self.followup_agent_class = FollowUpAgent(llm_client=self.llm_client,
+                                                  count_prompt_tokens=count_prompt_tokens)
+        self.sequence_agent_class = SequenceDraftingAgent(llm_client=self.llm_client,
+                                                          count_prompt_tokens=count_prompt_tokens)
+        self.persona_agent_class = PersonaDraftingAgent(llm_client=self.llm_client,
+                                                        rewrite_model=persona_rewrite_model,
+                                                        count_prompt_tokens=count_prompt_tokens)
         
-        # Create agent instances
-        self.research_agent = self.research_agent_class.create_agent()
-        self.email_agent = self.email_agent_class.create_agent()
-        self.followup_agent = self.followup_agent_class.create_agent()
+        # CrewAI agent instances are created on first use (see the properties
+        # below), so the direct campaign path never imports crewai
         
         # Initialize tasks
         self.tasks = OutboundSalesTasks()
     
-    def create_outreach_campaign(self, lead_profile, product_info):
+    @cached_property
+    def research_agent(self):
+        """CrewAI lead research agent, created on first use."""
+        return self.research_agent_class.create_agent()
+    
+    @cached_property
+    def role_research_agent(self):
+        """CrewAI research agent without web search, for role-only research."""
+        return self.research_agent_class.create_agent(with_search=False)
+    
+    @cached_property
+    def email_agent(self):
+        """CrewAI email drafting agent, created on first use."""
+        return self.email_agent_class.create_agent()
+    
+    @cached_property
+    def followup_agent(self):
+        """CrewAI follow-up agent, created on first use."""
+        return self.followup_agent_class.create_agent()
+    
+    def create_outreach_campaign(self, lead_profile, product_info, deadline=None):
         """
         Create a complete outbound sales campaign for a lead.
         
         Args:
             lead_profile (dict): Basic lead information
             product_info (dict): Product/service information
+            deadline (Deadline): Enclosing deadline (e.g. the batch's) that caps
+                the crew's ``campaign_budget``
+            
+        Returns:
+            dict: Complete campaign with all emails and timing (partial if the
+                time budget ran out)
+        """
+        metrics = CampaignMetrics()
+        campaign_deadline = self._campaign_deadline(deadline)
+        try:
+            with metrics.activate(), self._profile_lead(lead_profile), campaign_deadline.activate():
+                journal_key = self._journal_key(lead_profile, product_info)
+                
+                # Step 1: Enrich lead data
+                print("🔍 Enriching lead data...")
+                with stage_span("enrichment"):
+                    enriched_profile = self._enrich(journal_key, lead_profile)
+                
+                # Steps 2-3: Generate cold email and follow-up sequence
+                cold_email, followup_sequence = self._generate_emails(enriched_profile, product_info, journal_key)
+        except Exception as e:
+            exceeded = self._budget_exceeded(e, campaign_deadline)
+            if exceeded is None:
+                raise
+            return self._partial_campaign(lead_profile, campaign_deadline, exceeded, metrics=metrics)
+        
+        # Step 4: Compile complete campaign
+        return self._compile_campaign(enriched_profile, cold_email, followup_sequence, metrics=metrics)
+    
+    async def acreate_outreach_campaign(self, lead_profile, product_info, deadline=None):
+        """
+        Async version of ``create_outreach_campaign``.
+        
+        The OpenAI calls run on ``AsyncOpenAI`` so many campaigns can share a
+        single event loop instead of holding one thread per request. When the
+        time budget runs out the campaign is cancelled, which cancels its
+        in-flight requests.
+        
+        Args:
+            lead_profile (dict): Basic lead information
+            product_info (dict): Product/service information
+            deadline (Deadline): Enclosing deadline that caps ``campaign_budget``
             
         Returns:
-            dict: Complete campaign with all emails and timing
+            dict: Complete campaign with all emails and timing (partial if the
+                time budget ran out)
+        """
+        metrics = CampaignMetrics()
+        campaign_deadline = self._campaign_deadline(deadline)
+        try:
+            with metrics.activate(), campaign_deadline.activate():
+                enriched_profile, cold_email, followup_sequence = await asyncio.wait_for(
+                    self._acampaign(lead_profile, product_info), campaign_deadline.remaining()
+                )
+        except asyncio.TimeoutError:
+            if campaign_deadline.remaining() is None:
+                raise
+            # wait_for ran out of time and cancelled the campaign
+            return self._partial_campaign(lead_profile, campaign_deadline, campaign_deadline.exceeded(),
+                                          metrics=metrics)
+        except Exception as e:
+            exceeded = self._budget_exceeded(e, campaign_deadline)
+            if exceeded is None:
+                raise
+            return self._partial_campaign(lead_profile, campaign_deadline, exceeded, metrics=metrics)
+        return self._compile_campaign(enriched_profile, cold_email, followup_sequence, metrics=metrics)
+    
+    async def _acampaign(self, lead_profile, product_info):
+        """Enrichment and email steps of ``acreate_outreach_campaign``."""
+        journal_key = self._journal_key(lead_profile, product_info)
+        with stage_span("enrichment"):
+            enriched_profile = self._enrich(journal_key, lead_profile)
+        cold_email, followup_sequence = await self._agenerate_emails(enriched_profile, product_info, journal_key)
+        return enriched_profile, cold_email, followup_sequence
+    
+    def _generate_emails(self, enriched_profile, product_info, journal_key=None):
+        """Generate the cold email and follow-ups according to the generation mode."""
+        cold_email, done = self._draft_cold_email(enriched_profile, product_info, journal_key)
+        return cold_email, self._draft_followups(enriched_profile, cold_email, product_info, journal_key, done)
+    
+    def _draft_cold_email(self, enriched_profile, product_info, journal_key=None):
+        """
+        First email step: draft (or reuse) the cold email.
+        
+        In "single_call" and "persona" modes this drafts the whole sequence, so
+        the follow-up step has nothing left to do.
+        
+        Returns:
+            tuple: (cold_email, dict of stage outputs done so far)
         """
+        done = self._journaled(journal_key)
         
-        # Step 1: Enrich lead data
-        print("🔍 Enriching lead data...")
-        enriched_profile = self.research_agent_class.enrich_lead_data(lead_profile)
+        if COLD_EMAIL_STAGE in done:
+            if not self._missing_followups(done):
+                print("♻️ Reusing journaled email sequence...")
+            return done[COLD_EMAIL_STAGE], done
         
-        # Step 2: Generate cold email
-        print("✍️ Generating personalized cold email...")
-        cold_email = self.email_agent_class.generate_cold_email(enriched_profile, product_info)
+        if self.generation_mode in ("single_call", "persona"):
+            if self.generation_mode == "persona":
+                print("✍️ Personalizing the persona's email sequence...")
+                drafter, stage, profile_stage = self.persona_agent_class, "persona_sequence", "generate_persona_sequence"
+            else:
+                print("✍️ Generating full email sequence in a single call...")
+                drafter, stage, profile_stage = self.sequence_agent_class, "sequence", "generate_sequence"
+            check_deadline(stage)
+            with stage_span(stage), self._profile_stage(profile_stage):
+                cold_email, followup_sequence = drafter.generate_sequence(enriched_profile, product_info)
+            self._record_emails(journal_key, cold_email, followup_sequence)
+            done.update((followup["type"], followup) for followup in followup_sequence)
+        else:
+            print("✍️ Generating personalized cold email...")
+            check_deadline("cold_email")
+            with stage_span("cold_email"), self._profile_stage("generate_cold_email"):
+                cold_email = self.email_agent_class.generate_cold_email(enriched_profile, product_info)
+            self._record(journal_key, COLD_EMAIL_STAGE, cold_email)
+        
+        done[COLD_EMAIL_STAGE] = cold_email
+        return cold_email, done
+    
+    def _draft_followups(self, enriched_profile, cold_email, product_info, journal_key, done):
+        """Second email step: draft the follow-ups not already in ``done``, returned in schedule order."""
+        missing = self._missing_followups(done)
+        if not missing:
+            return self._ordered_followups(done)
         
-        # Step 3: Create follow-up sequence
         print("📧 Creating follow-up sequence...")
-        followup_sequence = self.followup_agent_class.generate_followup_sequence(
-            enriched_profile, cold_email, product_info
-        )
+        check_deadline("followups")
+        profiling = self.profiler is not None and self.profiler.active
+        with self._profile_stage("generate_followup_sequence"):
+            generated = self.followup_agent_class.generate_followup_sequence(
+                enriched_profile, cold_email, product_info,
+                # cProfile only sees the calling thread, so profiled leads
+                # generate their follow-ups sequentially
+                concurrent=not profiling,
+                schedule=missing,
+                on_generated=lambda followup: self._record(journal_key, followup["type"], followup)
+            )
+        done.update((followup["type"], followup) for followup in generated)
+        return self._ordered_followups(done)
+    
+    async def _agenerate_emails(self, enriched_profile, product_info, journal_key=None):
+        """Async version of ``_generate_emails``."""
+        done = self._journaled(journal_key)
+        missing = self._missing_followups(done)
         
-        # Step 4: Compile complete campaign
-        campaign = {
-            "lead_profile": enriched_profile,
-            "campaign_created_at": datetime.now().isoformat(),
-            "emails": {
-                "cold_email": cold_email,
-                "followups": followup_sequence
-            },
-            "campaign_summary": self._generate_campaign_summary(
-                enriched_profile, cold_email, followup_sequence
-            ),
-            "execution_timeline": self._generate_timeline(cold_email, followup_sequence),
-            "success_metrics": self._define_success_metrics(),
-            "next_steps": self._generate_next_steps(enriched_profile)
-        }
+        if COLD_EMAIL_STAGE in done and not missing:
+            return done[COLD_EMAIL_STAGE], self._ordered_followups(done)
         
-        return campaign
+        if self.generation_mode in ("single_call", "persona") and COLD_EMAIL_STAGE not in done:
+            persona = self.generation_mode == "persona"
+            drafter = self.persona_agent_class if persona else self.sequence_agent_class
+            stage = "persona_sequence" if persona else "sequence"
+            check_deadline(stage)
+            with stage_span(stage):
+                cold_email, followup_sequence = await drafter.agenerate_sequence(enriched_profile, product_info)
+            self._record_emails(journal_key, cold_email, followup_sequence)
+            return cold_email, followup_sequence
+        
+        cold_email = done.get(COLD_EMAIL_STAGE)
+        if cold_email is None:
+            check_deadline("cold_email")
+            with stage_span("cold_email"):
+                cold_email = await self.email_agent_class.agenerate_cold_email(enriched_profile, product_info)
+            self._record(journal_key, COLD_EMAIL_STAGE, cold_email)
+        
+        check_deadline("followups")
+        generated = await self.followup_agent_class.agenerate_followup_sequence(
+            enriched_profile, cold_email, product_info,
+            schedule=missing,
+            on_generated=lambda followup: self._record(journal_key, followup["type"], followup)
+        )
+        done.update((followup["type"], followup) for followup in generated)
+        return cold_email, self._ordered_followups(done)
     
-    def run_crew_workflow(self, lead_profile, product_info):
+    def run_crew_workflow(self, lead_profile, product_info, research_mode=None, deadline=None):
         """
         Run the CrewAI workflow for outbound sales automation.
         
         Args:
             lead_profile (dict): Basic lead information
             product_info (dict): Product/service information
+            research_mode (str): "agentic" to run the research kickoff and parse
+                its structured output into the enriched profile, or "fast" to skip
+                the kickoff entirely (defaults to the crew's ``research_mode``)
+            deadline (Deadline): Enclosing deadline (e.g. the batch's) that caps
+                the crew's ``campaign_budget``
             
         Returns:
-            dict: Results from the crew execution
+            dict: Results from the crew execution (a partial campaign if the
+                time budget ran out)
         """
+        research_mode = research_mode or self.research_mode
+        self._check_research_mode(research_mode)
         
         print("🚀 Executing Outbound Sales Crew workflow...")
+        metrics = CampaignMetrics()
+        campaign_deadline = self._campaign_deadline(deadline)
+        try:
+            with metrics.activate(), self._profile_lead(lead_profile), campaign_deadline.activate():
+                journal_key = self._journal_key(lead_profile, product_info)
+                enriched_profile, research_fields_used = self._research(lead_profile, research_mode, journal_key)
+                
+                # Continue with email generation using the enriched data
+                print("✍️ Steps 2-3: Email and Follow-up Agents generating sequence...")
+                cold_email, followup_sequence = self._generate_emails(enriched_profile, product_info, journal_key)
+        except Exception as e:
+            exceeded = self._budget_exceeded(e, campaign_deadline)
+            if exceeded is None:
+                raise
+            return self._partial_campaign(lead_profile, campaign_deadline, exceeded,
+                                          research_mode=research_mode, metrics=metrics)
+        
+        # Compile the complete campaign
+        campaign = self._compile_campaign(
+            enriched_profile, cold_email, followup_sequence,
+            crew_execution=self._crew_execution_info(research_mode, research_fields_used),
+            metrics=metrics
+        )
+        
+        print("✅ CrewAI workflow completed successfully!")
+        return campaign
+    
+    def _crew_execution_info(self, research_mode, research_fields_used):
+        """The ``crew_execution`` block of a campaign produced by the crew workflow."""
+        return {
+            "research_completed": research_mode == "agentic",
+            "research_mode": research_mode,
+            "research_fields_used": research_fields_used,
+            "agents_used": (
+                ["research_agent", "email_agent", "followup_agent"]
+                if research_mode == "agentic" else ["email_agent", "followup_agent"]
+            ),
+            "crewai_workflow": True
+        }
+    
+    def _research(self, lead_profile, research_mode, journal_key=None):
+        """
+        Step 1 of ``run_crew_workflow``: research and enrich the lead.
+        
+        Returns:
+            tuple: (enriched profile, research fields used from the kickoff)
+        """
+        journaled_research = self._journaled_enrichment(journal_key, research_mode)
+        if journaled_research is not None:
+            print("♻️ Step 1: Reusing journaled lead research...")
+            return journaled_research["profile"], journaled_research["research_fields_used"]
         
-        # Execute CrewAI tasks sequentially with proper agent execution
-        print("🔍 Step 1: Lead Research Agent analyzing prospect...")
-        research_task = self.tasks.research_lead_task(self.research_agent, lead_profile)
+        if research_mode == "fast":
+            print("⚡ Step 1: Fast research path, enriching lead with rules...")
+            with stage_span("enrichment"):
+                return self._enrich(journal_key, lead_profile), []
         
-        # Create crew for research task
+        domain = company_domain(lead_profile) if self.share_company_research else None
+        company_research = None
+        if domain is None:
+            print("🔍 Step 1: Lead Research Agent analyzing prospect...")
+            check_deadline("research_kickoff")
+            with stage_span("research_kickoff") as span:
+                research_task = self.tasks.research_lead_task(self.research_agent, lead_profile)
+                research_result = call_with_deadline(
+                    self._kickoff, self.research_agent, research_task, span, "research_kickoff"
+                )
+        else:
+            company_research = self._company_research(lead_profile, domain)
+            print("🔍 Step 1: Lead Research Agent analyzing the prospect's role...")
+            check_deadline("research_kickoff")
+            with stage_span("research_kickoff") as span:
+                research_task = self.tasks.research_role_task(self.role_research_agent, lead_profile, company_research)
+                research_result = call_with_deadline(
+                    self._kickoff, self.role_research_agent, research_task, span, "research_kickoff"
+                )
+        print("✅ Lead research completed by CrewAI agent")
+        
+        # Use the research result to enrich the lead profile
+        with stage_span("enrichment"), self._profile_stage("enrich_from_research"):
+            enriched_profile, research_fields_used = self.research_agent_class.enrich_from_research(
+                lead_profile, research_result, company_research
+            )
+        self._record(journal_key, ENRICHMENT_STAGE, {
+            "profile": enriched_profile,
+            "research_fields_used": research_fields_used,
+            "research_mode": research_mode
+        })
+        return enriched_profile, research_fields_used
+    
+    def _company_research(self, lead_profile, domain):
+        """Company-level research for ``domain``, run by the first lead at that company only."""
+        def research():
+            print(f"🏢 Researching company {domain} (shared by every lead there)...")
+            research_task = self.tasks.research_company_task(self.research_agent, lead_profile)
+            research_result = self._kickoff(self.research_agent, research_task, span, "company_research")
+            return self.research_agent_class.parse_company_research(research_result, domain)
+        
+        check_deadline("company_research")
+        with stage_span("company_research") as span:
+            # Leads waiting on another lead's research of the same company are
+            # bounded by their own deadline too
+            company_research, cached = call_with_deadline(
+                self.research_cache.company_research, domain, research, cacheable=has_company_research
+            )
+        if cached:
+            print(f"♻️ Reusing company research for {domain}")
+        return company_research
+    
+    def _kickoff(self, agent, task, span, profile_stage):
+        """
+        Run a single-task research crew and add its token usage to ``span``.
+        
+        CrewAI kickoffs cannot be cancelled, so callers run this through
+        ``call_with_deadline``.
+        """
+        from crewai import Crew, Process
+        
+        # Create crew for the research task
         research_crew = Crew(
-            agents=[self.research_agent],
-            tasks=[research_task],
+            agents=[agent],
+            tasks=[task],
             process=Process.sequential,
             verbose=False  # Keep verbose off for cleaner output
         )
         
         # Execute research
-        research_result = research_crew.kickoff()
-        print("✅ Lead research completed by CrewAI agent")
+        with self._profile_stage(profile_stage):
+            research_result = research_crew.kickoff()
         
-        # Use the research result to enrich the lead profile
-        enriched_profile = self.research_agent_class.enrich_lead_data(lead_profile)
+        # CrewAI calls the model itself, so take its usage from the kickoff result
+        token_usage = getattr(research_result, "token_usage", None)
+        if span is not None and token_usage is not None:
+            research_model = getattr(getattr(agent, "llm", None), "model", None)
+            span.add_llm_call(research_model, token_usage,
+                              calls=getattr(token_usage, "successful_requests", 1) or 1)
+        return research_result
+    
+    def run_batch(self, leads, product_info, concurrency=4, use_crew_workflow=False, indexed=False,
+                  budget_seconds=None):
+        """
+        Generate one campaign per lead with a bounded number of leads in flight.
+        
+        Leads are pulled from the iterable lazily, so a streaming reader such as
+        ``crew.leads.iter_leads`` keeps memory flat regardless of file size.
+        Results are yielded in completion order; each carries a ``batch`` block
+        with the lead's position in the input and its status. A failing lead is
+        reported as a failed record instead of aborting the whole batch.
+        
+        Once ``budget_seconds`` have passed no further leads are started, and the
+        leads still in flight are returned as partial campaigns (batch status
+        "partial").
+        
+        Args:
+            leads (iterable): Lead profiles (dicts)
+            product_info (dict): Product/service information
+            concurrency (int): Maximum number of leads processed at once
+            use_crew_workflow (bool): Use ``run_crew_workflow`` instead of the
+                direct ``create_outreach_campaign`` path
+            indexed (bool): ``leads`` yields ``(lead_index, lead_profile)`` pairs,
+                e.g. one shard of a larger file that keeps its global positions
+            budget_seconds (float): Time budget for the whole batch
+            
+        Yields:
+            dict: One campaign (or failed record) per lead
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        workflow = self.run_crew_workflow if use_crew_workflow else self.create_outreach_campaign
+        batch_deadline = Deadline(budget_seconds, name="batch")
+        lead_iter = self._within_budget(leads if indexed else enumerate(leads), batch_deadline)
         
-        # Continue with email generation using the enriched data
-        print("✍️ Step 2: Email Agent generating personalized content...")
-        cold_email = self.email_agent_class.generate_cold_email(enriched_profile, product_info)
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="campaign") as executor:
+            in_flight = {}
+            
+            def submit_next():
+                for index, lead_profile in lead_iter:
+                    future = executor.submit(workflow, lead_profile, product_info, deadline=batch_deadline)
+                    in_flight[future] = (index, lead_profile)
+                    return
+            
+            for _ in range(concurrency):
+                submit_next()
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, lead_profile = in_flight.pop(future)
+                    submit_next()
+                    yield self._batch_result(index, lead_profile, future)
+    
+    def run_pipeline(self, leads, product_info, research_workers=2, email_workers=4, followup_workers=4,
+                     queue_size=None, use_crew_workflow=False, indexed=False, budget_seconds=None):
+        """
+        Generate campaigns with overlapping stages (see ``crew.pipeline``).
+        
+        Research, cold email and follow-up generation each get their own worker
+        threads, connected by bounded queues, so different leads occupy
+        different stages at the same time.
+        
+        Args:
+            leads (iterable): Lead profiles (dicts)
+            product_info (dict): Product/service information
+            research_workers (int): Threads researching/enriching leads
+            email_workers (int): Threads drafting cold emails
+            followup_workers (int): Threads drafting follow-ups
+            queue_size (int): Capacity of each inter-stage queue
+            use_crew_workflow (bool): Use the crew workflow's research step
+            indexed (bool): ``leads`` yields ``(lead_index, lead_profile)`` pairs
+            budget_seconds (float): Time budget for the whole batch (see ``run_batch``)
+            
+        Yields:
+            dict: One campaign (or failed record) per lead, in completion order
+        """
+        from crew.pipeline import CampaignPipeline
         
-        print("📧 Step 3: Follow-up Agent creating sequence...")
-        followup_sequence = self.followup_agent_class.generate_followup_sequence(
-            enriched_profile, cold_email, product_info
+        pipeline = CampaignPipeline(
+            self, product_info,
+            research_workers=research_workers,
+            email_workers=email_workers,
+            followup_workers=followup_workers,
+            queue_size=queue_size,
+            use_crew_workflow=use_crew_workflow,
+            budget_seconds=budget_seconds
         )
+        yield from pipeline.run(leads, indexed=indexed)
+    
+    async def arun_batch(self, leads, product_info, concurrency=32, budget_seconds=None):
+        """
+        Async version of ``run_batch`` driven by ``acreate_outreach_campaign``.
         
-        # Compile the complete campaign
+        All leads in flight share the caller's event loop, so ``concurrency``
+        can be far higher than a thread pool would allow.
+        
+        Args:
+            leads (iterable): Lead profiles (dicts)
+            product_info (dict): Product/service information
+            concurrency (int): Maximum number of leads processed at once
+            budget_seconds (float): Time budget for the whole batch (see ``run_batch``)
+            
+        Yields:
+            dict: One campaign (or failed record) per lead, in completion order
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        batch_deadline = Deadline(budget_seconds, name="batch")
+        lead_iter = self._within_budget(enumerate(leads), batch_deadline)
+        in_flight = {}
+        
+        def submit_next():
+            for index, lead_profile in lead_iter:
+                task = asyncio.ensure_future(
+                    self.acreate_outreach_campaign(lead_profile, product_info, deadline=batch_deadline)
+                )
+                in_flight[task] = (index, lead_profile)
+                return
+        
+        try:
+            for _ in range(concurrency):
+                submit_next()
+            
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index, lead_profile = in_flight.pop(task)
+                    submit_next()
+                    yield self._batch_result(index, lead_profile, task)
+        finally:
+            for task in in_flight:
+                task.cancel()
+    
+    def _batch_result(self, index, lead_profile, future):
+        """Wrap a finished batch future (or asyncio task) into a campaign or failed record."""
+        try:
+            campaign = future.result()
+        except Exception as e:
+            return self._failed_record(index, lead_profile, e)
+        
+        # Partial campaigns (time budget ran out) keep their "partial" status
+        campaign["batch"] = {"lead_index": index, "status": campaign.get("status", "completed")}
+        return campaign
+    
+    def _within_budget(self, indexed_leads, batch_deadline):
+        """Pass ``(lead_index, lead_profile)`` pairs through until the batch budget runs out."""
+        for index, lead_profile in indexed_leads:
+            if batch_deadline.expired:
+                print(f"⏱️ Batch time budget of {batch_deadline.seconds}s used up; "
+                      f"lead #{index} and the leads after it were not started")
+                return
+            yield index, lead_profile
+    
+    def _campaign_deadline(self, parent=None):
+        """Deadline of one campaign: the crew's ``campaign_budget``, capped by ``parent``."""
+        return Deadline(self.campaign_budget, parent=parent)
+    
+    def _budget_exceeded(self, error, deadline):
+        """
+        The ``BudgetExceeded`` behind a failed campaign, or None for other failures.
+        
+        Agents wrap errors in their own exceptions, so the ``__cause__`` /
+        ``__context__`` chain is searched. A ``BudgetExceeded`` in it is
+        returned; a timeout in it counts once the deadline has expired, since
+        request timeouts are capped at the time left. Anything else (a bad
+        response, an auth error) stays a failure even after the deadline.
+        """
+        seen = set()
+        timed_out = False
+        while error is not None and id(error) not in seen:
+            seen.add(id(error))
+            if isinstance(error, BudgetExceeded):
+                return error
+            timed_out = timed_out or is_timeout(error)
+            error = error.__cause__ or error.__context__
+        if timed_out and deadline is not None and deadline.expired:
+            return deadline.exceeded()
+        return None
+    
+    def _failed_record(self, index, lead_profile, error):
+        """Batch record for a lead whose campaign raised, keeping any metrics collected so far."""
+        failed = {
+            "lead_profile": lead_profile,
+            "batch": {"lead_index": index, "status": "failed", "error": str(error)}
+        }
+        if getattr(error, "campaign_metrics", None) is not None:
+            failed["metrics"] = error.campaign_metrics
+        return failed
+    
+    def _profile_lead(self, lead_profile):
+        """Let the profiler decide whether this lead's stages are sampled."""
+        return self.profiler.lead(lead_profile) if self.profiler is not None else nullcontext()
+    
+    def _profile_stage(self, name):
+        """Profile a stage of a sampled lead (a no-op without a profiler)."""
+        return self.profiler.stage(name) if self.profiler is not None else nullcontext()
+    
+    def _journal_key(self, lead_profile, product_info):
+        """Campaign key in the journal, or None when journaling is off."""
+        if self.journal is None:
+            return None
+        return campaign_key(lead_profile, product_info, normalized=self.journal.normalized_keys)
+    
+    def _journaled(self, journal_key):
+        """Stage outputs already recorded for a campaign (also noted on its deadline)."""
+        if journal_key is None:
+            return {}
+        done = self.journal.completed(journal_key)
+        for stage, output in done.items():
+            record_stage(stage, output)
+        return done
+    
+    def _record(self, journal_key, stage, output):
+        """Note a finished stage on the campaign deadline and journal it when journaling is on."""
+        record_stage(stage, output)
+        if journal_key is not None:
+            self.journal.record(journal_key, stage, output)
+    
+    def _record_emails(self, journal_key, cold_email, followup_sequence):
+        """Record a whole generated sequence."""
+        self._record(journal_key, COLD_EMAIL_STAGE, cold_email)
+        for followup in followup_sequence:
+            self._record(journal_key, followup["type"], followup)
+    
+    def _enrich(self, journal_key, lead_profile):
+        """Rules-based enrichment, reused from the journal when already recorded."""
+        journaled = self._journaled_enrichment(journal_key, "fast")
+        if journaled is not None:
+            return journaled["profile"]
+        
+        check_deadline("enrichment")
+        with self._profile_stage("enrich_lead_data"):
+            enriched_profile = self.research_agent_class.enrich_lead_data(lead_profile)
+        self._record(journal_key, ENRICHMENT_STAGE, {
+            "profile": enriched_profile,
+            "research_fields_used": [],
+            "research_mode": "fast"
+        })
+        return enriched_profile
+    
+    def _journaled_enrichment(self, journal_key, research_mode):
+        """
+        The journaled enrichment of a campaign, if it was produced in ``research_mode``.
+        
+        A profile from the rules-based path must not stand in for agentic
+        research on resume (or the other way round), so enrichments from
+        another mode, or journaled before the mode was recorded, are redone.
+        """
+        enrichment = self._journaled(journal_key).get(ENRICHMENT_STAGE)
+        if enrichment is None or enrichment.get("research_mode") != research_mode:
+            return None
+        return enrichment
+    
+    def _missing_followups(self, done):
+        """Follow-up schedule entries that are not in the journal yet."""
+        return [
+            (followup_number, days_after) for followup_number, days_after in FOLLOWUP_SCHEDULE
+            if followup_stage(followup_number) not in done
+        ]
+    
+    def _ordered_followups(self, done):
+        """Follow-ups from a stage-output dict, in schedule order."""
+        return [done[followup_stage(followup_number)] for followup_number, _ in FOLLOWUP_SCHEDULE]
+    
+    def _check_research_mode(self, research_mode):
+        """Validate a research mode name."""
+        if research_mode not in RESEARCH_MODES:
+            raise ValueError(f"research_mode must be one of {RESEARCH_MODES}, got '{research_mode}'")
+    
+    def _compile_campaign(self, enriched_profile, cold_email, followup_sequence, crew_execution=None, metrics=None):
+        """Assemble the standard campaign structure from the generated emails."""
         campaign = {
             "lead_profile": enriched_profile,
-            "campaign_created_at": datetime.now().isoformat(),
-            "crew_execution": {
-                "research_completed": True,
-                "agents_used": ["research_agent", "email_agent", "followup_agent"],
-                "crewai_workflow": True
-            },
+            "campaign_created_at": datetime.now().isoformat()
+        }
+        if crew_execution is not None:
+            campaign["crew_execution"] = crew_execution
+        
+        campaign.update({
             "emails": {
                 "cold_email": cold_email,
                 "followups": followup_sequence
@@ -134,9 +752,41 @@ class OutboundSalesCrew:
             "execution_timeline": self._generate_timeline(cold_email, followup_sequence),
             "success_metrics": self._define_success_metrics(),
             "next_steps": self._generate_next_steps(enriched_profile)
-        }
+        })
+        if metrics is not None:
+            campaign["metrics"] = metrics.to_dict()
+        return campaign
+    
+    def _partial_campaign(self, lead_profile, deadline, exceeded, research_mode=None, metrics=None):
+        """
+        Campaign made of the stages finished before the time budget ran out.
         
-        print("✅ CrewAI workflow completed successfully!")
+        It has the standard structure plus ``"status": "partial"`` and a
+        ``budget_exceeded`` block; emails that were not generated are missing
+        (``cold_email`` is None).
+        """
+        stages = deadline.stages
+        enrichment = stages.get(ENRICHMENT_STAGE)
+        enriched_profile = enrichment["profile"] if enrichment is not None else lead_profile
+        followup_sequence = [
+            stages[followup_stage(followup_number)] for followup_number, _ in FOLLOWUP_SCHEDULE
+            if followup_stage(followup_number) in stages
+        ]
+        
+        crew_execution = None
+        if research_mode is not None:
+            crew_execution = self._crew_execution_info(
+                research_mode, enrichment["research_fields_used"] if enrichment is not None else []
+            )
+            crew_execution["research_completed"] = crew_execution["research_completed"] and enrichment is not None
+        
+        print(f"⏱️ {exceeded}; returning the partial campaign")
+        campaign = self._compile_campaign(
+            enriched_profile, stages.get(COLD_EMAIL_STAGE), followup_sequence,
+            crew_execution=crew_execution, metrics=metrics
+        )
+        campaign["status"] = "partial"
+        campaign["budget_exceeded"] = {**exceeded.to_dict(), "completed_stages": list(stages)}
         return campaign
     
     def _format_crew_results(self, crew_result, lead_profile, product_info):
@@ -191,22 +841,22 @@ class OutboundSalesCrew:
             "company_size": enriched_profile.get('company_size_category', 'unknown'),
             "primary_pain_points": enriched_profile.get('likely_pain_points', []),
             "personalization_approach": enriched_profile.get('personalization_hooks', []),
-            "email_sequence_count": 1 + len(followup_sequence),
+            "email_sequence_count": int(cold_email is not None) + len(followup_sequence),
             "total_campaign_duration": "7 days",
             "communication_style": enriched_profile.get('role_context', {}).get('communication_style', 'professional')
         }
     
     def _generate_timeline(self, cold_email, followup_sequence):
-        """Generate execution timeline for the campaign."""
-        timeline = [
-            {
+        """Generate execution timeline for the campaign (without emails that were not generated)."""
+        timeline = []
+        if cold_email is not None:
+            timeline.append({
                 "day": 0,
                 "action": "Send cold email",
                 "email_type": "cold_email",
                 "subject": cold_email.get('subject', ''),
                 "status": "ready"
-            }
-        ]
+            })
         
         for followup in followup_sequence:
             timeline.append({
@@ -265,6 +915,20 @@ class OutboundSalesCrew:
         
         return next_steps
     
+    def close(self):
+        """Release the shared HTTP connection pool, the research cache and the journal."""
+        self.llm_client.close()
+        self.research_cache.close()
+        if self.journal is not None:
+            self.journal.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+    
     def get_crew_info(self):
         """Get information about the crew and its capabilities."""
         return {
@@ -0,0 +1,301 @@
+"""
+Lead deduplication in front of campaign generation.
+
+Merged CRM exports often contain the same person several times with slightly
+different formatting. Every lead gets a stable campaign key: a hash of the
+fields that drive generation (email, name, job title, company, industry and
+size), normalized so that case, whitespace, accents and email plus-tags do
+not matter. Leads with a key that was already seen are dropped or merged
+into the first copy.
+
+Seen keys are kept in a SQLite file on disk behind a Bloom filter, so memory
+stays bounded for lead lists larger than RAM. The Bloom filter answers
+"definitely new" for almost every unique lead, so new keys are only written,
+in batches, and the database is only read for likely duplicates. A named
+database persists, so leads already seen in earlier runs are skipped too.
+
+Leads are yielded unchanged; the campaign key is not added to them, so it
+never reaches prompts or campaign output. ``CampaignJournal(normalized_keys=True)``
+derives the same kind of key for resuming.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import unicodedata
+from pathlib import Path
+
+from agents.enrichment_rules import normalize_text
+
+
+DEDUPE_MODES = ("drop", "merge")
+
+# Lead fields that change the generated campaign
+GENERATION_FIELDS = ("job_title", "company", "industry")
+
+# Mailbox providers that ignore dots in the local part
+_DOTLESS_DOMAINS = {"gmail.com": "gmail.com", "googlemail.com": "gmail.com"}
+
+# New keys buffered before one batched insert
+_FLUSH_EVERY = 5000
+
+
+def normalize_email(email):
+    """Lower-case an email and drop its ``+tag`` (and Gmail dots); returns '' when missing."""
+    email = str(email or "").strip().lower()
+    if "@" not in email:
+        return email
+    local, domain = email.rsplit("@", 1)
+    local = local.split("+", 1)[0]
+    if domain in _DOTLESS_DOMAINS:
+        local, domain = local.replace(".", ""), _DOTLESS_DOMAINS[domain]
+    return f"{local}@{domain}"
+
+
+def normalize_name(name):
+    """Strip accents, case and punctuation from a person's name."""
+    decomposed = unicodedata.normalize("NFKD", str(name or ""))
+    return normalize_text("".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def _normalize_size(size):
+    try:
+        return int(float(str(size).replace(",", "")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def lead_campaign_key(lead_profile, product_info=None):
+    """
+    Stable key of the campaign a lead would produce.
+
+    Args:
+        lead_profile (dict): Lead profile
+        product_info (dict): Optional product, for keys that differ per product
+
+    Returns:
+        str: 32-character hex digest
+    """
+    fields = {
+        "email": normalize_email(lead_profile.get("email")),
+        "name": normalize_name(lead_profile.get("name")),
+        "company_size": _normalize_size(lead_profile.get("company_size")),
+        **{field: normalize_text(str(lead_profile.get(field) or "")) for field in GENERATION_FIELDS}
+    }
+    payload = json.dumps([fields, product_info], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def merge_leads(first, other):
+    """
+    Fill gaps in ``first`` from a duplicate record.
+
+    Missing or empty fields are taken from ``other``, nested dicts are merged
+    recursively and lists are unioned; values present in both keep ``first``'s.
+    """
+    merged = dict(first)
+    for field, value in other.items():
+        current = merged.get(field)
+        if current in (None, "", [], {}):
+            merged[field] = value
+        elif isinstance(current, dict) and isinstance(value, dict):
+            merged[field] = merge_leads(current, value)
+        elif isinstance(current, list) and isinstance(value, list):
+            seen = {json.dumps(item, sort_keys=True, default=str) for item in current}
+            merged[field] = current + [
+                item for item in value if json.dumps(item, sort_keys=True, default=str) not in seen
+            ]
+    return merged
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        Args:
+            capacity (int): Keys the filter is sized for; the false-positive rate
+                rises gradually beyond it
+            error_rate (float): Target false-positive rate at ``capacity``
+        """
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class LeadDeduplicator:
+    """Drops or merges duplicate leads in one streaming pass with bounded memory."""
+
+    def __init__(self, mode="drop", path=None, expected_leads=1_000_000, error_rate=0.001, product_info=None):
+        """
+        Args:
+            mode (str): "drop" keeps the first copy of each lead and streams;
+                "merge" fills the first copy's gaps from later copies and yields
+                the merged leads once the input is exhausted
+            path (str | Path): SQLite file for seen keys/records, kept across
+                runs so leads seen by earlier runs are skipped as duplicates
+                (default: a temporary file removed on ``close``)
+            expected_leads (int): Bloom filter sizing (about 1.8 MB per million
+                leads at the default error rate)
+            error_rate (float): Bloom filter false-positive rate; false positives
+                only cost a database lookup, never a wrong drop
+            product_info (dict): Include the product in campaign keys
+        """
+        if mode not in DEDUPE_MODES:
+            raise ValueError(f"mode must be one of {DEDUPE_MODES}, got '{mode}'")
+        self.mode = mode
+        self.product_info = product_info
+        self.bloom = BloomFilter(expected_leads, error_rate)
+
+        self.seen = 0
+        self.duplicates = 0
+        self.disk_lookups = 0
+        self.previous_keys = 0
+
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="leads-dedup-", suffix=".sqlite3")
+            os.close(fd)
+            self._temporary = True
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._temporary = False
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(leads)")]
+        if columns and "run" not in columns:
+            # Databases from before keys were kept across runs
+            self._conn.execute("DROP TABLE leads")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leads "
+            "(key TEXT PRIMARY KEY, position INTEGER NOT NULL, lead TEXT, run INTEGER NOT NULL)"
+        )
+        # Keys from earlier runs go into the Bloom filter, so they are found as duplicates
+        self.run = self._conn.execute("SELECT COALESCE(MAX(run), 0) + 1 FROM leads").fetchone()[0]
+        for (key,) in self._conn.execute("SELECT key FROM leads"):
+            self.bloom.add(key)
+            self.previous_keys += 1
+        self._pending = {}
+
+    def dedupe(self, leads, indexed=False):
+        """
+        Remove duplicate leads, including leads seen by earlier runs sharing ``path``.
+
+        Args:
+            leads (iterable): Lead profiles, or ``(lead_index, lead_profile)``
+                pairs when ``indexed`` is True
+            indexed (bool): ``leads`` yields ``(lead_index, lead_profile)`` pairs
+
+        Yields:
+            tuple: ``(lead_index, lead_profile)`` of each unique lead, keeping the
+                index of its first occurrence in the input
+        """
+        pairs = leads if indexed else enumerate(leads)
+        if self.mode == "drop":
+            yield from self._drop(pairs)
+        else:
+            yield from self._merge(pairs)
+
+    def _drop(self, pairs):
+        for lead_index, lead_profile in pairs:
+            key = lead_campaign_key(lead_profile, self.product_info)
+            if self._is_duplicate(key):
+                continue
+            self._add(key, lead_index, None)
+            yield lead_index, lead_profile
+        self._flush()
+
+    def _merge(self, pairs):
+        for lead_index, lead_profile in pairs:
+            key = lead_campaign_key(lead_profile, self.product_info)
+            if self._is_duplicate(key):
+                self._flush()
+                run, first = self._conn.execute(
+                    "SELECT run, lead FROM leads WHERE key = ?", (key,)
+                ).fetchone()
+                if run != self.run:
+                    # Already handled by an earlier run
+                    continue
+                self._conn.execute(
+                    "UPDATE leads SET lead = ? WHERE key = ?",
+                    (json.dumps(merge_leads(json.loads(first), lead_profile), default=str), key)
+                )
+                continue
+            self._add(key, lead_index, json.dumps(lead_profile, default=str))
+        self._flush()
+        self._conn.commit()
+
+        self._conn.execute("CREATE INDEX IF NOT EXISTS leads_run_position ON leads (run, position)")
+        for position, lead in self._conn.execute(
+            "SELECT position, lead FROM leads WHERE run = ? ORDER BY position", (self.run,)
+        ):
+            yield position, json.loads(lead)
+
+    def _is_duplicate(self, key):
+        self.seen += 1
+        if key not in self.bloom:
+            return False
+        if key in self._pending:
+            self.duplicates += 1
+            return True
+        self.disk_lookups += 1
+        found = self._conn.execute("SELECT 1 FROM leads WHERE key = ?", (key,)).fetchone() is not None
+        self.duplicates += found
+        return found
+
+    def _add(self, key, lead_index, lead):
+        self.bloom.add(key)
+        self._pending[key] = (key, lead_index, lead, self.run)
+        if len(self._pending) >= _FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._conn.executemany("INSERT INTO leads (key, position, lead, run) VALUES (?, ?, ?, ?)",
+                                   self._pending.values())
+            self._conn.commit()
+            self._pending.clear()
+
+    def stats(self):
+        """Return lead, duplicate and disk lookup counters."""
+        return {
+            "mode": self.mode,
+            "seen": self.seen,
+            "unique": self.seen - self.duplicates,
+            "duplicates": self.duplicates,
+            "disk_lookups": self.disk_lookups,
+            "previous_keys": self.previous_keys
+        }
+
+    def close(self):
+        """Close the database, deleting it if it was temporary."""
+        self._conn.close()
+        if self._temporary:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(f"{self.path}{suffix}")
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,167 @@
+"""
+Append-only completion journal for resumable campaign runs.
+
+Every finished stage of a campaign (enrichment, cold email, each follow-up) is
+appended to a JSONL journal together with its output, keyed by a hash of the
+lead profile and product. A restarted run that points at the same journal
+reuses those outputs instead of calling the LLM again, so a batch that dies
+halfway resumes mid-campaign with no duplicated API spend.
+
+Only byte offsets are kept in memory; outputs are read back from disk on
+demand, so the journal stays cheap for very large batches.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+ENRICHMENT_STAGE = "enrichment"
+COLD_EMAIL_STAGE = "cold_email"
+
+
+def campaign_key(lead_profile, product_info, normalized=False):
+    """
+    Stable identifier for one lead pitched one product.
+
+    With ``normalized`` the lead is identified by ``crew.dedup``'s normalized
+    campaign key instead of its exact fields, so reformatted copies of a lead
+    resume the same campaign.
+    """
+    if normalized:
+        from crew.dedup import lead_campaign_key
+        identity = lead_campaign_key(lead_profile)
+    else:
+        identity = lead_profile
+    payload = json.dumps([identity, product_info], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def followup_stage(followup_number):
+    """Journal stage name of a follow-up (matches the follow-up's ``type``)."""
+    return f"followup_{followup_number}"
+
+
+class CampaignJournal:
+    """Thread-safe, fsync'd JSONL log of completed campaign stages."""
+
+    def __init__(self, path, fsync=True, normalized_keys=False):
+        """
+        Args:
+            path (str | Path): Journal file; an existing journal is replayed
+            fsync (bool): fsync after every record so a crash loses at most the
+                stage that was being written
+            normalized_keys (bool): Key campaigns by the normalized lead fields
+                (see ``campaign_key``); used together with lead deduplication
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.normalized_keys = normalized_keys
+        self._lock = threading.Lock()
+        self._offsets = {}
+        self.replayed = 0
+        self.recorded = 0
+
+        self._replay()
+        self._file = open(self.path, "ab")
+        self._reader = open(self.path, "rb")
+
+    def completed(self, key):
+        """
+        Return the recorded outputs for a campaign key.
+
+        Returns:
+            dict: ``{stage: output}`` for every stage already journaled
+        """
+        with self._lock:
+            locations = dict(self._offsets.get(key, {}))
+            outputs = {}
+            for stage, (offset, length) in locations.items():
+                self._reader.seek(offset)
+                outputs[stage] = json.loads(self._reader.read(length))["output"]
+        return outputs
+
+    def record(self, key, stage, output):
+        """Durably append one finished stage."""
+        line = json.dumps({
+            "key": key,
+            "stage": stage,
+            "recorded_at": datetime.now().isoformat(),
+            "output": output
+        }, default=str).encode("utf-8") + b"\n"
+
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._offsets.setdefault(key, {})[stage] = (offset, len(line))
+            self.recorded += 1
+
+    def stats(self):
+        """Return how many campaigns and stages the journal holds."""
+        with self._lock:
+            return {
+                "campaigns": len(self._offsets),
+                "stages": sum(len(stages) for stages in self._offsets.values()),
+                "replayed": self.replayed,
+                "recorded": self.recorded
+            }
+
+    def close(self):
+        """Close the journal files."""
+        with self._lock:
+            self._file.close()
+            self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _replay(self):
+        """Index an existing journal, dropping a torn final line from a crash."""
+        if not self.path.exists():
+            return
+
+        offset = 0
+        skipped = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                if _is_entry(entry):
+                    self._offsets.setdefault(entry["key"], {})[entry["stage"]] = (offset, len(line))
+                    self.replayed += 1
+                elif line.strip():
+                    skipped += 1
+                offset += len(line)
+
+        if skipped:
+            print(f"⚠️ Skipped {skipped} invalid record(s) in journal '{self.path}'")
+
+        if offset != self.path.stat().st_size:
+            print(f"⚠️ Dropping incomplete record at the end of journal '{self.path}'")
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+
+def _is_entry(entry):
+    """True for a journal record ``CampaignJournal.record`` could have written."""
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("key"), str)
+        and isinstance(entry.get("stage"), str)
+        and "output" in entry
+    )
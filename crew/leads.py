@@ -0,0 +1,94 @@
+"""
+Lead file readers for batch campaign generation.
+
+Lead exports are streamed one record at a time so that arbitrarily large
+files can be fed into the crew without loading them into memory.
+"""
+
+import csv
+import json
+from pathlib import Path
+
+
+# CSV columns that hold numbers in the lead profile schema
+NUMERIC_FIELDS = {"company_size", "lead_score"}
+
+
+def iter_leads(path):
+    """
+    Stream lead profiles from a JSONL or CSV export.
+
+    Args:
+        path (str | Path): Path to a ``.jsonl``/``.ndjson`` or ``.csv`` file
+
+    Yields:
+        dict: One lead profile per record
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix in (".jsonl", ".ndjson"):
+        yield from _iter_jsonl(path)
+    elif suffix == ".csv":
+        yield from _iter_csv(path)
+    else:
+        raise ValueError(f"Unsupported lead file format '{suffix}' (expected .jsonl, .ndjson or .csv)")
+
+
+def _iter_jsonl(path):
+    """Yield one lead per non-empty JSON line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of {path}: {e}")
+
+
+def _iter_csv(path):
+    """
+    Yield one lead per CSV row.
+
+    Dotted column names (e.g. ``company_info.website``) are expanded into
+    nested dicts, and cells that look like JSON arrays or objects are decoded
+    so list fields such as ``company_info.technologies`` survive the round trip.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            lead = {}
+            for column, value in row.items():
+                if column is None or value is None or value == "":
+                    continue
+                _set_nested(lead, column.strip(), _parse_cell(column.strip(), value.strip()))
+            yield lead
+
+
+def _parse_cell(column, value):
+    """Convert a raw CSV cell into the type used by the lead profile schema."""
+    if value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value
+
+    if column.rsplit(".", 1)[-1] in NUMERIC_FIELDS:
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return value
+
+    return value
+
+
+def _set_nested(target, dotted_key, value):
+    """Assign ``value`` into ``target`` following a dotted key path."""
+    keys = dotted_key.split(".")
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
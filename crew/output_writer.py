@@ -0,0 +1,199 @@
+"""
+Streaming, crash-safe campaign output.
+
+``CampaignWriter`` appends each finished campaign to an NDJSON stream as soon as
+it is produced, so memory stays flat however large the batch is. The stream is
+written to a ``.part`` file and renamed into place only when the batch closes
+cleanly, and per-lead files are written to a temp file and renamed, so a crash
+never leaves a half-written output file behind under its final name.
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def dumps(record):
+    """Serialize a record to compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(record, default=str)
+    return json.dumps(record, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compress(data, compression):
+    """Compress a complete payload with the named codec."""
+    if compression is None:
+        return data
+    if compression == "gzip":
+        return gzip.compress(data)
+    return _zstd().ZstdCompressor().compress(data)
+
+
+def atomic_write_bytes(path, data):
+    """Write ``data`` to ``path`` via a temp file in the same directory and an atomic rename."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write_text(path, text):
+    """Text counterpart of ``atomic_write_bytes``."""
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def campaign_file_stem(campaign):
+    """Stable, filesystem-safe name for a campaign's per-lead file."""
+    lead = campaign.get("lead_profile", {})
+    batch = campaign.get("batch", {})
+    identity = lead.get("email") or lead.get("name") or f"lead-{batch.get('lead_index', 'unknown')}"
+    stem = re.sub(r"[^A-Za-z0-9._@-]+", "_", str(identity)).strip("._") or "lead"
+    if "lead_index" in batch:
+        stem = f"{batch['lead_index']:06d}_{stem}"
+    return stem
+
+
+class CampaignWriter:
+    """Append-as-you-go NDJSON writer with optional compression and per-lead files."""
+
+    def __init__(self, output_dir, filename="campaigns.jsonl", compression=None, partition_per_lead=False):
+        """
+        Args:
+            output_dir (str | Path): Directory for the output
+            filename (str): NDJSON stream name (the compression suffix is appended)
+            compression (str): None, "gzip" or "zstd"
+            partition_per_lead (bool): Write each campaign to its own file under
+                ``<output_dir>/campaigns/`` instead of a single stream
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"compression must be one of {list(COMPRESSION_SUFFIXES)}, got '{compression}'")
+        if compression == "zstd":
+            _zstd()
+
+        self.output_dir = Path(output_dir)
+        self.compression = compression
+        self.partition_per_lead = partition_per_lead
+        self.records_written = 0
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self._stream = None
+        self._raw_file = None
+        suffix = COMPRESSION_SUFFIXES[compression]
+
+        if partition_per_lead:
+            self.path = self.output_dir / "campaigns"
+            self.path.mkdir(exist_ok=True)
+            self._partition_suffix = ".json" + suffix
+        else:
+            self.path = self.output_dir / (filename + suffix)
+            self._part_path = self.path.with_name(self.path.name + ".part")
+            self._raw_file = open(self._part_path, "wb")
+            if compression == "gzip":
+                self._stream = gzip.GzipFile(fileobj=self._raw_file, mode="wb")
+            elif compression == "zstd":
+                self._stream = _zstd().ZstdCompressor().stream_writer(self._raw_file, closefd=False)
+            else:
+                self._stream = self._raw_file
+
+    def write(self, campaign):
+        """
+        Persist one campaign immediately.
+
+        Returns:
+            Path: The file the campaign was written to
+        """
+        payload = dumps(campaign) + b"\n"
+
+        if self.partition_per_lead:
+            path = self.path / (campaign_file_stem(campaign) + self._partition_suffix)
+            atomic_write_bytes(path, compress(payload, self.compression))
+        else:
+            path = self.path
+            self._stream.write(payload)
+            self._flush()
+
+        self.records_written += 1
+        return path
+
+    def write_raw(self, line):
+        """Append an already serialized NDJSON line (bytes ending in a newline) to the stream."""
+        if self.partition_per_lead:
+            raise ValueError("write_raw is only supported for a single NDJSON stream")
+        self._stream.write(line)
+        self._flush()
+        self.records_written += 1
+        return self.path
+
+    def close(self):
+        """Finish the stream and atomically move it to its final name."""
+        if self._stream is None:
+            return
+        if self._stream is not self._raw_file:
+            self._stream.close()
+        self._raw_file.flush()
+        os.fsync(self._raw_file.fileno())
+        self._raw_file.close()
+        os.replace(self._part_path, self.path)
+        self._stream = self._raw_file = None
+
+    def abort(self):
+        """Close the stream without publishing it; the ``.part`` file is kept for inspection."""
+        if self._stream is None:
+            return
+        try:
+            if self._stream is not self._raw_file:
+                self._stream.close()
+        finally:
+            self._raw_file.close()
+            self._stream = self._raw_file = None
+
+    def _flush(self):
+        """Push the record to the OS so a crash loses at most the record being written."""
+        if self.compression == "zstd":
+            import zstandard
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        else:
+            self._stream.flush()
+        if self._stream is not self._raw_file:
+            self._raw_file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def _zstd():
+    """Import zstandard lazily, with an actionable error if it is missing."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the zstandard package: pip install zstandard")
+    return zstandard
@@ -0,0 +1,253 @@
+"""
+Staged campaign pipeline with overlapping stages across leads.
+
+Instead of one thread walking a lead through research, cold email and
+follow-ups in order, each stage has its own pool of worker threads connected
+by bounded queues::
+
+    leads -> [research] -> queue -> [cold email] -> queue -> [follow-ups] -> results
+
+While lead N is in follow-up generation, lead N+1 is drafting its cold email
+and lead N+2 is being researched. Bounded queues provide backpressure: a slow
+downstream stage (or a slow consumer of the results) stalls the stages before
+it instead of letting work pile up in memory. Worker counts can be tuned per
+stage, e.g. more follow-up workers since each lead needs several completions.
+
+A lead that fails in any stage skips the remaining stages and is yielded as a
+failed batch record, just like ``OutboundSalesCrew.run_batch``. A lead whose
+time budget runs out skips them too and is yielded as a partial campaign; its
+deadline starts when research begins and covers the time spent queued
+between stages.
+"""
+
+import queue
+import threading
+
+from agents.deadline import Deadline
+from agents.metrics import CampaignMetrics, stage_span
+
+
+# Marks the end of a stage's input; each worker puts it back for its siblings
+_DONE = object()
+
+# Seconds between checks of the stop flag while blocked on a queue
+_POLL_INTERVAL = 0.1
+
+
+class _LeadJob:
+    """A lead moving through the pipeline, with everything produced so far."""
+
+    __slots__ = ("index", "lead_profile", "journal_key", "metrics", "deadline", "enriched_profile",
+                 "research_fields_used", "cold_email", "done", "campaign", "error")
+
+    def __init__(self, index, lead_profile, journal_key):
+        self.index = index
+        self.lead_profile = lead_profile
+        self.journal_key = journal_key
+        self.metrics = CampaignMetrics()
+        self.deadline = None
+        self.enriched_profile = None
+        self.research_fields_used = []
+        self.cold_email = None
+        self.done = None
+        self.campaign = None
+        self.error = None
+
+
+class CampaignPipeline:
+    """Runs leads through research, cold email and follow-up stage workers."""
+
+    def __init__(self, crew, product_info, research_workers=2, email_workers=4, followup_workers=4,
+                 queue_size=None, use_crew_workflow=False, research_mode=None, budget_seconds=None):
+        """
+        Args:
+            crew (OutboundSalesCrew): Crew whose agents, journal and profiler are used
+            product_info (dict): Product/service information
+            research_workers (int): Threads researching/enriching leads
+            email_workers (int): Threads drafting cold emails (whole sequences in
+                "single_call" and "persona" modes)
+            followup_workers (int): Threads drafting follow-ups
+            queue_size (int): Capacity of each inter-stage queue (default: twice
+                the largest worker count)
+            use_crew_workflow (bool): Research with ``run_crew_workflow``'s step 1
+                (CrewAI kickoff in "agentic" mode) instead of rules-only enrichment
+            research_mode (str): Research mode for the crew workflow (defaults
+                to the crew's ``research_mode``)
+            budget_seconds (float): Time budget for the whole run; no leads are
+                fed once it has passed and every lead's deadline is capped by it
+        """
+        for name, workers in (("research_workers", research_workers), ("email_workers", email_workers),
+                              ("followup_workers", followup_workers)):
+            if workers < 1:
+                raise ValueError(f"{name} must be at least 1")
+        research_mode = research_mode or crew.research_mode
+        crew._check_research_mode(research_mode)
+
+        self.crew = crew
+        self.product_info = product_info
+        self.research_workers = research_workers
+        self.email_workers = email_workers
+        self.followup_workers = followup_workers
+        self.queue_size = queue_size or 2 * max(research_workers, email_workers, followup_workers)
+        self.use_crew_workflow = use_crew_workflow
+        self.research_mode = research_mode
+        self.budget_seconds = budget_seconds
+        self._batch_deadline = None
+        self._stop = threading.Event()
+
+    def run(self, leads, indexed=False):
+        """
+        Process leads through the pipeline.
+
+        Args:
+            leads (iterable): Lead profiles, or ``(lead_index, lead_profile)``
+                pairs when ``indexed`` is True
+            indexed (bool): ``leads`` yields ``(lead_index, lead_profile)`` pairs
+
+        Yields:
+            dict: One campaign (or failed record) per lead, in completion order
+        """
+        self._stop.clear()
+        self._batch_deadline = Deadline(self.budget_seconds, name="batch")
+        research_queue = queue.Queue(self.queue_size)
+        email_queue = queue.Queue(self.queue_size)
+        followup_queue = queue.Queue(self.queue_size)
+        results = queue.Queue(self.queue_size)
+        feed_errors = []
+
+        threads = [threading.Thread(
+            target=self._feed, args=(leads, indexed, research_queue, feed_errors),
+            name="pipeline-feed", daemon=True
+        )]
+        threads += self._start_stage("research", self.research_workers, research_queue, email_queue, self._research)
+        threads += self._start_stage("email", self.email_workers, email_queue, followup_queue, self._email)
+        threads += self._start_stage("followup", self.followup_workers, followup_queue, results, self._followups)
+        threads[0].start()
+
+        try:
+            while True:
+                job = results.get()
+                if job is _DONE:
+                    break
+                yield self._result(job)
+        finally:
+            # Also reached when the consumer stops early: release every worker
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if feed_errors:
+            raise feed_errors[0]
+
+    def _feed(self, leads, indexed, outbox, errors):
+        """Pull leads lazily into the first queue; blocks while the pipeline is full."""
+        try:
+            pairs = leads if indexed else enumerate(leads)
+            for index, lead_profile in self.crew._within_budget(pairs, self._batch_deadline):
+                job = _LeadJob(index, lead_profile, self.crew._journal_key(lead_profile, self.product_info))
+                if not self._put(outbox, job):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            self._put(outbox, _DONE)
+
+    def _start_stage(self, name, workers, inbox, outbox, handler):
+        """Start a stage's workers plus a closer that signals the next stage once they all exit."""
+        stage_threads = [
+            threading.Thread(target=self._work, args=(inbox, outbox, handler),
+                             name=f"pipeline-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+        def close():
+            for thread in stage_threads:
+                thread.join()
+            self._put(outbox, _DONE)
+
+        closer = threading.Thread(target=close, name=f"pipeline-{name}-closer", daemon=True)
+        for thread in stage_threads:
+            thread.start()
+        closer.start()
+        return stage_threads + [closer]
+
+    def _work(self, inbox, outbox, handler):
+        while True:
+            job = self._get(inbox)
+            if job is None:
+                return
+            if job is _DONE:
+                self._put(inbox, _DONE)
+                return
+            if job.error is None:
+                if job.deadline is None:
+                    job.deadline = self.crew._campaign_deadline(self._batch_deadline)
+                try:
+                    with job.metrics.activate(), self.crew._profile_lead(job.lead_profile), job.deadline.activate():
+                        handler(job)
+                except Exception as e:
+                    job.error = e
+            if not self._put(outbox, job):
+                return
+
+    def _research(self, job):
+        crew = self.crew
+        if self.use_crew_workflow:
+            job.enriched_profile, job.research_fields_used = crew._research(
+                job.lead_profile, self.research_mode, job.journal_key
+            )
+        else:
+            with stage_span("enrichment"):
+                job.enriched_profile = crew._enrich(job.journal_key, job.lead_profile)
+
+    def _email(self, job):
+        job.cold_email, job.done = self.crew._draft_cold_email(
+            job.enriched_profile, self.product_info, job.journal_key
+        )
+
+    def _followups(self, job):
+        crew = self.crew
+        followup_sequence = crew._draft_followups(
+            job.enriched_profile, job.cold_email, self.product_info, job.journal_key, job.done
+        )
+        job.campaign = crew._compile_campaign(
+            job.enriched_profile, job.cold_email, followup_sequence,
+            crew_execution=(
+                crew._crew_execution_info(self.research_mode, job.research_fields_used)
+                if self.use_crew_workflow else None
+            ),
+            metrics=job.metrics
+        )
+
+    def _result(self, job):
+        crew = self.crew
+        if job.error is not None:
+            exceeded = crew._budget_exceeded(job.error, job.deadline)
+            if exceeded is None:
+                return crew._failed_record(job.index, job.lead_profile, job.error)
+            job.campaign = crew._partial_campaign(
+                job.lead_profile, job.deadline, exceeded,
+                research_mode=self.research_mode if self.use_crew_workflow else None,
+                metrics=job.metrics
+            )
+        job.campaign["batch"] = {"lead_index": job.index, "status": job.campaign.get("status", "completed")}
+        return job.campaign
+
+    def _put(self, target, item):
+        """Blocking put that gives up (returning False) once the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source):
+        """Blocking get that returns None once the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
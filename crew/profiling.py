@@ -0,0 +1,202 @@
+"""
+Opt-in cProfile and tracemalloc hooks around crew stages.
+
+``StageProfiler`` samples a fraction of leads (deterministically, by a hash of
+the lead, so reruns profile the same leads) and, for those leads only, runs
+each wrapped stage under ``cProfile`` with ``tracemalloc`` tracing. Results are
+accumulated per stage and written as ``<stage>.pstats`` (load with
+``python -m pstats`` or snakeviz), a readable ``<stage>.txt`` with the top
+functions by cumulative time, and ``<stage>.allocations.txt`` with the source
+lines that allocated the most memory, split into project code and
+third-party (CrewAI, OpenAI, httpx, ...) code.
+
+Only one stage is profiled at a time: cProfile cannot run in several threads
+at once on Python 3.12+, and tracemalloc is process-wide. A sampled stage that
+starts while another is being profiled runs unprofiled and is counted as
+``skipped_busy``. Allocation reports include anything other threads allocated
+while the stage ran.
+"""
+
+import cProfile
+import hashlib
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+
+
+REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+
+_lead_sampled = ContextVar("profiled_lead", default=False)
+
+
+def lead_sample_value(lead_profile):
+    """Map a lead to a stable value in [0, 1) for sampling."""
+    key = lead_profile.get("email") or json.dumps(lead_profile, sort_keys=True, default=str)
+    digest = hashlib.sha256(str(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+class StageProfiler:
+    """Samples leads and profiles their stages with cProfile and tracemalloc."""
+
+    def __init__(self, output_dir="profiles", sample_rate=0.05, top_n=30, traceback_limit=1):
+        """
+        Args:
+            output_dir (str | Path): Directory for the reports
+            sample_rate (float): Fraction of leads to profile (0-1)
+            top_n (int): Entries per text report
+            traceback_limit (int): Frames stored per allocation; more frames
+                attribute library allocations to our callers but cost more
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.traceback_limit = traceback_limit
+
+        self.stats = {}
+        self.allocations = {}
+        self.counters = {}
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    def is_sampled(self, lead_profile):
+        return lead_sample_value(lead_profile) < self.sample_rate
+
+    @contextmanager
+    def lead(self, lead_profile):
+        """Mark the stages run in this context as belonging to ``lead_profile``."""
+        token = _lead_sampled.set(self.is_sampled(lead_profile))
+        try:
+            yield
+        finally:
+            _lead_sampled.reset(token)
+
+    @property
+    def active(self):
+        """True when the current lead is sampled."""
+        return _lead_sampled.get()
+
+    def stage(self, name):
+        """Context manager that profiles ``name`` if the current lead is sampled."""
+        if not _lead_sampled.get():
+            return nullcontext()
+        return self._profile(name)
+
+    @contextmanager
+    def _profile(self, name):
+        if not self._busy.acquire(blocking=False):
+            self._count(name, "skipped_busy")
+            yield
+            return
+
+        profile = cProfile.Profile()
+        tracing = not tracemalloc.is_tracing()
+        try:
+            if tracing:
+                tracemalloc.start(self.traceback_limit)
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                after = tracemalloc.take_snapshot()
+                if tracing:
+                    tracemalloc.stop()
+                self._collect(name, profile, after.compare_to(before, "lineno"), elapsed, peak)
+        finally:
+            self._busy.release()
+
+    def _collect(self, name, profile, differences, elapsed, peak):
+        with self._lock:
+            if name in self.stats:
+                self.stats[name].add(profile)
+            else:
+                self.stats[name] = pstats.Stats(profile)
+
+            stage_allocations = self.allocations.setdefault(name, {})
+            for difference in differences:
+                if difference.size_diff <= 0:
+                    continue
+                frame = difference.traceback[0]
+                location = (frame.filename, frame.lineno)
+                size, count = stage_allocations.get(location, (0, 0))
+                stage_allocations[location] = (size + difference.size_diff, count + difference.count_diff)
+
+            counters = self.counters.setdefault(name, {"profiled": 0, "skipped_busy": 0,
+                                                       "wall_seconds": 0.0, "peak_bytes": 0})
+            counters["profiled"] += 1
+            counters["wall_seconds"] += elapsed
+            counters["peak_bytes"] = max(counters["peak_bytes"], peak)
+
+    def _count(self, name, counter):
+        with self._lock:
+            counters = self.counters.setdefault(name, {"profiled": 0, "skipped_busy": 0,
+                                                       "wall_seconds": 0.0, "peak_bytes": 0})
+            counters[counter] += 1
+
+    def write_reports(self):
+        """
+        Write per-stage pstats, cumulative-time and top-allocation reports.
+
+        Returns:
+            Path: The report directory
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            for name, stats in self.stats.items():
+                stats.dump_stats(str(self.output_dir / f"{name}.pstats"))
+
+                text = io.StringIO()
+                pstats.Stats(str(self.output_dir / f"{name}.pstats"), stream=text) \
+                    .strip_dirs().sort_stats("cumulative").print_stats(self.top_n)
+                (self.output_dir / f"{name}.txt").write_text(text.getvalue())
+
+            for name, allocations in self.allocations.items():
+                (self.output_dir / f"{name}.allocations.txt").write_text(
+                    self._allocation_report(name, allocations)
+                )
+
+            summary = {name: {**counters, "wall_seconds": round(counters["wall_seconds"], 4)}
+                       for name, counters in self.counters.items()}
+            (self.output_dir / "summary.json").write_text(json.dumps({
+                "sample_rate": self.sample_rate,
+                "stages": summary
+            }, indent=2))
+        return self.output_dir
+
+    def _allocation_report(self, name, allocations):
+        counters = self.counters.get(name, {})
+        ranked = sorted(allocations.items(), key=lambda item: item[1][0], reverse=True)
+        ours = sum(size for (filename, _), (size, _) in allocations.items() if _is_project_file(filename))
+        total = sum(size for size, _ in allocations.values()) or 1
+
+        lines = [
+            f"Stage: {name}",
+            f"Profiled runs: {counters.get('profiled', 0)}, peak traced memory: "
+            f"{counters.get('peak_bytes', 0) / 1024:.1f} KiB",
+            f"Allocated by project code: {ours / 1024:.1f} KiB ({ours / total:.0%}), "
+            f"third-party/stdlib: {(total - ours) / 1024:.1f} KiB",
+            "",
+            f"Top {self.top_n} allocation sites (net growth summed over profiled runs):"
+        ]
+        for (filename, lineno), (size, count) in ranked[:self.top_n]:
+            origin = "project" if _is_project_file(filename) else "library"
+            lines.append(f"{size / 1024:10.1f} KiB {count:8d} blocks  [{origin}] {filename}:{lineno}")
+        return "\n".join(lines) + "\n"
+
+
+def _is_project_file(filename):
+    return filename.startswith(REPO_ROOT) and "site-packages" not in filename
@@ -0,0 +1,520 @@
+"""
+Sharded batch execution across processes and machines.
+
+A lead file is hash-partitioned into ``num_shards`` shards by lead email (or
+company). Worker processes claim shards one at a time through exclusive claim
+files in the output directory, run each with their own ``OutboundSalesCrew``
+and write the shard's campaigns, ordered by lead index, to
+``shards/shard-NNNN-of-MMMM.jsonl``. Running the same command on several hosts
+that share the output directory (NFS, SMB, ...) spreads the shards across
+them. Once every shard file exists they are merged into one output that is
+identical no matter how the work was split.
+
+Each shard keeps a completion journal next to its output, so a shard whose
+claim goes stale (its worker died) is picked up by another worker and resumed
+without repeating finished LLM calls.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from crew.dedup import LeadDeduplicator, normalize_email
+from crew.output_writer import CampaignWriter
+
+
+SHARD_BY = ("email", "company")
+
+
+def shard_key(lead_profile, shard_by="email"):
+    """
+    Partition key of a lead: its email or company, falling back to the other
+    field and finally to the whole record.
+    """
+    fields = ("email", "company") if shard_by == "email" else ("company", "email")
+    for field in fields:
+        value = lead_profile.get(field)
+        if value:
+            # Normalized like crew.dedup so copies of a lead share a shard
+            return normalize_email(value) if field == "email" else str(value).strip().lower()
+    return json.dumps(lead_profile, sort_keys=True, default=str)
+
+
+def shard_for(lead_profile, num_shards, shard_by="email"):
+    """Stable shard number of a lead (identical in every process and on every host)."""
+    digest = hashlib.sha256(shard_key(lead_profile, shard_by).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+def iter_shard(leads, shard_index, num_shards, shard_by="email"):
+    """
+    Yield ``(lead_index, lead_profile)`` for the leads of one shard.
+
+    ``lead_index`` is the lead's position in the full input, so shard outputs
+    can be merged back into input order.
+    """
+    for lead_index, lead_profile in enumerate(leads):
+        if shard_for(lead_profile, num_shards, shard_by) == shard_index:
+            yield lead_index, lead_profile
+
+
+def shard_name(shard_index, num_shards):
+    return f"shard-{shard_index:04d}-of-{num_shards:04d}"
+
+
+class ShardLayout:
+    """Paths of the claim files, shard outputs and journals in a shared directory."""
+
+    def __init__(self, output_dir, num_shards):
+        self.output_dir = Path(output_dir)
+        self.num_shards = num_shards
+        self.shard_dir = self.output_dir / "shards"
+        self.claim_dir = self.shard_dir / "claims"
+        self.claim_dir.mkdir(parents=True, exist_ok=True)
+        # Token written into each claim this process holds, to detect a lost claim
+        self._owners = {}
+
+    def output_path(self, shard_index):
+        return self.shard_dir / f"{shard_name(shard_index, self.num_shards)}.jsonl"
+
+    def journal_path(self, shard_index):
+        return self.shard_dir / f"{shard_name(shard_index, self.num_shards)}.journal.jsonl"
+
+    def claim_path(self, shard_index):
+        return self.claim_dir / f"{shard_name(shard_index, self.num_shards)}.claim"
+
+    def merge_claim_path(self):
+        return self.claim_dir / f"merge-of-{self.num_shards:04d}.claim"
+
+    def is_done(self, shard_index):
+        return self.output_path(shard_index).exists()
+
+    def pending(self):
+        """Shards whose output has not been written yet."""
+        return [index for index in range(self.num_shards) if not self.is_done(index)]
+
+    def claim(self, shard_index, stale_after=None):
+        """
+        Atomically claim a shard, returning True if this worker now owns it.
+
+        Claims are created with ``O_CREAT | O_EXCL``, which is atomic on local
+        filesystems and on NFSv3+. A claim not refreshed for ``stale_after``
+        seconds belongs to a dead worker and is taken over.
+        """
+        path = self.claim_path(shard_index)
+        owner = _owner_token()
+
+        for _ in range(2):
+            if not _create_exclusive(path, owner):
+                if stale_after is None or not self._release_stale(path, stale_after):
+                    return False
+                continue
+            # Another worker may have finished the shard just before we claimed it
+            if self.is_done(shard_index):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                return False
+            self._owners[shard_index] = owner
+            return True
+        return False
+
+    def claim_merge(self):
+        """
+        Claim the merge of the finished shards, returning True for exactly one host.
+
+        The claim is kept after a successful merge; ``release_merge`` removes it
+        when the merge fails so that another run can retry.
+        """
+        return _create_exclusive(self.merge_claim_path(), _owner_token())
+
+    def release(self, shard_index):
+        """Give up a claim this worker holds, so the shard can be claimed again at once."""
+        path = self.claim_path(shard_index)
+        try:
+            if path.read_bytes() == self._owners.pop(shard_index, None):
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def release_merge(self):
+        try:
+            os.remove(self.merge_claim_path())
+        except FileNotFoundError:
+            pass
+
+    def heartbeat(self, shard_index):
+        """
+        Refresh a claim so other workers do not consider it stale.
+
+        Returns:
+            bool: False if the claim file no longer holds this process's token,
+                i.e. another worker has taken the shard over
+        """
+        path = self.claim_path(shard_index)
+        try:
+            if path.read_bytes() != self._owners.get(shard_index):
+                return False
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    @contextmanager
+    def keep_alive(self, shard_index, interval):
+        """
+        Refresh the claim from a background thread every ``interval`` seconds.
+
+        Yields:
+            threading.Event: Set once the claim has been lost
+        """
+        stop, lost = threading.Event(), threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                if not self.heartbeat(shard_index):
+                    lost.set()
+                    return
+
+        thread = threading.Thread(target=beat, name=f"shard-{shard_index}-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+            thread.join()
+
+    def _release_stale(self, path, stale_after):
+        """
+        Move a stale claim aside; only one contender wins the rename.
+
+        Between the staleness check and the rename another contender may have
+        moved the stale claim and created a fresh one. The claim is therefore
+        renamed to a name unique to this attempt and checked again: if the moved
+        file is not the stale one that was inspected, it is put back (unless a
+        newer claim already exists) and the takeover is abandoned.
+        """
+        try:
+            stale = path.stat()
+        except FileNotFoundError:
+            return True
+        if time.time() - stale.st_mtime < stale_after:
+            return False
+
+        moved = path.with_name(f"{path.name}.stale-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        try:
+            os.rename(path, moved)
+        except FileNotFoundError:
+            # Another contender moved it first; retry the exclusive create
+            return True
+
+        current = moved.stat()
+        if (current.st_dev, current.st_ino) == (stale.st_dev, stale.st_ino) \
+                and time.time() - current.st_mtime >= stale_after:
+            return True
+        try:
+            os.link(moved, path)
+        except FileExistsError:
+            pass
+        os.remove(moved)
+        return False
+
+
+def run_shard(layout, shard_index, leads_path, product_info, crew_options, concurrency=4,
+              use_crew_workflow=False, shard_by="email", dedupe=None, heartbeat_interval=30.0,
+              pipeline_workers=None, batch_ends_at=None):
+    """
+    Generate every campaign of one shard and write them in lead-index order.
+
+    Args:
+        layout (ShardLayout): Shared directory layout
+        shard_index (int): Shard to run
+        leads_path (str): Lead file (every worker reads it and keeps its shard)
+        product_info (dict): Product/service information
+        crew_options (dict): Keyword arguments for ``build_shard_crew``
+        concurrency (int): Leads in flight within this shard
+        use_crew_workflow (bool): Use ``run_crew_workflow`` per lead
+        shard_by (str): "email" or "company"
+        dedupe (str): "drop" or "merge" to skip duplicate leads within the shard
+        heartbeat_interval (float): Seconds between claim refreshes; the claim is
+            refreshed from a background thread, so slow leads or a long scan of
+            the lead file do not make it look stale
+        pipeline_workers (dict): Research/email/follow-up worker counts to run
+            the shard through ``run_pipeline`` instead of ``run_batch``
+        batch_ends_at (float): ``time.time()`` at which the batch budget runs
+            out; leads not started by then are left for a later run
+
+    Returns:
+        dict: Shard summary with completed/partial/failed counts and elapsed
+            time; ``unfinished`` is True when the budget ran out before every
+            lead was started, in which case the shard output is not published
+
+    Raises:
+        RuntimeError: If another worker took the shard over; the shard output
+            is then left unpublished
+    """
+    from crew.journal import CampaignJournal
+    from crew.leads import iter_leads
+
+    started = time.monotonic()
+    completed = partial = failed = 0
+    all_started = False
+
+    # run_batch yields in completion order; hold results back until every
+    # earlier lead of the shard has finished so the shard file is sorted
+    submitted = deque()
+    finished = {}
+
+    def tracked_leads():
+        nonlocal all_started
+        leads = iter_shard(iter_leads(leads_path), shard_index, layout.num_shards, shard_by)
+        if deduplicator is not None:
+            leads = deduplicator.dedupe(leads, indexed=True)
+        for lead_index, lead_profile in leads:
+            submitted.append(lead_index)
+            yield lead_index, lead_profile
+        all_started = True
+
+    # Copies of a lead share their email (or company), so they land in the same shard
+    deduplicator = LeadDeduplicator(dedupe) if dedupe else None
+    journal = CampaignJournal(layout.journal_path(shard_index), normalized_keys=bool(dedupe))
+    crew = build_shard_crew(journal=journal, **crew_options)
+    output_path = layout.output_path(shard_index)
+    budget_seconds = max(0.0, batch_ends_at - time.time()) if batch_ends_at is not None else None
+    try:
+        if pipeline_workers:
+            results = crew.run_pipeline(tracked_leads(), product_info, use_crew_workflow=use_crew_workflow,
+                                        indexed=True, budget_seconds=budget_seconds, **pipeline_workers)
+        else:
+            results = crew.run_batch(tracked_leads(), product_info, concurrency=concurrency,
+                                     use_crew_workflow=use_crew_workflow, indexed=True,
+                                     budget_seconds=budget_seconds)
+        with layout.keep_alive(shard_index, heartbeat_interval) as claim_lost, \
+                CampaignWriter(output_path.parent, filename=output_path.name) as writer:
+            for result in results:
+                if claim_lost.is_set():
+                    raise RuntimeError(f"Shard {shard_index} was taken over by another worker")
+                status = result["batch"]["status"]
+                if status == "completed":
+                    completed += 1
+                elif status == "partial":
+                    partial += 1
+                else:
+                    failed += 1
+                finished[result["batch"]["lead_index"]] = result
+                while submitted and submitted[0] in finished:
+                    writer.write(finished.pop(submitted.popleft()))
+            if claim_lost.is_set() or not layout.heartbeat(shard_index):
+                raise RuntimeError(f"Shard {shard_index} was taken over by another worker")
+            if not all_started:
+                # The batch budget ran out: keep the shard pending (its journal
+                # holds the finished stages) so that a later run completes it
+                writer.abort()
+                layout.release(shard_index)
+    finally:
+        crew.close()
+        if deduplicator is not None:
+            deduplicator.close()
+
+    return {
+        "shard": shard_index,
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "completed": completed,
+        "partial": partial,
+        "failed": failed,
+        "unfinished": not all_started,
+        "elapsed_seconds": round(time.monotonic() - started, 3)
+    }
+
+
+def build_shard_crew(generation_mode="per_email", research_mode="agentic", llm_cache=None, journal=None,
+                     research_cache=None, share_company_research=True, persona_rewrite_model=None, hedging=None,
+                     campaign_budget=None, count_prompt_tokens=False):
+    """
+    Build a crew inside a worker process.
+
+    Args:
+        llm_cache (dict): ``LLMResponseCache`` keyword arguments, or None to disable
+        research_cache (dict): ``path`` (None keeps it in memory) and ``ttl_seconds``
+            of the company research cache; a shared file lets processes on the
+            same host reuse each other's company research
+        share_company_research (bool): Research each company once per TTL
+        persona_rewrite_model (str): Rewrite model for "persona" generation mode
+        hedging (dict): ``HedgePolicy`` keyword arguments, or None to disable
+        campaign_budget (float): Seconds allowed per campaign before it is
+            returned as a partial campaign
+        count_prompt_tokens (bool): Record prompt token counts on every email
+    """
+    from crew.crew import OutboundSalesCrew
+    from agents.hedging import HedgePolicy
+    from agents.llm_cache import LLMResponseCache
+    from agents.llm_client import LLMClient
+    from agents.research_cache import CompanyResearchCache
+
+    company_cache = None
+    if research_cache:
+        path, ttl_seconds = research_cache.get("path"), research_cache.get("ttl_seconds")
+        company_cache = CompanyResearchCache(
+            LLMResponseCache(path, ttl_seconds=ttl_seconds) if path else None,
+            ttl_seconds=ttl_seconds
+        )
+
+    llm_cache = LLMResponseCache(**llm_cache) if llm_cache else None
+    return OutboundSalesCrew(
+        generation_mode=generation_mode,
+        llm_cache=llm_cache,
+        llm_client=LLMClient.from_config(cache=llm_cache, hedging=HedgePolicy(**hedging)) if hedging else None,
+        research_mode=research_mode,
+        journal=journal,
+        research_cache=company_cache,
+        share_company_research=share_company_research,
+        persona_rewrite_model=persona_rewrite_model,
+        campaign_budget=campaign_budget,
+        count_prompt_tokens=count_prompt_tokens
+    )
+
+
+def _claim_and_run(output_dir, num_shards, stale_after, shard_kwargs):
+    """Worker process loop: claim shards until none are left, running each one."""
+    layout = ShardLayout(output_dir, num_shards)
+    summaries = []
+    # Refresh claims well within the staleness window
+    heartbeat_interval = min(30.0, stale_after / 4) if stale_after else 30.0
+    batch_ends_at = shard_kwargs.get("batch_ends_at")
+    for shard_index in layout.pending():
+        if batch_ends_at is not None and time.time() >= batch_ends_at:
+            break
+        if layout.claim(shard_index, stale_after=stale_after):
+            summaries.append(run_shard(layout, shard_index, heartbeat_interval=heartbeat_interval, **shard_kwargs))
+    return summaries
+
+
+def run_sharded(leads_path, product_info, output_dir, num_shards, processes=None, crew_options=None,
+                concurrency=4, use_crew_workflow=False, shard_by="email", stale_after=600, dedupe=None,
+                pipeline_workers=None, budget_seconds=None):
+    """
+    Run a sharded batch with ``processes`` local worker processes.
+
+    Start the same call on other hosts sharing ``output_dir`` to add machines;
+    every worker pulls unclaimed shards until all are taken.
+
+    Args:
+        leads_path (str): Lead file readable by every worker
+        product_info (dict): Product/service information
+        output_dir (str): Shared output directory
+        num_shards (int): Number of partitions (must match across hosts)
+        processes (int): Local worker processes (default: CPU count, capped at num_shards)
+        crew_options (dict): Keyword arguments for ``build_shard_crew``
+        concurrency (int): Leads in flight per worker process
+        use_crew_workflow (bool): Use ``run_crew_workflow`` per lead
+        shard_by (str): "email" or "company"
+        stale_after (float): Seconds without progress before a claim is taken over
+        dedupe (str): "drop" or "merge" to skip duplicate leads
+        pipeline_workers (dict): Worker counts to run shards through ``run_pipeline``
+        budget_seconds (float): Time budget of this host's run; once it is spent
+            no further leads or shards are started, and shards left unfinished
+            stay pending for the next run
+
+    Returns:
+        list: Summaries of the shards run by this host
+    """
+    if num_shards < 1:
+        raise ValueError("num_shards must be at least 1")
+    if shard_by not in SHARD_BY:
+        raise ValueError(f"shard_by must be one of {SHARD_BY}, got '{shard_by}'")
+
+    processes = max(1, min(processes or os.cpu_count() or 1, num_shards))
+    shard_kwargs = {
+        "leads_path": str(leads_path),
+        "product_info": product_info,
+        "crew_options": crew_options or {},
+        "concurrency": concurrency,
+        "use_crew_workflow": use_crew_workflow,
+        "shard_by": shard_by,
+        "dedupe": dedupe,
+        "pipeline_workers": pipeline_workers,
+        "batch_ends_at": time.time() + budget_seconds if budget_seconds is not None else None
+    }
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(_claim_and_run, str(output_dir), num_shards, stale_after, shard_kwargs)
+            for _ in range(processes)
+        ]
+        summaries = [summary for future in futures for summary in future.result()]
+    return sorted(summaries, key=lambda summary: summary["shard"])
+
+
+def merge_shards(output_dir, num_shards, compression=None, filename="campaigns.jsonl", metrics=None):
+    """
+    Merge finished shard outputs into one file ordered by lead index.
+
+    Shard files are already sorted, so this is a streaming k-way merge; the
+    result is the same for any number of processes or hosts. Hosts that finish
+    at the same time race for an exclusive merge claim, so only one of them
+    writes the merged file. Every merged campaign is added to ``metrics`` (a
+    ``BatchMetrics``) when one is given.
+
+    Returns:
+        Path | None: The merged output file, or None if another host has
+            already claimed the merge
+
+    Raises:
+        RuntimeError: If some shards have not finished yet
+    """
+    layout = ShardLayout(output_dir, num_shards)
+    pending = layout.pending()
+    if pending:
+        raise RuntimeError(f"Cannot merge: {len(pending)} of {num_shards} shards are not finished ({pending[:10]})")
+    if not layout.claim_merge():
+        return None
+
+    files = []
+    try:
+        files = [open(layout.output_path(index), "rb") for index in range(num_shards)]
+        streams = [_sorted_records(f, shard) for shard, f in enumerate(files)]
+        with CampaignWriter(output_dir, filename=filename, compression=compression) as writer:
+            for _, _, line in heapq.merge(*streams):
+                writer.write_raw(line)
+                if metrics is not None:
+                    metrics.add(json.loads(line))
+    except BaseException:
+        layout.release_merge()
+        raise
+    finally:
+        for f in files:
+            f.close()
+    return writer.path
+
+
+def _owner_token():
+    """Claim file contents identifying this host, process and claim."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}\n".encode("utf-8")
+
+
+def _create_exclusive(path, contents):
+    """Create ``path`` with ``O_CREAT | O_EXCL``; False if it already exists."""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "wb") as f:
+        f.write(contents)
+    return True
+
+
+def _sorted_records(f, shard):
+    """``(lead_index, shard, line)`` merge keys for one sorted shard file."""
+    for line in f:
+        yield json.loads(line)["batch"]["lead_index"], shard, line
@@ -5,12 +5,15 @@ This script demonstrates the complete outbound sales automation workflow
 using CrewAI agents to enrich leads and generate personalized email campaigns.
 """
 
+import argparse
 import json
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
-from crew.crew import OutboundSalesCrew
+# The crew, lead reader and response cache are imported where they are used so
+# that `--help` and argument errors return without paying their import cost.
 
 
 def load_environment():
@@ -89,6 +92,12 @@ def display_campaign_results(campaign):
     print("🎯 OUTBOUND SALES CAMPAIGN GENERATED")
     print("="*80)
     
+    if campaign.get("status") == "partial":
+        exceeded = campaign["budget_exceeded"]
+        print(f"\n⏱️ PARTIAL CAMPAIGN: the {exceeded['budget']} time budget of {exceeded['budget_seconds']}s "
+              f"ran out during {exceeded['stage']}")
+        print(f"   Completed stages: {', '.join(exceeded['completed_stages']) or 'none'}")
+    
     # Lead summary
     lead = campaign["lead_profile"]
     print(f"\n👤 TARGET PROSPECT:")
@@ -117,8 +126,11 @@ def display_campaign_results(campaign):
     
     print(f"\n📧 COLD EMAIL:")
     cold_email = emails["cold_email"]
-    print(f"   Subject: {cold_email.get('subject', 'N/A')}")
-    print(f"   Body Preview: {cold_email.get('body', 'N/A')[:100]}...")
+    if cold_email is None:
+        print("   Not generated before the time budget ran out")
+    else:
+        print(f"   Subject: {cold_email.get('subject', 'N/A')}")
+        print(f"   Body Preview: {cold_email.get('body', 'N/A')[:100]}...")
     
     print(f"\n📬 FOLLOW-UP SEQUENCE:")
     for i, followup in enumerate(emails["followups"], 1):
@@ -137,43 +149,521 @@ def display_campaign_results(campaign):
     for metric in metrics:
         benchmark = campaign["success_metrics"]["benchmarks"].get(f"cold_email_{metric}", "Track manually")
         print(f"   • {metric.replace('_', ' ').title()}: {benchmark}")
+    
+    # Stage timings, tokens and cost
+    stage_metrics = campaign.get("metrics")
+    if stage_metrics:
+        print(f"\n⏱️ STAGE METRICS:")
+        for span in stage_metrics["stages"]:
+            print(f"   {span['stage']}: {span['wall_seconds']:.2f}s, {span['llm_calls']} LLM calls, "
+                  f"{span['prompt_tokens']}+{span['completion_tokens']} tokens, ${span['cost_usd']:.4f}")
+        print(f"   Total: {stage_metrics['totals']['wall_seconds']:.2f}s, ${stage_metrics['totals']['cost_usd']:.4f}")
 
 
 def save_campaign_output(campaign, output_dir="output"):
     """Save campaign output to files for easy use."""
-    # Create output directory
-    Path(output_dir).mkdir(exist_ok=True)
+    from crew.output_writer import atomic_write_text
+    
+    # Every file goes through a temp file and an atomic rename, so an
+    # interrupted run never leaves a half-written file behind
+    output_dir = Path(output_dir)
     
     # Save complete campaign as JSON
-    campaign_file = Path(output_dir) / "complete_campaign.json"
-    with open(campaign_file, 'w') as f:
-        json.dump(campaign, f, indent=2, default=str)
+    atomic_write_text(output_dir / "complete_campaign.json", json.dumps(campaign, indent=2, default=str))
     
     # Save individual emails as text files
     emails = campaign["emails"]
     
-    # Cold email
-    cold_email_file = Path(output_dir) / "cold_email.txt"
-    with open(cold_email_file, 'w') as f:
-        f.write(f"Subject: {emails['cold_email']['subject']}\n\n")
-        f.write(emails['cold_email']['body'])
+    # Cold email (missing from a partial campaign that ran out of time first)
+    if emails["cold_email"] is not None:
+        atomic_write_text(
+            output_dir / "cold_email.txt",
+            f"Subject: {emails['cold_email']['subject']}\n\n{emails['cold_email']['body']}"
+        )
     
     # Follow-up emails
     for i, followup in enumerate(emails["followups"], 1):
-        followup_file = Path(output_dir) / f"followup_{i}.txt"
-        with open(followup_file, 'w') as f:
-            f.write(f"Subject: {followup['subject']}\n\n")
-            f.write(followup['body'])
+        atomic_write_text(
+            output_dir / f"followup_{i}.txt",
+            f"Subject: {followup['subject']}\n\n{followup['body']}"
+        )
     
     print(f"\n💾 Campaign files saved to '{output_dir}/' directory")
     print(f"   • complete_campaign.json - Full campaign data")
-    print(f"   • cold_email.txt - Initial outreach email")
-    print(f"   • followup_1.txt - First follow-up email")
-    print(f"   • followup_2.txt - Second follow-up email")
+    if emails["cold_email"] is not None:
+        print(f"   • cold_email.txt - Initial outreach email")
+    for i, label in enumerate(["First", "Second"][:len(emails["followups"])], 1):
+        print(f"   • followup_{i}.txt - {label} follow-up email")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Generate personalized outbound sales campaigns with CrewAI agents."
+    )
+    parser.add_argument(
+        "--leads",
+        help="JSONL or CSV lead export to process as a batch (default: the single sample lead)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4,
+        help="Number of leads processed in parallel in batch mode (default: 4)"
+    )
+    parser.add_argument(
+        "--output-dir", default="output",
+        help="Directory for generated campaign files (default: output)"
+    )
+    parser.add_argument(
+        "--crew-workflow", action="store_true",
+        help="Run the full CrewAI research workflow for every lead in batch mode"
+    )
+    parser.add_argument(
+        "--research-mode", choices=["agentic", "fast"], default="agentic",
+        help="'agentic' runs the CrewAI research agent and uses its output; 'fast' skips it (default: agentic)"
+    )
+    parser.add_argument(
+        "--single-call", action="store_true",
+        help="Draft the cold email and all follow-ups with one OpenAI call per lead"
+    )
+    parser.add_argument(
+        "--persona-mode", action="store_true",
+        help="Draft one sequence per (role level, industry, company size) persona and fill in each lead's details"
+    )
+    parser.add_argument(
+        "--persona-rewrite-model",
+        help="Small model (e.g. gpt-4o-mini) that rewrites each lead's filled persona sequence"
+    )
+    parser.add_argument(
+        "--llm-cache", default=".cache/llm_responses.sqlite3",
+        help="SQLite file caching OpenAI responses across runs (default: .cache/llm_responses.sqlite3)"
+    )
+    parser.add_argument(
+        "--no-llm-cache", action="store_true",
+        help="Disable the OpenAI response cache"
+    )
+    parser.add_argument(
+        "--refresh-llm-cache", action="store_true",
+        help="Ignore cached responses but store the fresh ones"
+    )
+    parser.add_argument(
+        "--llm-cache-ttl", type=float, default=7 * 24 * 3600,
+        help="Seconds before a cached response expires (default: 7 days)"
+    )
+    parser.add_argument(
+        "--company-cache", default=".cache/company_research.sqlite3",
+        help="SQLite file caching company research and web searches across runs "
+             "(default: .cache/company_research.sqlite3)"
+    )
+    parser.add_argument(
+        "--no-company-cache", action="store_true",
+        help="Keep company research in memory for this run only"
+    )
+    parser.add_argument(
+        "--company-cache-ttl", type=float, default=7 * 24 * 3600,
+        help="Seconds before cached company research and searches expire (default: 7 days)"
+    )
+    parser.add_argument(
+        "--per-lead-research", action="store_true",
+        help="Research every lead's company again instead of sharing it across contacts"
+    )
+    parser.add_argument(
+        "--hedge", action="store_true",
+        help="Duplicate OpenAI requests slower than a percentile of recent latency and keep the first answer"
+    )
+    parser.add_argument(
+        "--hedge-percentile", type=float, default=95,
+        help="Latency percentile after which a request is hedged (default: 95)"
+    )
+    parser.add_argument(
+        "--hedge-budget", type=float, default=0.05,
+        help="Maximum fraction of requests that may be hedged (default: 0.05)"
+    )
+    parser.add_argument(
+        "--prompt-token-counts", action="store_true",
+        help="Record prompt_token_counts (shared prefix, per-lead and total tokens) on every generated email"
+    )
+    parser.add_argument(
+        "--campaign-budget", type=float,
+        help="Seconds allowed per campaign across research, email and follow-up stages; a campaign "
+             "still running then is saved as a partial campaign (default: no budget)"
+    )
+    parser.add_argument(
+        "--batch-budget", type=float,
+        help="Seconds allowed for the whole batch: no leads are started afterwards and leads in flight "
+             "are saved as partial campaigns (default: no budget; not used with --shards)"
+    )
+    parser.add_argument(
+        "--dedupe", choices=["none", "drop", "merge"], default="none",
+        help="Skip duplicate leads (same normalized email, name, title, company, industry and size): "
+             "'drop' keeps the first copy, 'merge' fills its gaps from later copies (default: none)"
+    )
+    parser.add_argument(
+        "--dedupe-db",
+        help="SQLite file for the keys seen while deduplicating (default: a temporary file)"
+    )
+    parser.add_argument(
+        "--compression", choices=["none", "gzip", "zstd"], default="none",
+        help="Compress batch output (zstd needs the zstandard package) (default: none)"
+    )
+    parser.add_argument(
+        "--partition-per-lead", action="store_true",
+        help="Write each batch campaign to its own file under <output-dir>/campaigns/"
+    )
+    parser.add_argument(
+        "--journal",
+        help="Append-only journal of finished campaign stages; rerunning with the same "
+             "journal resumes where the last run stopped instead of regenerating"
+    )
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="Run batch leads through a staged pipeline (research, cold email and follow-up workers "
+             "connected by bounded queues) instead of one thread per lead"
+    )
+    parser.add_argument(
+        "--research-workers", type=int, default=2,
+        help="Research/enrichment workers in pipeline mode (default: 2)"
+    )
+    parser.add_argument(
+        "--email-workers", type=int, default=4,
+        help="Cold email workers in pipeline mode (default: 4)"
+    )
+    parser.add_argument(
+        "--followup-workers", type=int, default=4,
+        help="Follow-up workers in pipeline mode (default: 4)"
+    )
+    parser.add_argument(
+        "--profile", metavar="DIR",
+        help="Profile crew stages of sampled leads with cProfile and tracemalloc, writing reports to DIR"
+    )
+    parser.add_argument(
+        "--profile-sample-rate", type=float,
+        help="Fraction of leads to profile (default: 0.05 in batch mode, 1.0 for a single lead)"
+    )
+    parser.add_argument(
+        "--shards", type=int,
+        help="Hash-partition the lead file into this many shards and run them in worker processes; "
+             "start the same command on other hosts sharing --output-dir to add machines"
+    )
+    parser.add_argument(
+        "--processes", type=int,
+        help="Worker processes on this host in sharded mode (default: CPU count)"
+    )
+    parser.add_argument(
+        "--shard-by", choices=["email", "company"], default="email",
+        help="Lead field used to assign shards (default: email)"
+    )
+    parser.add_argument(
+        "--stale-claim-seconds", type=float, default=600,
+        help="Take over a shard whose worker has made no progress for this long (default: 600)"
+    )
+    args = parser.parse_args(argv)
+    if args.shards:
+        # Options sharded runs cannot honour: shard outputs are merged into one
+        # stream, workers are separate processes and a shard that is taken over
+        # must not find its own leads already marked as seen
+        unsupported = [
+            flag for flag, value in (
+                ("--partition-per-lead", args.partition_per_lead),
+                ("--profile", args.profile),
+                ("--dedupe-db", args.dedupe_db)
+            ) if value
+        ]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} cannot be used with --shards")
+    return args
+
+
+def generation_mode(args):
+    """Crew generation mode selected on the command line."""
+    if args.persona_mode:
+        return "persona"
+    return "single_call" if args.single_call else "per_email"
+
+
+def build_crew(args):
+    """Create the crew configured from command line arguments."""
+    from crew.crew import OutboundSalesCrew
+    from agents.llm_cache import LLMResponseCache
+    from agents.llm_client import LLMClient
+    from agents.hedging import HedgePolicy
+    from agents.research_cache import CompanyResearchCache
+    from crew.journal import CampaignJournal
+    
+    profiler = None
+    if args.profile:
+        from crew.profiling import StageProfiler
+        sample_rate = args.profile_sample_rate
+        if sample_rate is None:
+            sample_rate = 0.05 if args.leads else 1.0
+        profiler = StageProfiler(args.profile, sample_rate=sample_rate)
+    
+    journal = None
+    if args.journal:
+        journal = CampaignJournal(args.journal, normalized_keys=args.dedupe != "none")
+        stats = journal.stats()
+        if stats["stages"]:
+            print(f"♻️ Resuming from journal '{args.journal}': {stats['stages']} stages "
+                  f"across {stats['campaigns']} campaigns already done")
+    
+    llm_cache = None
+    if not args.no_llm_cache:
+        llm_cache = LLMResponseCache(
+            args.llm_cache,
+            ttl_seconds=args.llm_cache_ttl,
+            bypass=args.refresh_llm_cache
+        )
+    
+    llm_client = None
+    if args.hedge:
+        llm_client = LLMClient.from_config(cache=llm_cache, hedging=HedgePolicy(
+            percentile=args.hedge_percentile, budget_ratio=args.hedge_budget
+        ))
+    
+    company_store = None
+    if not args.no_company_cache:
+        company_store = LLMResponseCache(args.company_cache, ttl_seconds=args.company_cache_ttl)
+    
+    return OutboundSalesCrew(
+        generation_mode=generation_mode(args),
+        llm_cache=llm_cache,
+        research_mode=args.research_mode,
+        llm_client=llm_client,
+        journal=journal,
+        profiler=profiler,
+        research_cache=CompanyResearchCache(company_store, ttl_seconds=args.company_cache_ttl),
+        share_company_research=not args.per_lead_research,
+        persona_rewrite_model=args.persona_rewrite_model,
+        campaign_budget=args.campaign_budget,
+        count_prompt_tokens=args.prompt_token_counts
+    )
 
 
-def main():
+def print_run_stats(crew):
+    """Print OpenAI response cache, rate limiter and enrichment cache counters."""
+    stats = crew.llm_client.cache_stats()
+    if stats:
+        print(f"🗄️ LLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+    
+    limits = crew.llm_client.rate_limit_stats()
+    if limits and limits["requests"]:
+        print(f"🚦 OpenAI requests: {limits['requests']} sent, {limits['throttled']} throttled, "
+              f"concurrency limit {limits['concurrency_limit']}")
+    
+    hedging = crew.llm_client.hedge_stats()
+    if hedging and hedging["requests"]:
+        print(f"🪂 Hedging: {hedging['hedges']} of {hedging['requests']} requests hedged "
+              f"({hedging['hedge_rate']:.1%}), {hedging['hedge_wins']} won by the hedge, "
+              f"{hedging['hedge_failures']} failed on both; "
+              f"p99 {hedging['request_p99_seconds']}s per request vs {hedging['caller_p99_seconds']}s seen by callers")
+    
+    if crew.journal is not None:
+        journal = crew.journal.stats()
+        print(f"📓 Journal: {journal['replayed']} stages from earlier runs, {journal['recorded']} recorded this run")
+    
+    research = crew.research_cache.stats()
+    if research["company_hits"] or research["company_misses"]:
+        print(f"🏢 Company research: {research['company_misses']} companies researched, "
+              f"{research['company_hits']} leads reused shared research; web searches: "
+              f"{research['search_misses']} run, {research['search_hits']} served from cache")
+    
+    if crew.generation_mode == "persona":
+        personas = crew.persona_agent_class.persona_stats()
+        print(f"🎭 Personas: {personas['personas']} base sequences drafted, "
+              f"{personas['leads_reusing_persona']} leads filled from an existing one")
+    
+    enrichment = crew.research_agent_class.enrichment_cache_info()
+    print(f"🧠 Enrichment cache: {enrichment['hits']} hits, {enrichment['misses']} misses ({enrichment['hit_rate']:.0%} hit rate)")
+
+
+def profile_stage(crew, lead_profile, stage):
+    """Profile an entry-point stage for a lead when profiling is enabled."""
+    from contextlib import ExitStack
+    
+    stack = ExitStack()
+    if crew.profiler is not None:
+        stack.enter_context(crew.profiler.lead(lead_profile))
+        stack.enter_context(crew.profiler.stage(stage))
+    return stack
+
+
+def write_profile_reports(crew):
+    """Write profiling reports if profiling is enabled."""
+    if crew.profiler is not None:
+        report_dir = crew.profiler.write_reports()
+        print(f"🔬 Stage profiles written to '{report_dir}/' (pstats, cumulative time and top allocations)")
+
+
+def print_stage_metrics(metrics):
+    """Print per-stage latency, token and cost totals from a ``BatchMetrics`` aggregate."""
+    print("\n⏱️ Stage breakdown:")
+    for stage, values in metrics["stages"].items():
+        print(f"   {stage:>16}: {values['count']} runs, mean {values['mean_wall_seconds']:.2f}s, "
+              f"queue wait {values['mean_queue_wait_seconds']:.2f}s, {values['retries']} retries, "
+              f"{values['prompt_tokens'] + values['completion_tokens']} tokens, ${values['cost_usd']:.4f}")
+    print(f"   Estimated spend: ${metrics['totals']['cost_usd']:.4f}")
+
+
+def run_batch_campaigns(crew, leads_path, product_info, concurrency, output_dir, use_crew_workflow=False,
+                        compression=None, partition_per_lead=False, pipeline_workers=None, dedupe=None,
+                        dedupe_db=None, budget_seconds=None):
+    """
+    Run a batch of leads through the crew, streaming each campaign to disk as it completes.
+    
+    ``pipeline_workers`` (research/email/follow-up worker counts) switches from
+    ``run_batch`` to the staged ``run_pipeline``. ``dedupe`` ("drop" or "merge")
+    removes duplicate leads before generation; lead indices still refer to the
+    input file. ``budget_seconds`` is the time budget of the whole batch.
+    """
+    from crew.leads import iter_leads
+    from crew.dedup import LeadDeduplicator
+    from crew.output_writer import CampaignWriter
+    from agents.metrics import BatchMetrics
+    
+    batch_metrics = BatchMetrics()
+    
+    leads = enumerate(iter_leads(leads_path))
+    deduplicator = None
+    if dedupe:
+        deduplicator = LeadDeduplicator(dedupe, path=dedupe_db)
+        leads = deduplicator.dedupe(leads, indexed=True)
+    
+    try:
+        if pipeline_workers:
+            print(f"\n📂 Processing leads from {leads_path} through a staged pipeline "
+                  f"({pipeline_workers['research_workers']} research, {pipeline_workers['email_workers']} email, "
+                  f"{pipeline_workers['followup_workers']} follow-up workers)...")
+            results = crew.run_pipeline(
+                leads, product_info, use_crew_workflow=use_crew_workflow, indexed=True,
+                budget_seconds=budget_seconds, **pipeline_workers
+            )
+        else:
+            print(f"\n📂 Processing leads from {leads_path} with {concurrency} leads in flight...")
+            results = crew.run_batch(
+                leads, product_info, concurrency=concurrency, use_crew_workflow=use_crew_workflow, indexed=True,
+                budget_seconds=budget_seconds
+            )
+        started = time.monotonic()
+        completed = partial = failed = 0
+        
+        with CampaignWriter(output_dir, compression=compression, partition_per_lead=partition_per_lead) as writer:
+            for result in results:
+                with profile_stage(crew, result["lead_profile"], "write_campaign"):
+                    writer.write(result)
+                batch_metrics.add(result)
+                
+                batch_info = result["batch"]
+                lead_name = result["lead_profile"].get("name", "Unknown")
+                if batch_info["status"] == "completed":
+                    completed += 1
+                    print(f"   ✅ #{batch_info['lead_index']} {lead_name}")
+                elif batch_info["status"] == "partial":
+                    partial += 1
+                    exceeded = result["budget_exceeded"]
+                    print(f"   ⏱️ #{batch_info['lead_index']} {lead_name}: partial, {exceeded['budget']} budget "
+                          f"ran out during {exceeded['stage']}")
+                else:
+                    failed += 1
+                    print(f"   ❌ #{batch_info['lead_index']} {lead_name}: {batch_info['error']}")
+        
+        elapsed = time.monotonic() - started
+        rate = (completed + partial + failed) / elapsed if elapsed > 0 else 0.0
+        print(f"\n📊 Batch finished: {completed} completed, {partial} partial, {failed} failed in {elapsed:.1f}s "
+              f"({rate:.2f} leads/sec)")
+        print(f"💾 Campaigns saved to '{writer.path}'")
+        if deduplicator is not None:
+            stats = deduplicator.stats()
+            print(f"🧹 Deduplication ({stats['mode']}): {stats['duplicates']} duplicates of {stats['seen']} leads skipped")
+    finally:
+        if deduplicator is not None:
+            deduplicator.close()
+    
+    write_batch_metrics(batch_metrics, output_dir)
+
+
+def write_batch_metrics(batch_metrics, output_dir):
+    """Write the per-stage latency, token and cost aggregate for dashboards and reports."""
+    from crew.output_writer import atomic_write_text
+    
+    atomic_write_text(Path(output_dir) / "metrics.json", json.dumps(batch_metrics.to_dict(), indent=2))
+    atomic_write_text(Path(output_dir) / "metrics.prom", batch_metrics.to_prometheus())
+    print_stage_metrics(batch_metrics.to_dict())
+    print(f"📈 Stage metrics saved to '{output_dir}/metrics.json' and '{output_dir}/metrics.prom'")
+
+
+def run_sharded_campaigns(args, product_info):
+    """Run a sharded batch on this host and merge the shards once all are finished."""
+    from crew.sharding import run_sharded, merge_shards, ShardLayout
+    from agents.metrics import BatchMetrics
+    
+    crew_options = {
+        "generation_mode": generation_mode(args),
+        "research_mode": args.research_mode,
+        "llm_cache": None if args.no_llm_cache else {
+            "path": args.llm_cache,
+            "ttl_seconds": args.llm_cache_ttl,
+            "bypass": args.refresh_llm_cache
+        },
+        "research_cache": {
+            "path": None if args.no_company_cache else args.company_cache,
+            "ttl_seconds": args.company_cache_ttl
+        },
+        "share_company_research": not args.per_lead_research,
+        "persona_rewrite_model": args.persona_rewrite_model,
+        "hedging": {"percentile": args.hedge_percentile, "budget_ratio": args.hedge_budget} if args.hedge else None,
+        "campaign_budget": args.campaign_budget,
+        "count_prompt_tokens": args.prompt_token_counts
+    }
+    
+    print(f"\n🧩 Running {args.shards} shards of {args.leads} with {args.processes or os.cpu_count()} "
+          f"processes, {args.concurrency} leads in flight each...")
+    started = time.monotonic()
+    summaries = run_sharded(
+        args.leads, product_info, args.output_dir, args.shards,
+        processes=args.processes,
+        crew_options=crew_options,
+        concurrency=args.concurrency,
+        use_crew_workflow=args.crew_workflow,
+        shard_by=args.shard_by,
+        stale_after=args.stale_claim_seconds,
+        dedupe=None if args.dedupe == "none" else args.dedupe,
+        pipeline_workers={
+            "research_workers": args.research_workers,
+            "email_workers": args.email_workers,
+            "followup_workers": args.followup_workers
+        } if args.pipeline else None,
+        budget_seconds=args.batch_budget
+    )
+    for summary in summaries:
+        marker = "⏱️" if summary["unfinished"] else "✅"
+        print(f"   {marker} shard {summary['shard']}: {summary['completed']} completed, {summary['partial']} partial, "
+              f"{summary['failed']} failed "
+              f"in {summary['elapsed_seconds']:.1f}s (pid {summary['pid']})"
+              + ("; batch budget ran out, left for the next run" if summary["unfinished"] else ""))
+    print(f"📊 This host ran {len(summaries)} shards in {time.monotonic() - started:.1f}s")
+    
+    pending = ShardLayout(args.output_dir, args.shards).pending()
+    if pending:
+        print(f"⏳ {len(pending)} shards are not finished yet (running on other hosts, or left by the batch "
+              f"budget); the last host to finish merges them")
+        return
+    
+    batch_metrics = BatchMetrics()
+    merged = merge_shards(
+        args.output_dir, args.shards,
+        compression=None if args.compression == "none" else args.compression,
+        metrics=batch_metrics
+    )
+    if merged is None:
+        print("⏳ Another host finished at the same time and is merging the shards")
+        return
+    print(f"💾 Campaigns from all shards merged into '{merged}'")
+    write_batch_metrics(batch_metrics, args.output_dir)
+
+
+def main(argv=None):
     """Main execution function."""
+    args = parse_args(argv)
+    
     print("🚀 Starting Outbound Sales Crew")
     print("=" * 50)
     
@@ -181,6 +671,32 @@ def main():
     if not load_environment():
         return
     
+    # Batch mode: stream a lead export through the crew
+    if args.leads:
+        product_info = get_product_info()
+        print(f"✅ Product info loaded: {product_info['name']}")
+        if args.shards:
+            run_sharded_campaigns(args, product_info)
+            return
+        with build_crew(args) as crew:
+            run_batch_campaigns(
+                crew, args.leads, product_info, args.concurrency, args.output_dir,
+                use_crew_workflow=args.crew_workflow,
+                compression=None if args.compression == "none" else args.compression,
+                partition_per_lead=args.partition_per_lead,
+                pipeline_workers={
+                    "research_workers": args.research_workers,
+                    "email_workers": args.email_workers,
+                    "followup_workers": args.followup_workers
+                } if args.pipeline else None,
+                dedupe=None if args.dedupe == "none" else args.dedupe,
+                dedupe_db=args.dedupe_db,
+                budget_seconds=args.batch_budget
+            )
+            print_run_stats(crew)
+            write_profile_reports(crew)
+        return
+    
     # Load sample lead profile
     lead_profile = load_sample_lead()
     if not lead_profile:
@@ -193,28 +709,33 @@ def main():
     try:
         # Initialize the crew
         print("\n🤖 Initializing Outbound Sales Crew...")
-        crew = OutboundSalesCrew()
-        
-        # Display crew information
-        crew_info = crew.get_crew_info()
-        print(f"✅ {crew_info['crew_name']} v{crew_info['version']} initialized")
-        print(f"   Agents: {len(crew_info['agents'])} specialized agents")
-        
-        # Generate the campaign
-        print(f"\n🎯 Generating outbound sales campaign...")
-        print(f"   Target: {lead_profile['name']} at {lead_profile['company']}")
-        
-        campaign = crew.run_crew_workflow(lead_profile, product_info)
-        
-        # Display results
-        display_campaign_results(campaign)
-        
-        # Save output files
-        save_campaign_output(campaign)
-        
-        print(f"\n✅ Campaign generation completed successfully!")
-        print(f"🎉 Ready to launch outbound sales campaign for {lead_profile['name']}")
-        
+        with build_crew(args) as crew:
+            # Display crew information
+            crew_info = crew.get_crew_info()
+            print(f"✅ {crew_info['crew_name']} v{crew_info['version']} initialized")
+            print(f"   Agents: {len(crew_info['agents'])} specialized agents")
+            
+            # Generate the campaign
+            print(f"\n🎯 Generating outbound sales campaign...")
+            print(f"   Target: {lead_profile['name']} at {lead_profile['company']}")
+            
+            campaign = crew.run_crew_workflow(lead_profile, product_info)
+            
+            # Display results
+            display_campaign_results(campaign)
+            
+            # Save output files
+            with profile_stage(crew, lead_profile, "save_campaign_output"):
+                save_campaign_output(campaign, args.output_dir)
+            print_run_stats(crew)
+            write_profile_reports(crew)
+            
+            if campaign.get("status") == "partial":
+                print(f"\n⏱️ Campaign generation stopped at the time budget; partial campaign saved")
+                return
+            print(f"\n✅ Campaign generation completed successfully!")
+            print(f"🎉 Ready to launch outbound sales campaign for {lead_profile['name']}")
+            
     except Exception as e:
         print(f"\n❌ Error generating campaign: {e}")
         print("Please check your API keys and try again.")
@@ -2,21 +2,30 @@
 Tasks for the Outbound Sales Crew workflow.
 """
 
-from crewai import Task
 from textwrap import dedent
+from agents.prompt_builder import format_fields, format_value, product_block
 
 
 class OutboundSalesTasks:
-    """Task definitions for the outbound sales automation workflow."""
+    """
+    Task definitions for the outbound sales automation workflow.
+    
+    Descriptions serialize profiles as compact ``Key: value`` lines rather than
+    dict reprs, and place the product block (shared across a batch) ahead of
+    the per-lead data.
+    """
     
     def research_lead_task(self, agent, lead_profile):
         """Task for researching and enriching lead data."""
+        from crewai import Task
+        
         return Task(
-            description=dedent(f"""
+            description=dedent("""
                 Analyze and enrich the following lead profile with comprehensive 
                 company and role-specific insights:
                 
-                Lead Profile: {lead_profile}
+                Lead Profile:
+                {lead_profile}
                 
                 Your research should include:
                 1. Company context and size analysis
@@ -28,28 +37,137 @@ class OutboundSalesTasks:
                 
                 Provide a detailed enriched profile that will enable highly 
                 personalized and relevant outreach.
-            """),
+                
+                Respond with a single JSON object using exactly these keys:
+                {{
+                  "company_size_category": "e.g. small startup, mid-size company, enterprise organization",
+                  "likely_pain_points": ["..."],
+                  "role_context": {{
+                    "level": "e.g. C-Level, Technical Leadership, Professional",
+                    "priorities": ["..."],
+                    "communication_style": "..."
+                  }},
+                  "industry_insights": {{
+                    "key_trends": ["..."],
+                    "common_challenges": ["..."]
+                  }},
+                  "personalization_hooks": ["..."]
+                }}
+            """).format(lead_profile=self._format_profile(lead_profile)),
             agent=agent,
-            expected_output="""A comprehensive enriched lead profile containing:
-            - Original lead data plus additional context
+            expected_output="""A JSON object (no surrounding prose) with the keys
+            company_size_category, likely_pain_points, role_context (level, priorities,
+            communication_style), industry_insights (key_trends, common_challenges) and
+            personalization_hooks, describing:
             - Company size category and characteristics
             - Role-specific priorities and communication preferences
             - Industry insights and current trends
             - Identified pain points and challenges
-            - Specific personalization hooks for outreach
-            - Recommended approach strategy""",
+            - Specific personalization hooks for outreach""",
+            async_execution=False
+        )
+    
+    def research_company_task(self, agent, lead_profile):
+        """Task for researching the lead's company once for every contact there."""
+        from crewai import Task
+        
+        company_fields = format_fields([
+            ("Company", lead_profile.get('company', '')),
+            ("Industry", lead_profile.get('industry', '')),
+            ("Company size", lead_profile.get('company_size', '')),
+            ("Company info", lead_profile.get('company_info', {}))
+        ])
+        return Task(
+            description=dedent("""
+                Research the following company. The findings are shared by every
+                contact at this company, so cover the company only, not any
+                individual role:
+                
+                Company:
+                {company}
+                
+                Your research should include:
+                1. What the company does and its current stage
+                2. Company size analysis
+                3. Industry-specific insights and trends
+                4. Recent developments (funding, launches, hiring, news)
+                5. Company-level personalization hooks for outreach
+                
+                Respond with a single JSON object using exactly these keys:
+                {{
+                  "company_summary": "...",
+                  "company_size_category": "e.g. small startup, mid-size company, enterprise organization",
+                  "industry_insights": {{
+                    "key_trends": ["..."],
+                    "common_challenges": ["..."]
+                  }},
+                  "recent_developments": ["..."],
+                  "personalization_hooks": ["..."]
+                }}
+            """).format(company=company_fields),
+            agent=agent,
+            expected_output="""A JSON object (no surrounding prose) with the keys
+            company_summary, company_size_category, industry_insights (key_trends,
+            common_challenges), recent_developments and personalization_hooks""",
+            async_execution=False
+        )
+    
+    def research_role_task(self, agent, lead_profile, company_research):
+        """Task for the role-specific research of a lead whose company is already researched."""
+        from crewai import Task
+        
+        return Task(
+            description=dedent("""
+                The company of this lead has already been researched:
+                {company_research}
+                
+                Using that company research, analyze only the role-specific
+                context of this lead:
+                
+                Lead Profile:
+                {lead_profile}
+                
+                Your research should include:
+                1. Role responsibilities and priorities based on job title
+                2. Likely pain points and challenges for this role at this company
+                3. Communication style preferences for this role level
+                4. Personalization hooks specific to this person
+                
+                Respond with a single JSON object using exactly these keys:
+                {{
+                  "likely_pain_points": ["..."],
+                  "role_context": {{
+                    "level": "e.g. C-Level, Technical Leadership, Professional",
+                    "priorities": ["..."],
+                    "communication_style": "..."
+                  }},
+                  "personalization_hooks": ["..."]
+                }}
+            """).format(
+                company_research=format_fields(company_research.items()),
+                lead_profile=self._format_profile(lead_profile)
+            ),
+            agent=agent,
+            expected_output="""A JSON object (no surrounding prose) with the keys
+            likely_pain_points, role_context (level, priorities, communication_style)
+            and personalization_hooks for this lead's role""",
             async_execution=False
         )
     
     def draft_cold_email_task(self, agent, enriched_profile, product_info):
         """Task for drafting the initial cold outreach email."""
+        from crewai import Task
+        
         return Task(
-            description=dedent(f"""
+            description=dedent("""
                 Create a compelling, personalized cold outreach email using the 
                 enriched lead profile and product information.
                 
-                Enriched Lead Profile: {enriched_profile}
-                Product Information: {product_info}
+                Product Information:
+                {product_info}
+                
+                Enriched Lead Profile:
+                {enriched_profile}
                 
                 The email should:
                 1. Use specific personalization from the enriched profile
@@ -63,7 +181,10 @@ class OutboundSalesTasks:
                 
                 Focus on building genuine connection and demonstrating understanding 
                 of their specific situation.
-            """),
+            """).format(
+                product_info=product_block(product_info),
+                enriched_profile=self._format_profile(enriched_profile)
+            ),
             agent=agent,
             expected_output="""A complete cold email package including:
             - Compelling subject line that encourages opens
@@ -77,14 +198,21 @@ class OutboundSalesTasks:
     
     def create_followup_sequence_task(self, agent, enriched_profile, cold_email, product_info):
         """Task for creating the follow-up email sequence."""
+        from crewai import Task
+        
         return Task(
-            description=dedent(f"""
+            description=dedent("""
                 Create a sequence of natural, value-added follow-up emails for 
                 prospects who haven't responded to the initial outreach.
                 
-                Enriched Lead Profile: {enriched_profile}
-                Original Cold Email: {cold_email}
-                Product Information: {product_info}
+                Product Information:
+                {product_info}
+                
+                Enriched Lead Profile:
+                {enriched_profile}
+                
+                Original Cold Email:
+                {cold_email}
                 
                 Create 2 follow-up emails:
                 1. First follow-up (3 days after initial email):
@@ -102,7 +230,11 @@ class OutboundSalesTasks:
                 
                 Each follow-up should feel natural and helpful rather than pushy,
                 with different subject lines and fresh content.
-            """),
+            """).format(
+                product_info=product_block(product_info),
+                enriched_profile=self._format_profile(enriched_profile),
+                cold_email=self._format_email(cold_email)
+            ),
             agent=agent,
             expected_output="""A complete follow-up sequence containing:
             - Follow-up #1 (3-day): Subject line and body with new value/insight
@@ -116,15 +248,22 @@ class OutboundSalesTasks:
     
     def compile_outreach_campaign_task(self, agent, research_result, cold_email, followup_sequence):
         """Task for compiling the complete outreach campaign."""
+        from crewai import Task
+        
         return Task(
-            description=dedent(f"""
+            description=dedent("""
                 Compile all components into a complete, ready-to-execute outbound 
                 sales campaign for this lead.
                 
                 Components to compile:
-                - Research insights: {research_result}
-                - Cold email: {cold_email}
-                - Follow-up sequence: {followup_sequence}
+                Research insights:
+                {research_result}
+                
+                Cold email:
+                {cold_email}
+                
+                Follow-up sequence:
+                {followup_sequence}
                 
                 Create a comprehensive campaign package that includes:
                 1. Executive summary of the lead and approach strategy
@@ -135,7 +274,11 @@ class OutboundSalesTasks:
                 6. Alternative approaches if initial sequence doesn't work
                 
                 Format the output for easy use by sales teams.
-            """),
+            """).format(
+                research_result=str(research_result).strip(),
+                cold_email=self._format_email(cold_email),
+                followup_sequence="\n\n".join(self._format_email(f) for f in followup_sequence)
+            ),
             agent=agent,
             expected_output="""A complete outbound sales campaign package including:
             - Lead profile summary and key insights
@@ -146,3 +289,14 @@ class OutboundSalesTasks:
             - Alternative approach suggestions for continued outreach""",
             async_execution=False
         )
+    
+    def _format_profile(self, profile):
+        """Serialize a lead profile as compact ``key: value`` lines."""
+        return format_fields(profile.items())
+    
+    def _format_email(self, email):
+        """Serialize an email as its subject and body."""
+        return format_fields([
+            ("Subject", email.get("subject", "")),
+            ("Body", email.get("body", ""))
+        ]) if isinstance(email, dict) else format_value(email)